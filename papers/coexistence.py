@@ -0,0 +1,331 @@
+#!/usr/bin/python2
+from __future__ import division, print_function
+import numpy as np
+
+# Phase coexistence, two ways.
+#
+# From tabulated data (e.g. the Gibbs free energy vs pressure of the
+# fluid and crystal in fuzzy-fmt) coexistence is where the two curves
+# cross.  intersections() finds every crossing of two polylines by
+# merging their sorted breakpoints, rather than trying every pair of
+# segments.
+#
+# From a free energy per volume f(T, n) that we can evaluate anywhere
+# (e.g. SW.ftot) coexistence is a common tangent: two densities with
+# equal chemical potential mu = df/dn and equal pressure p = n mu - f.
+# common_tangent() solves for it by Newton's method in ln n (vectorized
+# over temperature), and trace() follows the solution in temperature
+# by pseudo-arclength continuation, choosing its own step size, so it
+# can get right up to the critical point without hand-tuned guesses.
+# coexistence_curve() puts the two together to give a whole curve on
+# any grid of temperatures in one call.
+
+################################ Crossing curves ##################################
+
+def _rising_runs(x, y):
+    # indices of segments along which both x and y increase, grouped
+    # into runs of consecutive segments (on which x is sorted)
+    rising = (np.diff(x) > 0) & (np.diff(y) > 0)
+    edges = np.diff(np.concatenate(([0], rising.astype(int), [0])))
+    return zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0])
+
+def intersections(x1, y1, x2, y2):
+    """Every crossing of polyline (x1, y1) with polyline (x2, y2).
+
+    Only segments along which both x and y increase are considered
+    (for g vs p that is any physical branch).  Returns arrays x, y, i,
+    j of the crossings, where i and j are the segments of the two
+    curves that cross, sorted by i and then j.
+    """
+    x1, y1, x2, y2 = [np.asarray(a, dtype=float) for a in (x1, y1, x2, y2)]
+    found = []
+    for start1, end1 in _rising_runs(x1, y1):
+        X1 = x1[start1:end1+1]
+        Y1 = y1[start1:end1+1]
+        for start2, end2 in _rising_runs(x2, y2):
+            X2 = x2[start2:end2+1]
+            Y2 = y2[start2:end2+1]
+            lo = max(X1[0], X2[0])
+            hi = min(X1[-1], X2[-1])
+            if lo >= hi:
+                continue
+            # Between neighboring breakpoints of either curve both are
+            # straight lines, so they cross wherever their difference
+            # changes sign.
+            x = np.union1d(X1[(X1 >= lo) & (X1 <= hi)], X2[(X2 >= lo) & (X2 <= hi)])
+            d = np.interp(x, X1, Y1) - np.interp(x, X2, Y2)
+            k = np.nonzero(d[:-1]*d[1:] < 0)[0]
+            xc = x[k] - d[k]*(x[k+1] - x[k])/(d[k+1] - d[k])
+            i = start1 + np.searchsorted(X1, xc) - 1
+            j = start2 + np.searchsorted(X2, xc) - 1
+            # a crossing exactly at a breakpoint doesn't count
+            ok = ((x1[i] < xc) & (xc < x1[i+1]) & (x2[j] < xc) & (xc < x2[j+1]))
+            found.append((xc[ok], np.interp(xc[ok], X1, Y1), i[ok], j[ok]))
+    if len(found) == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    x, y, i, j = [np.concatenate(a) for a in zip(*found)]
+    order = np.lexsort((j, i))
+    return x[order], y[order], i[order], j[order]
+
+def first_intersection(x1, y1, x2, y2):
+    """The (x, y) of the crossing earliest along the first curve, or
+    None if the curves never cross."""
+    x, y, i, j = intersections(x1, y1, x2, y2)
+    if len(x) == 0:
+        return None
+    return x[0], y[0]
+
+def first_crossing(x, y, y0):
+    """Linearly interpolate the x at which y first rises above y0, or
+    return None if it never does."""
+    above = np.nonzero(np.asarray(y)[1:] > y0)[0]
+    if len(above) == 0:
+        return None
+    i = above[0] + 1
+    m = (y[i] - y[i-1])/(x[i] - x[i-1])
+    return x[i] - (y[i] - y0)/m
+
+################################ Common tangents ##################################
+
+def _dn(f, T, n):
+    # a fourth order central difference, with a step relative to n
+    h = 1e-4*np.abs(n)
+    return (8*(f(T, n+h) - f(T, n-h)) - (f(T, n+2*h) - f(T, n-2*h)))/(12*h)
+
+def _dT(f, T, n):
+    h = 1e-5*np.maximum(1, np.abs(T))
+    return (f(T+h, n) - f(T-h, n))/(2*h)
+
+class Phase(object):
+    """A free energy per volume f(T, n), along with its first and
+    second derivatives with respect to n.  Any derivative you don't
+    provide is found by finite differences."""
+    def __init__(self, f, dfdn=None, d2fdn2=None):
+        self.f = f
+        if dfdn is not None:
+            self.dfdn = dfdn
+        if d2fdn2 is not None:
+            self.d2fdn2 = d2fdn2
+
+    def dfdn(self, T, n):
+        return _dn(self.f, T, n)
+
+    def d2fdn2(self, T, n):
+        return _dn(self.dfdn, T, n)
+
+class Tabulated(Phase):
+    """A phase whose free energy per volume f[i,j] we know only at
+    temperatures T[i] and densities n[j].  We interpolate it with a
+    spline, whose derivatives we know analytically."""
+    def __init__(self, T, n, f):
+        from scipy.interpolate import RectBivariateSpline
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        f = np.asarray(f, dtype=float).reshape(len(T), -1)
+        if len(T) == 1:
+            # at a single temperature our free energy doesn't depend on T
+            T = np.array([T[0] - 1, T[0] + 1])
+            f = np.vstack((f, f))
+        self.spline = RectBivariateSpline(T, n, f, kx=min(3, len(T)-1), ky=3)
+
+    def f(self, T, n):
+        T, n = np.broadcast_arrays(T, n)
+        return self.spline(T, n, grid=False)
+
+    def dfdn(self, T, n):
+        T, n = np.broadcast_arrays(T, n)
+        return self.spline(T, n, dy=1, grid=False)
+
+    def d2fdn2(self, T, n):
+        T, n = np.broadcast_arrays(T, n)
+        return self.spline(T, n, dy=2, grid=False)
+
+def _phase(phase):
+    return phase if isinstance(phase, Phase) else Phase(phase)
+
+def _residual(phase1, phase2, T, n1, n2):
+    mu1 = phase1.dfdn(T, n1)
+    mu2 = phase2.dfdn(T, n2)
+    p1 = n1*mu1 - phase1.f(T, n1)
+    p2 = n2*mu2 - phase2.f(T, n2)
+    return mu1 - mu2, p1 - p2
+
+def _jacobian_u(phase1, phase2, T, n1, n2):
+    # derivatives of the residual with respect to u = ln n, using
+    # dmu/dn = f'' and dp/dn = n f''
+    a = n1*phase1.d2fdn2(T, n1)
+    b = -n2*phase2.d2fdn2(T, n2)
+    return a, b, n1*a, n2*b
+
+def common_tangent(phase1, T, n1, n2, phase2=None, tol=1e-11, max_iter=50):
+    """Solve for the coexisting densities n1 and n2 at each temperature
+    in T, starting from guesses n1 and n2.
+
+    phase1 (and phase2, if the two phases have different free
+    energies) is either a Phase or a function f(T, n).  Returns arrays
+    n1 and n2, which are nan wherever Newton's method did not converge.
+    """
+    phase1 = _phase(phase1)
+    phase2 = phase1 if phase2 is None else _phase(phase2)
+    T, n1, n2 = [np.array(a, dtype=float) for a in np.broadcast_arrays(T, n1, n2)]
+    shape = T.shape
+    T, n1, n2 = T.ravel(), n1.ravel(), n2.ravel()
+    u1, u2 = np.log(n1), np.log(n2)
+    todo = np.arange(len(T))
+    for iteration in range(max_iter):
+        if len(todo) == 0:
+            break
+        t, v1, v2 = T[todo], u1[todo], u2[todo]
+        F1, F2 = _residual(phase1, phase2, t, np.exp(v1), np.exp(v2))
+        a, b, c, d = _jacobian_u(phase1, phase2, t, np.exp(v1), np.exp(v2))
+        det = a*d - b*c
+        du1 = (-F1*d + F2*b)/det
+        du2 = (-F2*a + F1*c)/det
+        # don't let a single step change a density by more than a factor of e
+        scale = 1/np.maximum(1, np.maximum(np.abs(du1), np.abs(du2)))
+        du1 *= scale
+        du2 *= scale
+        # Back off from steps that don't bring us closer to a solution
+        # (or take us where f is undefined).  We measure closeness by
+        # mu/T and p/(nT), which are of order one in both phases.
+        w1 = 1/t**2
+        w2 = 1/(t*np.exp(np.maximum(v1, v2)))**2
+        merit = w1*F1**2 + w2*F2**2
+        for backoff in range(40):
+            G1, G2 = _residual(phase1, phase2, t, np.exp(v1+du1), np.exp(v2+du2))
+            bad = ~(w1*G1**2 + w2*G2**2 < merit)
+            if not bad.any():
+                break
+            du1[bad] *= 0.5
+            du2[bad] *= 0.5
+        u1[todo] = v1 + du1
+        u2[todo] = v2 + du2
+        step = np.maximum(np.abs(du1), np.abs(du2))
+        todo = todo[~((step < tol) | ~np.isfinite(step))]
+    n1, n2 = np.exp(u1), np.exp(u2)
+    failed = np.zeros(len(T), dtype=bool)
+    failed[todo] = True
+    failed |= ~np.isfinite(n1) | ~np.isfinite(n2)
+    if phase2 is phase1:
+        # the trivial "tangent" of a single phase with itself
+        failed |= np.abs(u2 - u1) < 1e3*tol
+    n1[failed] = np.nan
+    n2[failed] = np.nan
+    return n1.reshape(shape), n2.reshape(shape)
+
+def _start(phase1, phase2, T, n1, n2, tol):
+    # Our first guesses may be poor, and plain Newton can wander off to
+    # the trivial solution n1 == n2, so we start with the more careful
+    # (trust region) hybrid method of fsolve, and polish with Newton.
+    from scipy.optimize import fsolve
+    def residual(n):
+        mu1 = phase1.dfdn(T, n[0])
+        return [mu1 - phase2.dfdn(T, n[1]),
+                mu1 - (phase2.f(T, n[1]) - phase1.f(T, n[0]))/(n[1] - n[0])]
+    n1, n2 = fsolve(residual, [n1, n2])
+    return common_tangent(phase1, T, n1, n2, phase2, tol=tol)
+
+def _tangent(phase1, phase2, y):
+    # the direction in (T, ln n1, ln n2) along which the residual stays zero
+    T, n1, n2 = y[0], np.exp(y[1]), np.exp(y[2])
+    dF1dT = _dT(phase1.dfdn, T, n1) - _dT(phase2.dfdn, T, n2)
+    dF2dT = (n1*_dT(phase1.dfdn, T, n1) - _dT(phase1.f, T, n1)
+             - n2*_dT(phase2.dfdn, T, n2) + _dT(phase2.f, T, n2))
+    a, b, c, d = _jacobian_u(phase1, phase2, T, n1, n2)
+    J = np.array([[dF1dT, a, b], [dF2dT, c, d]])
+    t = np.cross(J[0], J[1])
+    return J, t/np.sqrt(np.dot(t, t))
+
+def trace(phase1, T0, T_end, n1, n2, phase2=None, step=1e-2, max_step=0.1,
+          min_step=1e-8, min_gap=1e-4, tol=1e-11, corrector_tol=1e-8,
+          max_points=100000):
+    """Follow the common tangent from T0 towards T_end.
+
+    n1 and n2 are guesses for the coexisting densities at T0.  We stop
+    at T_end, or where the two densities become equal to within a
+    factor of exp(min_gap) (i.e. at the critical point).  Returns
+    arrays T, n1, n2 of the points we visited.
+    """
+    phase1 = _phase(phase1)
+    phase2 = phase1 if phase2 is None else _phase(phase2)
+    n1, n2 = _start(phase1, phase2, T0, n1, n2, tol)
+    if not np.isfinite(n1):
+        raise ValueError('no common tangent at T = %g near the guesses' % T0)
+    direction = np.sign(T_end - T0)
+    y = np.array([T0, np.log(n1), np.log(n2)])
+    if direction == 0:
+        return np.array([T0]), np.array([n1]), np.array([n2])
+    # only a single phase has a critical point, where n1 and n2 meet
+    critical = phase2 is phase1
+    J, t = _tangent(phase1, phase2, y)
+    if t[0]*direction < 0:
+        t = -t
+    points = [y]
+    h = step
+    while len(points) < max_points and h > min_step:
+        # predict along the tangent, then correct back onto the curve
+        # while staying on the plane perpendicular to the tangent.
+        yp = y + h*t
+        ynew = yp.copy()
+        converged = False
+        for iteration in range(8):
+            F1, F2 = _residual(phase1, phase2, ynew[0], np.exp(ynew[1]), np.exp(ynew[2]))
+            if not (np.isfinite(F1) and np.isfinite(F2)):
+                break
+            Jnew, tnew = _tangent(phase1, phase2, ynew)
+            dy = np.linalg.solve(np.vstack((Jnew, t)),
+                                 -np.array([F1, F2, np.dot(t, ynew - yp)]))
+            ynew += dy
+            # the points along the way needn't be as precise as our
+            # final answers, and the corrector can't be, since near the
+            # critical point it amplifies the roundoff in f.
+            if np.max(np.abs(dy)) < corrector_tol*(1 + np.max(np.abs(ynew))):
+                converged = True
+                break
+        gap = abs(ynew[2] - ynew[1]) if converged else 0
+        if (not converged or not np.isfinite(ynew).all()
+            or (critical and gap < 0.5*abs(y[2] - y[1]))):
+            # we either got lost, or fell towards the trivial solution
+            # n1 == n2, so try a smaller step
+            h *= 0.5
+            continue
+        J, tnew = _tangent(phase1, phase2, ynew)
+        if np.dot(tnew, t) < 0:
+            tnew = -tnew
+        if (ynew[0] - T_end)*direction >= 0:
+            # we have passed T_end, so finish exactly there
+            guess = y + (ynew - y)*(T_end - y[0])/(ynew[0] - y[0])
+            m1, m2 = common_tangent(phase1, T_end, np.exp(guess[1]), np.exp(guess[2]), phase2, tol=tol)
+            if np.isfinite(m1):
+                points.append(np.array([T_end, np.log(m1), np.log(m2)]))
+            break
+        if tnew[0]*direction <= 0:
+            break # T has turned around, which only happens at a critical point
+        y, t = ynew, tnew
+        points.append(y)
+        if critical and gap < min_gap:
+            break
+        if iteration <= 3:
+            h = min(1.5*h, max_step)
+    points = np.array(points)
+    return points[:, 0], np.exp(points[:, 1]), np.exp(points[:, 2])
+
+def coexistence_curve(phase1, Ts, n1, n2, phase2=None, tol=1e-11, **kwargs):
+    """The coexisting densities at every temperature in Ts, given
+    guesses n1 and n2 at Ts[0].
+
+    We trace the curve from Ts[0] to Ts[-1] (see trace), and then solve
+    at every temperature in Ts at once, starting from the traced curve.
+    Temperatures beyond where the curve ends give nan.  Returns arrays
+    n1 and n2.
+    """
+    phase1 = _phase(phase1)
+    Ts = np.atleast_1d(np.asarray(Ts, dtype=float))
+    T, m1, m2 = trace(phase1, Ts[0], Ts[-1], n1, n2, phase2, tol=tol, **kwargs)
+    order = np.argsort(T)
+    inside = (Ts >= T.min()) & (Ts <= T.max())
+    guess1 = np.exp(np.interp(Ts, T[order], np.log(m1[order])))
+    guess2 = np.exp(np.interp(Ts, T[order], np.log(m2[order])))
+    n1, n2 = np.nan*np.ones_like(Ts), np.nan*np.ones_like(Ts)
+    n1[inside], n2[inside] = common_tangent(phase1, Ts[inside], guess1[inside], guess2[inside],
+                                            phase2, tol=tol)
+    return n1, n2
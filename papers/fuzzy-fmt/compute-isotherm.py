@@ -12,9 +12,12 @@
 import numpy as np
 import matplotlib.mlab as mlab
 import matplotlib.pyplot as plt
-import os
+import os, sys
 import argparse
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/..')
+import sweep
+
 parser = argparse.ArgumentParser(description='Creates data for plots of gw vs n and FE vs n.')
 
 parser.add_argument('--kT', metavar='temperature', type=float,
@@ -48,6 +51,10 @@ parser.add_argument('--mcprefactor', metavar='prefac', type=int,
                     
 parser.add_argument('--tensor', action='store_true',
                     help='use tensor weight')
+parser.add_argument('--backend', choices=sorted(sweep.backends),
+                    help='how to run new-melting', default=sweep.default_backend())
+parser.add_argument('--jobs', type=int,
+                    help='max number of simultaneous jobs - Default number of cores')
 
 args=parser.parse_args()
 
@@ -98,24 +105,25 @@ if args.mcprefactor:
 else :
     mcprefactor=50000
     
-if args.tensor:    
-    for n in np.arange(args.nmin, args.nmax, dn):
-        cmd = 'rq run -J isotherm-kT%g-n%g-tensor' % (kT, n)
-        cmd += ' figs/new-melting.mkdat --kT %g --n %g' % (kT, n)
-        cmd += ' --gwstart %g --gwend %g --gwstep %g' % (mingw, maxgw, dgw)
-        cmd += ' --fv %g --dx %g' % (fv, dx)
-        cmd += ' --mc-error %g --mc-constant %g --mc-prefactor %g' % (mcerror, mcconstant, mcprefactor)
+def best_file(kT, n):
+    # new-melting writes its best result here when it scans over gw
+    if args.tensor:
+        return 'crystallization/kT%05.3f_n%05.3f_best_tensor.dat' % (kT, n)
+    return 'crystallization/kT%05.3f_n%05.3f_best.dat' % (kT, n)
+
+jobs = sweep.Sweep(ledger='crystallization/isotherm-sweep.json', backend=args.backend, max_jobs=args.jobs)
+for n in np.arange(args.nmin, args.nmax, dn):
+    name = 'isotherm-kT%g-n%g' % (kT, n)
+    if args.tensor:
+        name += '-tensor'
+    cmd = 'figs/new-melting.mkdat --kT %g --n %g' % (kT, n)
+    cmd += ' --gwstart %g --gwend %g --gwstep %g' % (mingw, maxgw, dgw)
+    cmd += ' --fv %g --dx %g' % (fv, dx)
+    cmd += ' --mc-error %g --mc-constant %g --mc-prefactor %g' % (mcerror, mcconstant, mcprefactor)
+    if args.tensor:
         cmd += ' --filename isotherm-kT-%g_tensor.dat' % kT
         cmd += ' --tensor'
-        print(cmd)
-        os.system(cmd)
-else :
-    for n in np.arange(args.nmin, args.nmax, dn):
-        cmd = 'rq run -J isotherm-kT%g-n%g' % (kT, n)
-        cmd += ' figs/new-melting.mkdat --kT %g --n %g' % (kT, n)
-        cmd += ' --gwstart %g --gwend %g --gwstep %g' % (mingw, maxgw, dgw)
-        cmd += ' --fv %g --dx %g' % (fv, dx)
-        cmd += ' --mc-error %g --mc-constant %g --mc-prefactor %g' % (mcerror, mcconstant, mcprefactor)
+    else:
         cmd += ' --filename isotherm-kT-%g.dat' % kT
-        print(cmd)
-        os.system(cmd)
+    jobs.add(name, cmd, outputs=[best_file(kT, n)])
+jobs.run()
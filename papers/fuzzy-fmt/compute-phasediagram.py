@@ -13,38 +13,97 @@
 import numpy as np
 import matplotlib.mlab as mlab
 import matplotlib.pyplot as plt
-import os
+import os, sys
 import argparse
 import array as arr
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/..')
+import sweep
+import new_melting_worker
+
 parser = argparse.ArgumentParser(description='Creates data for phase diagrams.')
 
 parser.add_argument('--tensor', action='store_true',
                     help='use tensor weight')
+parser.add_argument('--backend', choices=sorted(sweep.backends),
+                    help='how to run new-melting', default=sweep.default_backend())
+parser.add_argument('--jobs', type=int,
+                    help='max number of simultaneous jobs - Default number of cores')
+parser.add_argument('--worker', action='store_true',
+                    help='evaluate every point with a pool of persistent new-melting workers')
 args=parser.parse_args()
 
+if args.tensor:
+    data_dir = 'newdata_tensor/phase-diagram4'   #once new results are compared to the old, remove the "2" at the end of phase-diagram
+    best_suffix = '_best_tensor.dat'
+else:
+    #data_dir = 'data/phase-diagram'
+    data_dir = 'newdata/phase-diagram4' #once new results are compared to the old, remove the "2" at the end of phase-diagram
+    best_suffix = '_best.dat'
+
+jobs = sweep.Sweep(ledger=data_dir+'/sweep.json', backend=args.backend, max_jobs=args.jobs)
+
 def run_new_melting(kT, n, gwstart, gwend, gwstep, fv=0, dx=0.5, seed=1,
-                    mcerror=1e-3, mcconstant=5, mcprefactor=50000,
-                    avoid_rq=False):
+                    mcerror=1e-3, mcconstant=5, mcprefactor=50000):
     name = 'nm-kT_%g-n_%g' % (kT, n)
     if args.tensor:
         name = 'tensor-'+name
-    cmd = 'rq run -J %s' % name
-    if avoid_rq:
-        cmd = ''
-    cmd += ' figs/new-melting.mkdat --kT %g --n %g' % (kT, n)
+    cmd = 'figs/new-melting.mkdat --kT %g --n %g' % (kT, n)
     cmd += ' --gwstart %g --gwend %g --gwstep %g' % (gwstart, gwend, gwstep)
     cmd += ' --fv %g --dx %g --seed %g' % (fv, dx, seed)
     cmd += ' --mc-error %g --mc-constant %g --mc-prefactor %g' % (mcerror, mcconstant, mcprefactor)
+    cmd += ' --d %s' % data_dir
     if args.tensor:
-        cmd += ' --d newdata_tensor/phase-diagram4'   #once new results are compared to the old, remove the "2" at the end of phase-diagram
         cmd += ' --tensor'
-    else:
-        #cmd += ' --d data/phase-diagram'
-        cmd += ' --d newdata/phase-diagram4' #once new results are compared to the old, remove the "2" at the end of phase-diagram
     cmd += ' --filename %s.dat' % name
-    print(cmd)
-    assert(os.system(cmd) == 0)
+    best_file = data_dir + '/kT%05.3f_n%05.3f' % (kT, n) + best_suffix
+    if args.worker:
+        if os.path.exists(best_file):
+            return
+        settings = (fv, dx, seed, mcerror, mcconstant, mcprefactor)
+        gws = np.arange(gwstart, gwend + 0.1*gwstep, gwstep)
+        points = worker_points.setdefault(settings, [])
+        points.append((best_file, [(kT, n, gw, fv) for gw in gws]))
+        return
+    jobs.add(name, cmd, outputs=[best_file])
+
+# With --worker we collect the points here, grouped by the settings
+# new-melting is started with, and evaluate them all at the end.
+worker_points = {}
+
+def write_best(best_file, results, fv, dx, seed, mcerror, mcconstant, mcprefactor, version):
+    # the same columns new-melting writes when it scans over gw
+    b = new_melting_worker.best(results)
+    with open(best_file, 'w') as f:
+        f.write('# git version: %s\n' % version)
+        f.write('#kT\tn\tfv\tgwidth\thFE/atom\tbest_cFE/atom\tbest_FEdiff/atom\tbest_lat_const\tNsph\tdx\tmcerror\tmcseed\thFE/volume\tbest_cFE/volume\tmcconstant\tmcprefactor\ttensor\n')
+        f.write('%g\t%g\t%g\t%g\t%g\t%g\t\t%g\t\t%g\t\t%g\t%g\t%g\t%g\t%g\t%g\t%d\t%d\t%d\n'
+                % (b['kT'], b['n'], b['fv'], b['gw'], b['hFE/atom'], b['cFE/atom'], b['FEdiff/atom'],
+                   b['lat_const'], 1-fv, dx, mcerror, seed, b['hFE/volume'], b['cFE/volume'],
+                   mcconstant, mcprefactor, args.tensor))
+
+def run_workers():
+    os.system('mkdir -p ' + data_dir)
+    for settings in sorted(worker_points):
+        fv, dx, seed, mcerror, mcconstant, mcprefactor = settings
+        scans = worker_points[settings]
+        print('evaluating %d points at %d densities and temperatures'
+              % (sum(len(points) for best_file, points in scans), len(scans)))
+        with new_melting_worker.Pool(processes=args.jobs, dx=dx, seed=seed, mcerror=mcerror,
+                                     mcconstant=mcconstant, mcprefactor=mcprefactor,
+                                     tensor=args.tensor, data_dir=data_dir,
+                                     log=data_dir+'/worker.log') as pool:
+            # Evaluate several scans at a time so every worker keeps
+            # busy, but write out each batch of best files as we go.
+            while scans:
+                batch = []
+                while scans and sum(len(points) for best_file, points in batch) < 4*len(pool.workers):
+                    batch.append(scans.pop(0))
+                results = pool.many([p for best_file, points in batch for p in points])
+                for best_file, points in batch:
+                    write_best(best_file, results[:len(points)], fv, dx, seed,
+                               mcerror, mcconstant, mcprefactor, pool.version)
+                    results = results[len(points):]
 
 #kTs = np.arange(2, 0.3, -0.1)   # kT less than 0.4 don't have solutions
 #kTs = np.arange(20, 2, -2) 
@@ -57,7 +116,7 @@ kTs = np.arange(39, 0.5, -2)
 #kTs=np.append(kTs, 0.01)
 for kT in kTs:
     #for n in np.arange(0.01, 0.59, 0.02):   #homogeneous fluid
-        #run_new_melting(kT, n, 0.001, 0.001, 0.001, avoid_rq=True)    #temp, density, gw_start, gw_end, gw_step
+        #run_new_melting(kT, n, 0.001, 0.001, 0.001)    #temp, density, gw_start, gw_end, gw_step
     # for n in np.arange(0.59, 1.2, 0.02):    #crystal
         # if args.tensor:
             # run_new_melting(kT, n, 0.01, 0.2, 0.01)    #temp, density, gw_start, gw_end, gw_step
@@ -73,3 +132,7 @@ for kT in kTs:
     #for n in np.arange(1.82, 2.8, 0.2):
         #run_new_melting(kT, n, 0.01, 0.2, 0.01)
 
+if args.worker:
+    run_workers()
+else:
+    jobs.run()
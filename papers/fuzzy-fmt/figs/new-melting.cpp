@@ -18,6 +18,7 @@
 #include <stdlib.h>
 #include <time.h>
 #include <sys/stat.h>
+#include <unistd.h>
 #include <popt.h>
 #include "new/SFMTFluidVeffFast.h"
 #include "new/HomogeneousSFMTFluidFast.h"
@@ -37,6 +38,8 @@ int my_experiment =0;   //set to 1 to run my experiment
 bool use_tensor_weight=false;
 
 char *free_energy_output_file = 0;
+int create_alldat_file = 1;  //set to 0 for no alldat file, set to 1 to create alldat file
+// that saves data for every combination of gw and fv values ran
 
 // radius we need to integrate around a gaussian, in units of gw.
 const double inclusion_radius = 6.0;
@@ -864,8 +867,6 @@ data find_energy_new(double temp, double reduced_density, double fv, double gwid
   printf("data_out is: homFEpervol=%g, cryFEpervol=%g\n", data_out.hfree_energy_per_vol, data_out.cfree_energy_per_vol);
   printf("data_out is: diffperatom=%g\n", data_out.diff_free_energy_per_atom);
 
-  int create_alldat_file = 1;  //set to 0 for no alldat file, set to 1 to create alldat file
-  // that saves data for every combination of gw and fv values ran
   double run_time = time() - start_time; // run time in seconds
   if (create_alldat_file > 0)  {
     // Create all output data filename
@@ -934,6 +935,55 @@ data find_energy_new(double temp, double reduced_density, double fv, double gwid
 }
 //%%%%%%%%%%%%%%%%%%%%%%%%%END NEW ENERGY FUNCTION%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
+//%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%WORKER MODE%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+// In worker mode we read one "kT n gw fv" request per line from stdin
+// and answer each with a single line of free energies on stdout, so a
+// script can evaluate thousands of points without starting a new
+// process (and writing an alldat file) for every one of them.  All of
+// our usual chatter goes to stderr, so that stdout holds nothing but
+// the results.  See new_melting_worker.py for the python side.
+
+FILE *redirect_stdout_to_stderr() {
+  fflush(stdout);
+  FILE *results = fdopen(dup(fileno(stdout)), "w");
+  dup2(fileno(stderr), fileno(stdout));
+  return results;
+}
+
+int run_worker(FILE *results, char *data_dir, double dx, bool verbose) {
+  fprintf(results, "# git version: %s\n", version_identifier());
+  fprintf(results, "#kT\tn\tfv\tgwidth\thFE/atom\tcFE/atom\tFEdiff/atom\thFE/volume\tcFE/volume\tlat_const\ttime(h)\n");
+  fflush(results);
+  char line[1024];
+  while (fgets(line, sizeof(line), stdin)) {
+    char first;
+    if (sscanf(line, " %c", &first) < 1 || first == '#') continue; // blank line or comment
+    double temp, reduced_density, gwidth, fv;
+    if (sscanf(line, "%lg %lg %lg %lg", &temp, &reduced_density, &gwidth, &fv) != 4) {
+      fprintf(results, "error: expected kT n gw fv but got %s", line);
+      fflush(results);
+      continue;
+    }
+    // Reseed for every point, so each answer is exactly what a fresh
+    // new-melting run would give, regardless of what came before.
+    random::seed(seed);
+    double start_time = time();
+    data e_data = find_energy_new(temp, reduced_density, fv, gwidth, data_dir, dx, verbose);
+    double run_time = time() - start_time;
+    fflush(stdout);
+    fprintf(results, "%.17g\t%.17g\t%.17g\t%.17g\t%.17g\t%.17g\t%.17g\t%.17g\t%.17g\t%.17g\t%g\n",
+            temp, reduced_density, fv, gwidth,
+            e_data.cfree_energy_per_atom - e_data.diff_free_energy_per_atom,
+            e_data.cfree_energy_per_atom, e_data.diff_free_energy_per_atom,
+            e_data.hfree_energy_per_vol, e_data.cfree_energy_per_vol,
+            find_lattice_constant(reduced_density, fv), run_time/60/60);
+    fflush(results);
+  }
+  fclose(results);
+  return 0;
+}
+//%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%END WORKER MODE%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
 
 //+++++++++++++Downhill Simplex Functions+++++++++++++++
 
@@ -1219,6 +1269,7 @@ int main(int argc, const char **argv) {
   double dx=0.01;        //default grid point spacing dx=dy=dz=0.01
   int verbose = false;
   int downhill = false;
+  int worker = false;
 
   //Downhill Simplex starting guess
   //1st col = fv,  2nd col = gw,  3rd col= Diff in Free Energy  (Crystal FE-Homogeneous FE)
@@ -1273,6 +1324,9 @@ int main(int argc, const char **argv) {
     {"gwend", '\0', POPT_ARG_DOUBLE | POPT_ARGFLAG_SHOW_DEFAULT, &gw_end, 0, "end gwidth loop at", "DOUBLE"},
     {"gwstep", '\0', POPT_ARG_DOUBLE | POPT_ARGFLAG_SHOW_DEFAULT, &gw_step, 0, "gwidth loop step", "DOUBLE"},
 
+    /*** WORKER OPTION ***/
+    {"worker", '\0', POPT_ARG_NONE | POPT_ARGFLAG_SHOW_DEFAULT, &worker, 0, "Read \"kT n gw fv\" lines from stdin and print their free energies", "BOOLEAN"},
+
     /*** Downhill Simplex OPTIONS ***/
     {"dh", '\0', POPT_ARG_NONE | POPT_ARGFLAG_SHOW_DEFAULT, &downhill, 0, "Do a Downhill Simplex", "BOOLEAN"},
 
@@ -1327,6 +1381,12 @@ int main(int argc, const char **argv) {
 
   random::seed(seed);
 
+  FILE *worker_results = 0;
+  if (worker) {
+    worker_results = redirect_stdout_to_stderr();
+    create_alldat_file = 0; // our results go down the pipe instead
+  }
+
   printf("------------------------------------------------------------------\n");
   printf("Running %s with parameters:\n", argv[0]);
   for (int i = 1; i < argc; i++) {
@@ -1345,6 +1405,10 @@ int main(int argc, const char **argv) {
   printf("\nUsing data directory: [deft/papers/fuzzy-fmt]/%s\n", data_dir);
   mkdir(data_dir, 0777);
 
+  if (worker_results) {
+    return run_worker(worker_results, data_dir, dx, bool(verbose));
+  }
+
   // Downhill Simplex
   if (downhill) {
     printf("\nInitial Downhill Simplex (1st col=fv, 2nd col=gw, 3rd col=diff free energy): \n");
@@ -9,9 +9,12 @@ from __future__ import division, print_function
 import numpy as np
 import os
 import argparse
+import multiprocessing
 import matplotlib.pyplot as plt
 from scipy.interpolate import UnivariateSpline
 
+import new_melting_worker
+
 parser = argparse.ArgumentParser(description='Finds the minimum difference in FE.')
 
 parser.add_argument('--kT', metavar='temperature', type=float,
@@ -98,38 +101,32 @@ def func_exact(x):
 #def func_to_minimize(x):
     #return func_exact(x) + np.random.normal()*sigma
 
+# A few long-lived new-melting processes, so we don't start a fresh
+# one (and write an alldat file) for every function evaluation.
+if args.tensor:
+    os.system('mkdir -p newdata_tensor/phase-diagram')
+    new_melting = new_melting_worker.Pool(
+        processes=min(int(args.numgw), multiprocessing.cpu_count()),
+        dx=dx, mcerror=mcerror, mcconstant=mcconstant, mcprefactor=mcprefactor,
+        tensor=True, data_dir='newdata_tensor/phase-diagram',
+        filename='isotherm-kT-%g-tensor.dat' % kT)
+else:
+    os.system('mkdir -p newdata/phase-diagram')
+    new_melting = new_melting_worker.Pool(
+        processes=min(int(args.numgw), multiprocessing.cpu_count()),
+        dx=dx, mcerror=mcerror, mcconstant=mcconstant, mcprefactor=mcprefactor,
+        data_dir='newdata/phase-diagram',
+        filename='isotherm-kT-%g.dat' % kT)
+
 def func_to_minimize(kT, n, x, fv, dx, mcerror, mcconstant, mcprefactor):
     # return func_exact(x) + np.random.normal()*0.01
     print(kT,n,x,fv,dx,mcerror,mcconstant,mcprefactor)
-    #sprintf(alldat_filedescriptor, "kT%5.3f_n%05.3f_fv%04.2f_gw%04.8f",
-    name= 'kT%5.3f_n%05.3f_fv%04.2f_gw%04.8f' % (kT, n, fv, x)
-    cmd = ' figs/new-melting.mkdat --kT %g --n %g' % (kT, n)
-    cmd += ' --gw %.8g' % (x)
-    cmd += ' --fv %g --dx %g' % (fv, dx)
-    cmd += ' --mc-error %g --mc-constant %g --mc-prefactor %g' % (mcerror, mcconstant, mcprefactor)
-    if args.tensor:
-        os.system('mkdir -p newdata_tensor')
-        cmd += ' --d newdata_tensor/phase-diagram'
-        cmd += ' --filename isotherm-kT-%g-tensor.dat' % kT
-    else:
-        os.system('mkdir -p newdata')
-        cmd += ' --d newdata/phase-diagram'
-        cmd += ' --filename isotherm-kT-%g.dat' % kT
-    if args.tensor:
-        cmd += ' --tensor'
-    print(cmd)
-    os.system(cmd)
-    if args.tensor:
-        f='newdata_tensor/phase-diagram/%s-alldat_tensor.dat' % (name)
-    else :
-        f='newdata/phase-diagram/%s-alldat.dat' % (name)
-    #if args.tensor:
-        #f='%s/%s-alldat_tensor.dat' % (args.directory, name)
-    #else :
-        #f='%s/%s-alldat.dat' % (args.directory, name)
-    data = np.loadtxt(f)   #FIX if gets a NAN, no data file created?
-    diffFE=data[6]
-    return diffFE
+    return new_melting.free_energy(kT, n, x, fv)['FEdiff/atom']
+
+def many_to_minimize(kT, n, xs, fv):
+    # evaluate all the xs at once, spread over our workers
+    print(kT,n,xs,fv)
+    return np.array([e['FEdiff/atom'] for e in new_melting.many([(kT, n, x, fv) for x in xs])])
     
 
 def rough_error_estimate(xs,ys):
@@ -156,7 +153,7 @@ def minimize_starting_between(xlo, xhi, error_desired):
     xs = np.linspace(xlo, xhi, args.numgw)  #steps by (xhi-xlo)/(total_computations-1)
     print('xs=',xs)
     #es = np.array([func_to_minimize(x) for x in xs])
-    es = np.array([func_to_minimize(kT, n, x, fv, dx, mcerror, mcconstant, mcprefactor) for x in xs])
+    es = many_to_minimize(kT, n, xs, fv)
     x0, e0, deriv2, error = parabola_fit(xs, es)
     plt.plot(xs,es,'.',label='data')
     all_xs = np.linspace(xlo, xhi, 1000)
@@ -275,5 +272,6 @@ def minimize_starting_between(xlo, xhi, error_desired):
 
 
 minimize_starting_between(mingw, maxgw, args.error_desired)
+new_melting.close()
 
 
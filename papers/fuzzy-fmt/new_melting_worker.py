@@ -0,0 +1,160 @@
+#!/usr/bin/python2
+
+# A python client for new-melting's worker mode.  Rather than running
+# figs/new-melting.mkdat once per (kT, n, gw, fv) point and fishing the
+# answer out of an alldat file, we start a few long-lived new-melting
+# processes and feed them points down a pipe:
+#
+#   with Pool(dx=0.5, tensor=True) as nm:
+#       e = nm.free_energy(kT=1, n=1.2, gw=0.05)
+#       es = nm.many([(1, 1.2, gw, 0) for gw in np.arange(0.01, 0.2, 0.01)])
+#
+# Each result is a dict with the columns new-melting prints (see
+# columns below).  new-melting reseeds its Monte Carlo for every point,
+# so the answers are identical to those of separate runs.
+
+from __future__ import division, print_function
+
+import os, subprocess, threading, multiprocessing
+import numpy as np
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # python2
+
+columns = ['kT', 'n', 'fv', 'gw', 'hFE/atom', 'cFE/atom', 'FEdiff/atom',
+           'hFE/volume', 'cFE/volume', 'lat_const', 'time(h)']
+
+default_executable = os.path.dirname(os.path.realpath(__file__))+'/figs/new-melting.mkdat'
+
+# How many points we send a worker before reading its answers.  This
+# keeps the pipes from filling up (and deadlocking) on big batches.
+max_in_flight = 64
+
+class Worker(object):
+    """One new-melting process running in worker mode."""
+    def __init__(self, dx=0.5, mcerror=1e-3, mcconstant=5, mcprefactor=50000,
+                 seed=1, tensor=False, data_dir='crystallization', filename=None,
+                 executable=default_executable, log=None):
+        cmd = [executable, '--worker', '--dx', '%g' % dx,
+               '--mc-error', '%g' % mcerror, '--mc-constant', '%g' % mcconstant,
+               '--mc-prefactor', '%g' % mcprefactor, '--seed', '%g' % seed,
+               '--d', data_dir]
+        if tensor:
+            cmd.append('--tensor')
+        if filename is not None:
+            cmd += ['--filename', filename]
+        self.log = open(log, 'w') if log is not None else open(os.devnull, 'w')
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=self.log, universal_newlines=True, bufsize=1)
+        self.version = None
+        self._receive() # read the header, so we know new-melting is up
+
+    def _send(self, kT, n, gw, fv):
+        self.proc.stdin.write('%.17g %.17g %.17g %.17g\n' % (kT, n, gw, fv))
+
+    def _receive(self):
+        while True:
+            line = self.proc.stdout.readline()
+            if line == '':
+                raise RuntimeError('new-melting worker exited with status %s' % self.proc.wait())
+            if line.startswith('# git version:'):
+                self.version = line.split(':', 1)[1].strip()
+            elif line.startswith('#kT'):
+                return None
+            elif line.startswith('error'):
+                raise ValueError('new-melting worker says ' + line.strip())
+            elif not line.startswith('#'):
+                return dict(zip(columns, [float(x) for x in line.split()]))
+
+    def many(self, points):
+        """Evaluate a list of (kT, n, gw, fv) points, in order."""
+        points = list(points)
+        results = []
+        sent = 0
+        while len(results) < len(points):
+            while sent < len(points) and sent - len(results) < max_in_flight:
+                self._send(*points[sent])
+                sent += 1
+            self.proc.stdin.flush()
+            results.append(self._receive())
+        return results
+
+    def free_energy(self, kT, n, gw, fv=0):
+        return self.many([(kT, n, gw, fv)])[0]
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.stdin.close()
+            self.proc.wait()
+        self.log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class Pool(object):
+    """Several workers (one per core by default), sharing the points."""
+    def __init__(self, processes=None, **kwargs):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        log = kwargs.pop('log', None)
+        self.workers = []
+        for i in range(processes):
+            if log is not None:
+                kwargs['log'] = '%s.%d' % (log, i)
+            self.workers.append(Worker(**kwargs))
+
+    def many(self, points):
+        """Evaluate a list of (kT, n, gw, fv) points, in order."""
+        points = list(points)
+        results = [None]*len(points)
+        todo = queue.Queue()
+        for i in range(len(points)):
+            todo.put(i)
+        errors = []
+        def work(worker):
+            while not errors:
+                try:
+                    i = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[i] = worker.free_energy(*points[i])
+                except Exception as e:
+                    errors.append(e)
+        threads = [threading.Thread(target=work, args=(w,)) for w in self.workers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def free_energy(self, kT, n, gw, fv=0):
+        return self.workers[0].free_energy(kT, n, gw, fv)
+
+    @property
+    def version(self):
+        return self.workers[0].version
+
+    def close(self):
+        for w in self.workers:
+            w.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def best(results):
+    """The result with the lowest FEdiff/atom, as new-melting picks
+    when it scans over gw (NaNs never win)."""
+    diffs = np.array([r['FEdiff/atom'] for r in results])
+    diffs[np.isnan(diffs)] = np.inf
+    return results[int(np.argmin(diffs))]
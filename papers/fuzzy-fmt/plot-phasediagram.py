@@ -16,6 +16,9 @@ import os, glob
 import argparse
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/..')
+import coexistence
+
 parser = argparse.ArgumentParser("Plots phase diagrams p vs T and T vs n. Plots p-vs-T, p-vs-n, and T-vs-n.")
 parser.add_argument('--tensor', action='store_true',
                     help='use tensor weight')
@@ -110,36 +113,14 @@ for kT in (1, 3, 5, 7, 9, 11, 13, 15, 17, 19, 21, 23, 25): #use for kT from 1 to
 
 
    #Find pressure at point of intersection
-   def find_first_intersection(p1, g1, p2, g2): 
-      for i in range(1,len(g1)-1):
-         m1=(g1[i+1]-g1[i])/(p1[i+1]-p1[i])
-         for j in range(1,len(g2)-1):
-               m2=(g2[j+1]-g2[j])/(p2[j+1]-p2[j])
-               #print(m2) #debug ASK!
-               if m1!=m2 :
-                  P_inter=(g2[j] - m2*p2[j] -g1[i] + m1*p1[i])/(m1-m2)
-                  if p1[i] < P_inter < p1[i+1] and p2[j] < P_inter < p2[j+1]:
-                     g_inter=m1*P_inter+g1[i]-m1*p1[i]
-                     if g1[i] < g_inter < g1[i+1] and g2[j] < g_inter < g2[j+1] :
-                           return P_inter, g_inter
-
-   p_inter, g_inter = find_first_intersection(hpressure, mid_h_gibbs, cpressure, mid_c_gibbs)
-   pf_inter, gf_inter = find_first_intersection(hpressure, mid_h_gibbs, fit_p, fit_c_gibbs)
+   #(as always, we skip the first segment of each curve)
+   p_inter, g_inter = coexistence.first_intersection(hpressure[1:], mid_h_gibbs[1:], cpressure[1:], mid_c_gibbs[1:])
+   pf_inter, gf_inter = coexistence.first_intersection(hpressure[1:], mid_h_gibbs[1:], fit_p[1:], fit_c_gibbs[1:])
 
 
    #Find homogeneous and crystal densities at p_inter
-   def find_densities(p_inter, pressure, invn):
-      for i in range(1,len(pressure)-1): 
-         if pressure[i] > p_inter :
-               pressureabove=pressure[i]
-               invnabove=invn[i]
-               pressurebelow=pressure[i-1]
-               invnbelow=invn[i-1]
-               m=(pressureabove-pressurebelow)/(invnabove-invnbelow)
-               invn_inter=invnabove-((pressureabove-p_inter)/m)
-               return invn_inter
-   invnh=find_densities(p_inter, hpressure, mid_invn)
-   invnc=find_densities(p_inter, cpressure, mid_invn)
+   invnh=coexistence.first_crossing(mid_invn, hpressure, p_inter)
+   invnc=coexistence.first_crossing(mid_invn, cpressure, p_inter)
   
    p_at_freezing.append(p_inter)   
    n_homogeneous_at_freezing.append(1/invnh)
@@ -9,6 +9,7 @@ import numpy, time, os, glob, colors, argparse
 matplotlib.rc('text', usetex=True)
 
 import readnew
+import moviemaker
 
 parser = argparse.ArgumentParser(description='Animate the entropy')
 parser.add_argument('subdir', metavar='s000', type=str,
@@ -18,6 +19,12 @@ parser.add_argument('periodic_whatever', metavar='periodic-w1.30-ff...', type=st
 parser.add_argument('methods', metavar='METHOD', type=str, nargs='+',
                     help='the methods to animate')
 parser.add_argument('--all-frames', action='store_true', help="plot every frame!")
+parser.add_argument('--skip', metavar='N', type=int, help="plot every Nth frame")
+parser.add_argument('--only-new', action='store_true',
+                    help="only draw frames we have not drawn before")
+parser.add_argument('--jobs', metavar='J', type=int, help="draw with J processes")
+parser.add_argument('--video', action='store_true',
+                    help="pipe the frames straight into the movie")
 
 args = parser.parse_args()
 print(args)
@@ -31,39 +38,27 @@ if subdirname[:len('data/')] == 'data/':
 	print(('cutting redundant "data/" from first argument:', subdirname))
 
 moviedir = 'figs/movies/%s/%s-dos' % (subdirname, filename)
-os.system('rm -rf ' + moviedir)
+if not args.only_new:
+    os.system('rm -rf ' + moviedir)
 assert not os.system('mkdir -p ' + moviedir)
 
-fig, ax = plt.subplots()
-
 mine = 1e100
 maxe = -1e100
-numframes = 0
 
 dataformat = 'data/%s/%s-%%s-movie/%%06d' % (subdirname, filename)
 
-lastframe = -1
-alldone = False
-for frame in range(1, 100000):
-    if alldone:
-        break
-    for suffix in suffixes:
-        basename = dataformat % (suffix, frame)
-        try:
-            e, lndos = readnew.e_lndos(basename)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except:
-            alldone = True
-            break
-        numframes = frame+1
-        if len(e[lndos != lndos[-1]]) > 1:
-            mine = min(mine, e[lndos != lndos[-1]].min() - 5)
-        if len(e[lndos != lndos[0]]):
-            maxe = max(maxe, e[lndos != lndos[0]].max()+5)
-    if numframes % 25 == 0 and frame != lastframe:
-        print(('counting %dth frame' % numframes))
-        lastframe = frame
+# read each frame once (or not at all, if we have seen it before) to
+# find the energy range
+numframes = 100000
+for suffix in suffixes:
+    summaries = moviemaker.index('data/%s/%s-%s-movie' % (subdirname, filename, suffix),
+                                 'lndos', readnew.e_lndos, first=1)
+    numframes = min(numframes, len(summaries)+1)
+    for s in summaries:
+        if s['e_not_last_min'] is not None:
+            mine = min(mine, s['e_not_last_min'] - 5)
+        if s['e_not_first_max'] is not None:
+            maxe = max(maxe, s['e_not_first_max'] + 5)
 
 bestframe = sorted(glob.glob('data/%s/%s-%s-movie/*-lndos.dat'
                              % (subdirname, filename, suffixes[0])))[-1]
@@ -78,70 +73,81 @@ print(('maxe', maxe))
 print(('minlndos', minlndos))
 print(('maxlndos', maxlndos))
 
-skipby = 1
-maxframes = 200
-if numframes > maxframes and not args.all_frames:
-    skipby = numframes // maxframes
-    numframes = numframes // skipby
-    print(('only showing 1/%d of the frames' % skipby))
+frames = moviemaker.choose_frames(1, numframes-1, skipby=args.skip, all_frames=args.all_frames)
+numframes = len(frames)
 print(('numframes', numframes))
 
-for frame in range(1, numframes+1):
-    if frame % 25 == 0:
-        print(('working on frame %d/%d' % (frame, numframes)))
-    plt.cla()
+def setup():
+    fig, ax = plt.subplots()
     ax.plot(best_e, best_lndos, ':', color='0.5')
+    state = {'fig': fig, 'lines': {}, 'vlines': {}}
+    for suffix in suffixes:
+        state['lines'][suffix] = colors.plot([], [], method=suffix, axes=ax)[0]
+        state['vlines'][suffix] = [ax.axvline(0, color='r', linestyle=':'),
+                                   ax.axvline(0, color='b', linestyle=':'),
+                                   ax.axvline(0, color='b', linestyle='--'),
+                                   ax.axvline(0, color='r', linestyle='--')]
+    ax.set_xlabel(r'$E$')
+    ax.set_ylim(1.1*minlndos, maxlndos+5)
+    # ax.set_xlim(-5, -0.3)
+    ax.set_xlim(mine, maxe)
+    ax.set_ylabel(r'$\ln DOS$')
+    # ax.legend(loc='best').get_frame().set_alpha(0.25)
+    state['title'] = ax.set_title('')
+    colors.legend(loc='lower right')
+    return fig, state
 
-    for suffix_index in range(len(suffixes)):
-        suffix = suffixes[suffix_index]
-        basename = dataformat % (suffix, frame*skipby)
+def update(state, frame):
+    min_T = None
+    too_lo = None
+    for suffix in suffixes:
+        basename = dataformat % (suffix, frame)
+        line = state['lines'][suffix]
+        max_entropy_line, min_important_line, too_lo_line, too_hi_line = state['vlines'][suffix]
+        line.set_data([], [])
+        for vline in state['vlines'][suffix]:
+            vline.set_visible(False)
 
         try:
             e, lndos, ps, lndostm = readnew.e_lndos_ps_lndostm(basename)
-            colors.plot(e, lndos, method=suffix)
-            #if lndostm is not None and suffix[:2] != 'sa':
-            #    colors.plot(e, lndostm, method=suffix+'-tm')
+            line.set_data(e, lndos)
             datname = basename+'-lndos.dat'
             min_T = readnew.minT(datname)
             too_lo, too_hi = readnew.too_low_high_energy(datname)
-            ax.axvline(-readnew.max_entropy_state(datname), color='r', linestyle=':')
+            max_entropy_line.set_xdata([-readnew.max_entropy_state(datname)]*2)
+            max_entropy_line.set_visible(True)
             min_important_energy = int(readnew.min_important_energy(datname))
-            ax.axvline(-min_important_energy, color='b', linestyle=':')
-            if too_lo is not None and suffix[:3] == 'sad':
-              ax.axvline(-too_lo, color='b', linestyle='--')
+            min_important_line.set_xdata([-min_important_energy]*2)
+            min_important_line.set_visible(True)
             if too_lo is not None and suffix[:3] == 'sad':
-              ax.axvline(-too_hi, color='r', linestyle='--')
-            # Uncomment the following to plot a line at the
-            # min_important_energy with slope determined by min_T
-            # ax.plot(e, (e+min_important_energy)/min_T + lndos[min_important_energy], colors[suffix_index]+'--')
-            # ax.axvline(-readnew.converged_state(datname), color=colors.color(suffix), linestyle=':')
+                too_lo_line.set_xdata([-too_lo]*2)
+                too_lo_line.set_visible(True)
+                too_hi_line.set_xdata([-too_hi]*2)
+                too_hi_line.set_visible(True)
             # Uncomment the following to plot the lnw along with the lndos
             # e, lnw = readnew.e_lnw(basename)
-            # ax.plot(e, -lnw, colors[suffix_index]+':')
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception as e:
             print(e)
             pass
 
-    ax.set_xlabel(r'$E$')
-    ax.set_ylim(1.1*minlndos, maxlndos+5)
-    # ax.set_xlim(-5, -0.3)
-    ax.set_xlim(mine, maxe)
-    ax.set_ylabel(r'$\ln DOS$')
-    # ax.legend(loc='best').get_frame().set_alpha(0.25)
-    if too_lo is not None:
-      plt.title(r'lv movie from %s ($T_{\min} = %g$, $E_{lo} = %g$)'
-                % (filename, min_T, too_lo))
+    if min_T is None:
+        pass # we could not read any of the methods
+    elif too_lo is not None:
+        state['title'].set_text(r'lv movie from %s ($T_{\min} = %g$, $E_{lo} = %g$)'
+                                % (filename, min_T, too_lo))
     else:
-      plt.title(r'lv movie from %s ($T_{\min} = %g$)' % (filename, min_T))
-    colors.legend(loc='lower right')
-
-    fname = '%s/frame%06d.png' % (moviedir, frame)
-    plt.savefig(fname)
+        state['title'].set_text(r'lv movie from %s ($T_{\min} = %g$)' % (filename, min_T))
 
 duration = 10.0 # seconds
 
-avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
-os.system(avconv) # make the movie
-print(avconv)
+moviemaker.render(frames, setup, update, moviedir=moviedir,
+                  video=moviedir+'/movie.mp4' if args.video else None,
+                  fps=numframes/duration, processes=args.jobs, only_new=args.only_new,
+                  limits=[mine, maxe, minlndos, maxlndos])
+
+if not args.video:
+    avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
+    os.system(avconv) # make the movie
+    print(avconv)
@@ -9,6 +9,7 @@ import numpy, time, os, glob, colors, argparse
 matplotlib.rc('text', usetex=True)
 
 import readnew
+import moviemaker
 import re
 
 parser = argparse.ArgumentParser(description='Animate the entropy')
@@ -19,6 +20,12 @@ parser.add_argument('periodic_whatever', metavar='periodic-w1.30-ff...', type=st
 parser.add_argument('methods', metavar='METHOD', type=str, nargs='+',
                     help='the methods to animate')
 parser.add_argument('--all-frames', action='store_true', help="plot every frame!")
+parser.add_argument('--skip', metavar='N', type=int, help="plot every Nth frame")
+parser.add_argument('--only-new', action='store_true',
+                    help="only draw frames we have not drawn before")
+parser.add_argument('--jobs', metavar='J', type=int, help="draw with J processes")
+parser.add_argument('--video', action='store_true',
+                    help="pipe the frames straight into the movie")
 
 args = parser.parse_args()
 print(args)
@@ -32,41 +39,29 @@ if subdirname[:len('data/')] == 'data/':
 	print(('cutting redundant "data/" from first argument:', subdirname))
 
 moviedir = 'figs/movies/%s/%s-hist' % (subdirname, filename)
-os.system('rm -rf ' + moviedir)
+if not args.only_new:
+    os.system('rm -rf ' + moviedir)
 assert not os.system('mkdir -p ' + moviedir)
 
-fig, ax = plt.subplots()
-
 mine = 1e100
 maxe = -1e100
-numframes = 0
 
 dataformat = 'data/%s/%s-%%s-movie/%%06d' % (subdirname, filename)
 
-lastframe = -1
-alldone = False
-for frame in range(1, 100000):
-    if alldone:
-        break
-    for suffix in suffixes:
-        basename = dataformat % (suffix, frame)
-        try:
-            e, hist = readnew.e_and_total_init_histogram(basename)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except:
-            alldone = True
-            break
-        numframes = frame+1
-        if len(e[hist != hist[-1]]) > 1:
-            mine = min(mine, e[hist != hist[-1]].min()-5)
-        if len(e[hist != hist[0]]):
-            maxe = max(maxe, e[hist != hist[0]].max()+5)
-    if numframes % 25 == 0 and frame != lastframe:
-        print(('counting %dth frame' % numframes))
-        lastframe = frame
-
-bestframe = sorted(glob.glob('data/%s/%s-%s-movie/*'
+# read each frame once (or not at all, if we have seen it before) to
+# find the energy range
+numframes = 100000
+for suffix in suffixes:
+    summaries = moviemaker.index('data/%s/%s-%s-movie' % (subdirname, filename, suffix),
+                                 'transitions', readnew.e_and_total_init_histogram, first=1)
+    numframes = min(numframes, len(summaries)+1)
+    for s in summaries:
+        if s['e_not_last_min'] is not None:
+            mine = min(mine, s['e_not_last_min'] - 5)
+        if s['e_not_first_max'] is not None:
+            maxe = max(maxe, s['e_not_first_max'] + 5)
+
+bestframe = sorted(glob.glob('data/%s/%s-%s-movie/*-transitions.dat'
                              % (subdirname, filename, suffixes[0])))[-1]
 # Now strip -transitions.dat from filename.
 bestframe = re.sub('\-transitions.dat$', '', bestframe)
@@ -82,46 +77,46 @@ print(('maxe', maxe))
 print(('minhist', minhist))
 print(('maxhist', maxhist))
 
-skipby = 1
-maxframes = 200
-if numframes > maxframes and not args.all_frames:
-    skipby = numframes // maxframes
-    numframes = numframes // skipby
-    print(('only showing 1/%d of the frames' % skipby))
+frames = moviemaker.choose_frames(1, numframes-1, skipby=args.skip, all_frames=args.all_frames)
+numframes = len(frames)
 print(('numframes', numframes))
 
-for frame in range(1, numframes+1):
-    if frame % 25 == 0:
-        print(('working on frame %d/%d' % (frame, numframes)))
-    plt.cla()
+def setup():
+    fig, ax = plt.subplots()
     ax.plot(best_e, best_hist, ':', color='0.5')
+    state = {'fig': fig, 'lines': {}}
+    for suffix in suffixes:
+        state['lines'][suffix] = colors.plot([], [], method=suffix, axes=ax)[0]
+    ax.set_xlabel(r'$E$')
+    ax.set_ylim(1.1*minhist, maxhist+5)
+    ax.set_xlim(mine, maxe)
+    ax.set_ylabel(r'$\textrm{Histogram}$')
+    colors.legend(loc='lower right')
+    return fig, state
 
-    for suffix_index in range(len(suffixes)):
-        suffix = suffixes[suffix_index]
-        basename = dataformat % (suffix, frame*skipby)
-
+def update(state, frame):
+    for suffix in suffixes:
+        basename = dataformat % (suffix, frame)
+        state['lines'][suffix].set_data([], [])
         try:
             datname = basename+'-transitions.dat'
             #print(readnew.moves(datname))
             e, hist = readnew.e_hist(basename)
-            colors.plot(e, hist, method=suffix)
+            state['lines'][suffix].set_data(e, hist)
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception as e:
             print(e)
             pass
 
-    ax.set_xlabel(r'$E$')
-    ax.set_ylim(1.1*minhist, maxhist+5)
-    ax.set_xlim(mine, maxe)
-    ax.set_ylabel(r'$\textrm{Histogram}$')
-    colors.legend(loc='lower right')
-
-    fname = '%s/frame%06d.png' % (moviedir, frame)
-    plt.savefig(fname)
-
 duration = 10.0 # seconds
 
-avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
-os.system(avconv) # make the movie
-print(avconv)
+moviemaker.render(frames, setup, update, moviedir=moviedir,
+                  video=moviedir+'/movie.mp4' if args.video else None,
+                  fps=numframes/duration, processes=args.jobs, only_new=args.only_new,
+                  limits=[mine, maxe, minhist, maxhist])
+
+if not args.video:
+    avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
+    os.system(avconv) # make the movie
+    print(avconv)
@@ -1,188 +1,290 @@
 from __future__ import division
-import numpy, sys, os
+import numpy, sys, os, json, multiprocessing
 import matplotlib.pyplot as plt
 import readnew
 from glob import glob
 
-if os.path.exists('../data'):
-    os.chdir('..')
-
-energy = int(sys.argv[1])
-reference = sys.argv[2]
-filebase = sys.argv[3]
-methods = [ '-sad3', '-sad3-s1', '-sad3-s2',
-            '-tmmc', '-tmi', '-tmi2', '-tmi3', '-toe', '-toe2', '-toe3',
-            '-vanilla_wang_landau', '-sad']
-if 'allmethods' not in sys.argv:
-    methods = ['-sad3', '-sad3-s2', '-sad3-s5', '-sad3-s6', '-tmmc', '-vanilla_wang_landau', '-vanilla_wang_landau-minE', '-vanilla_wang_landau-s2', '-sad3-test', '-sad3-T13', '-one_over_t_wang_landau-T13-t',
-               '-vanilla_wang_landau-T13', '-vanilla_wang_landau-T13-slow', '-n256-tmmc']
-fast_methods = [m+'-fast' for m in methods]
-slow_methods = [m+'-slow' for m in methods]
-methods = methods + fast_methods + slow_methods
+# We compare every frame of each method's movie with the reference
+# lndos.  Since a frame never changes once it is written, we remember
+# the errors of each frame in a frames.json file next to errors.txt,
+# and on the next run only read the frames that have appeared (or been
+# rewritten) since.  New frames are read by a pool of worker processes,
+# and their rows are appended to the error tables, so rerunning this on
+# a simulation that is still going costs time proportional to the
+# number of new frames.
+
+# the columns we remember for each frame
+columns = ['iterations', 'Nrt_at_energy', 'maxentropystate', 'minimportantenergy',
+           'erroratenergy', 'errorinentropy', 'maxerror',
+           'has_tm', 'erroratenergytm', 'errorinentropytm', 'maxerrortm']
 
 def running_mean(x, N):
-    cumsum = numpy.cumsum(numpy.insert(x, 0, 0)) 
+    cumsum = numpy.cumsum(numpy.insert(x, 0, 0))
     averaged = (cumsum[N:] - cumsum[:-N]) / N
     return numpy.concatenate((x[:len(x)-len(averaged)], averaged))
 
-# For WLTMMC compatibility with LVMC
-lvextra = glob('data/%s-wltmmc*-movie' % filebase)
-split1 = [i.split('%s-'%filebase, 1)[-1] for i in lvextra]
-split2 = [i.split('-m', 1)[0] for i in split1]
-for j in range(len(split2)):
-    methods.append('-%s' %split2[j])
-
-# For SAMC compatibility with LVMC
-lvextra1 = glob('data/%s-samc*-movie' % filebase)
-split3 = [i.split('%s-'%filebase, 1)[-1] for i in lvextra1]
-split4 = [i.split('-m', 1)[0] for i in split3]
-for j in range(len(split4)):
-    methods.append('-%s' %split4[j])
-
-print(methods)
-
-ref = reference
-if ref[:len('data/')] != 'data/':
-    ref = 'data/' + ref
-maxref = int(readnew.max_entropy_state(ref))
-minref = int(readnew.min_important_energy(ref))
-n_energies = int(minref - maxref+1)
-print(maxref, minref)
-try:
-    eref, lndosref, Nrt_ref = readnew.e_lndos_ps(ref)
-except:
-    eref, lndosref = readnew.e_lndos(ref)
-
-for method in methods:
-    dirname = 'data/comparison/%s%s' % (filebase, method)
-    dirnametm = 'data/comparison/%s%s-tm' % (filebase, method)
+def stamp(f):
+    st = os.stat(f)
+    return [st.st_mtime, st.st_size]
+
+# The reference that frame_errors compares with, set in each worker
+# by set_reference.
+reference = {}
+
+def set_reference(energy, eref, lndosref, maxref, minref):
+    reference.update(energy=energy, eref=eref, lndosref=lndosref,
+                     maxref=maxref, minref=minref)
+
+def frame_errors(f):
+    """Return (f, stamp, row) for the frame f, where row holds the
+    columns above, or (f, None, None) if f can't be read (e.g. because
+    it is still being written)."""
+    energy = reference['energy']
+    eref = reference['eref']
+    lndosref = reference['lndosref']
+    maxref = reference['maxref']
+    minref = reference['minref']
     try:
-        r = glob('data/%s%s-movie/*lndos.dat' % (filebase, method))
-        if len(r)==0:
-            # print(" ... but it has no data in data/%s%s-movie/*lndos.dat" % (filebase,method))
-            continue
-        if not os.path.exists(dirname):
-            os.makedirs(dirname)
-        if not os.path.exists(dirnametm):
-            os.makedirs(dirnametm)
-        #wl_factor = numpy.zeros(len(r))
-        iterations = numpy.zeros(len(r))
-        Nrt_at_energy = numpy.zeros(len(r))
-        maxentropystate = numpy.zeros(len(r))
-        minimportantenergy = numpy.zeros(len(r))
-        erroratenergy = numpy.zeros(len(r))
-        errorinentropy = numpy.zeros(len(r))
-        maxerror = numpy.zeros(len(r))
-
-        erroratenergytm = numpy.zeros(len(r))
-        errorinentropytm = numpy.zeros(len(r))
-        maxerrortm = numpy.zeros(len(r))
-
-        for i, f in enumerate(sorted(r)):
-            e, lndos, Nrt, lndostm = readnew.e_lndos_ps_lndostm(f)
-            maxentropystate[i] = readnew.max_entropy_state(f)
-            minimportantenergy[i] = readnew.min_important_energy(f)
-
-            #wl_factor[i] = readnew.wl_factor(f)
-            iterations[i] = readnew.iterations(f)
-            Nrt_at_energy[i] = Nrt[energy]
-            # The following norm_factor is designed to shift our lndos
-            # curve in such a way that our errors reflect the ln of the
-            # error in the predicted histogram.  i.e. $\Delta S$ a.k.a.
-            # doserror = -ln H where H is the histogram that would be
-            # observed when running with weights determined by lndos.
-            # norm_factor = numpy.log(numpy.sum(numpy.exp(lndos[maxref:minref+1] - lndosref[maxref:minref+1]))/n_energies)
-
-            # below just set average S equal between lndos and lndosref
-            index_maxref = numpy.argwhere(eref == -maxref)[0][0]
-            index_minref = numpy.argwhere(eref == -minref)[0][0]
-            index_max = numpy.argwhere(e == -maxref)[0][0]
-            index_min = numpy.argwhere(e == -minref)[0][0]
-            norm_factor = numpy.mean(lndos[index_max:index_min+1]) - numpy.mean(lndosref[index_maxref:index_minref+1])
-            #print index_maxref
-            #print index_minref
-            #print lndosref[index_maxref:index_minref]
-            #print lndos[index_maxref:index_minref]
-            doserror = lndos[index_max:index_min+1] - lndosref[index_maxref:index_minref+1] - norm_factor
-            errorinentropy[i] = numpy.sum(abs(doserror))/len(doserror)
-            erroratenergy[i] = doserror[energy-maxref]
-            # the following "max" result is independent of how we choose
-            # to normalize doserror, and represents the largest ratio
-            # of fractional errors in the actual (not ln) DOS.
-            maxerror[i] = numpy.amax(doserror) - numpy.amin(doserror)
-            
-            if lndostm is not None:
-                norm_factor = numpy.mean(lndos[index_max:index_min+1]) - numpy.mean(lndosref[index_maxref:index_minref+1])
-                doserror = lndos[index_max:index_min+1] - lndosref[index_maxref:index_minref+1] - norm_factor
-                errorinentropytm[i] = numpy.sum(abs(doserror))/len(doserror)
-                erroratenergytm[i] = doserror[energy-maxref]
-                # the following "max" result is independent of how we choose
-                # to normalize doserror, and represents the largest ratio
-                # of fractional errors in the actual (not ln) DOS.
-                maxerrortm[i] = numpy.amax(doserror) - numpy.amin(doserror)
-
-        # The following is intended for testing whether there is a
-        # systematic error in any of our codes.
-        
-        #numpy.savetxt('%s/error-vs-energy.txt' %(dirname),
-                    #numpy.c_[eref, doserror],
-                    #fmt = ('%.4g'),
-                    #delimiter = '\t', header = 'E\t Serror')
-        i = 1
-        while i < len(iterations) and iterations[i] >= iterations[i-1]:
-            num_frames_to_count = i+1
-            i+=1
-        #wl_factor = wl_factor[:num_frames_to_count]
-        iterations = iterations[:num_frames_to_count]
-        minimportantenergy = minimportantenergy[:num_frames_to_count]
-        maxentropystate = maxentropystate[:num_frames_to_count]
-        Nrt_at_energy = Nrt_at_energy[:num_frames_to_count]
-        erroratenergy = erroratenergy[:num_frames_to_count]
-        errorinentropy = errorinentropy[:num_frames_to_count]
-        windows = int(len(iterations)/10 + 1)
-        windows = 10
-        maxerror = maxerror[:num_frames_to_count]
-        #uncomment the following line for windowed averages
-        #maxerror = running_mean(maxerror[:num_frames_to_count],windows)
-
-        erroratenergytm = erroratenergytm[:num_frames_to_count]
-        errorinentropytm = errorinentropytm[:num_frames_to_count]
-        maxerrortm = maxerrortm[:num_frames_to_count]
-
-        print('saving to', dirname)
-        numpy.savetxt('%s/energy-%d.txt' %(dirname, energy),
-                      numpy.c_[Nrt_at_energy, erroratenergy],
-                      fmt = ('%.4g'),
-                      delimiter = '\t', header = 'round trips\t doserror')
-        numpy.savetxt('%s/errors.txt' %(dirname),
-                      numpy.c_[iterations, errorinentropy, maxerror],
-                      fmt = ('%.4g'),
-                      delimiter = '\t',
-                      header = 'iterations\t errorinentropy\t maxerror\t(generated with python %s' % ' '.join(sys.argv))
-        #if not numpy.isnan(numpy.sum(wl_factor)):
-            #numpy.savetxt('%s/wl-factor.txt' %(dirname),
-                        #numpy.c_[iterations, wl_factor],
+        st = stamp(f)
+        e, lndos, Nrt, lndostm = readnew.e_lndos_ps_lndostm(f)
+        maxentropystate = readnew.max_entropy_state(f)
+        minimportantenergy = readnew.min_important_energy(f)
+        #wl_factor = readnew.wl_factor(f)
+        iterations = readnew.iterations(f)
+        Nrt_at_energy = Nrt[energy]
+        # The following norm_factor is designed to shift our lndos
+        # curve in such a way that our errors reflect the ln of the
+        # error in the predicted histogram.  i.e. $\Delta S$ a.k.a.
+        # doserror = -ln H where H is the histogram that would be
+        # observed when running with weights determined by lndos.
+        # norm_factor = numpy.log(numpy.sum(numpy.exp(lndos[maxref:minref+1] - lndosref[maxref:minref+1]))/n_energies)
+
+        # below just set average S equal between lndos and lndosref
+        index_maxref = numpy.argwhere(eref == -maxref)[0][0]
+        index_minref = numpy.argwhere(eref == -minref)[0][0]
+        index_max = numpy.argwhere(e == -maxref)[0][0]
+        index_min = numpy.argwhere(e == -minref)[0][0]
+    except (IOError, OSError, ValueError, IndexError, TypeError) as err:
+        print('skipping', f, 'for now:', err)
+        return f, None, None
+    norm_factor = numpy.mean(lndos[index_max:index_min+1]) - numpy.mean(lndosref[index_maxref:index_minref+1])
+    doserror = lndos[index_max:index_min+1] - lndosref[index_maxref:index_minref+1] - norm_factor
+    errorinentropy = numpy.sum(abs(doserror))/len(doserror)
+    erroratenergy = doserror[energy-maxref]
+    # the following "max" result is independent of how we choose
+    # to normalize doserror, and represents the largest ratio
+    # of fractional errors in the actual (not ln) DOS.
+    maxerror = numpy.amax(doserror) - numpy.amin(doserror)
+
+    erroratenergytm = errorinentropytm = maxerrortm = 0
+    if lndostm is not None:
+        norm_factor = numpy.mean(lndos[index_max:index_min+1]) - numpy.mean(lndosref[index_maxref:index_minref+1])
+        doserror = lndos[index_max:index_min+1] - lndosref[index_maxref:index_minref+1] - norm_factor
+        errorinentropytm = numpy.sum(abs(doserror))/len(doserror)
+        erroratenergytm = doserror[energy-maxref]
+        maxerrortm = numpy.amax(doserror) - numpy.amin(doserror)
+
+    row = [iterations, Nrt_at_energy, maxentropystate, minimportantenergy,
+           erroratenergy, errorinentropy, maxerror,
+           lndostm is not None, erroratenergytm, errorinentropytm, maxerrortm]
+    return f, st, [float(x) for x in row]
+
+def load_state(fname, key):
+    """The frames.json state, unless it was made for a different
+    reference or energy."""
+    if os.path.exists(fname):
+        try:
+            with open(fname) as f:
+                state = json.load(f)
+            if state.get('key') == key and state.get('columns') == columns:
+                return state
+        except ValueError:
+            pass # a corrupt state file just means starting over
+    return {'key': key, 'columns': columns, 'frames': {}, 'written': {}}
+
+def save_state(fname, state):
+    with open(fname + '.tmp', 'w') as f:
+        json.dump(state, f, sort_keys=True)
+    os.rename(fname + '.tmp', fname)
+
+def write_table(fname, data, header, state, changed):
+    """Write the rows of data to fname, appending just the new rows if
+    the rows we wrote last time are still the first rows of data."""
+    written = state['written'].get(fname, 0)
+    if changed or written > len(data) or not os.path.exists(fname):
+        written = 0
+    if written == 0:
+        numpy.savetxt(fname, data, fmt = ('%.4g'), delimiter = '\t', header = header)
+    elif written < len(data):
+        with open(fname, 'ab') as f:
+            numpy.savetxt(f, data[written:], fmt = ('%.4g'), delimiter = '\t')
+    state['written'][fname] = len(data)
+
+if __name__ == '__main__':
+    if os.path.exists('../data'):
+        os.chdir('..')
+
+    energy = int(sys.argv[1])
+    reference_name = sys.argv[2]
+    filebase = sys.argv[3]
+    methods = [ '-sad3', '-sad3-s1', '-sad3-s2',
+                '-tmmc', '-tmi', '-tmi2', '-tmi3', '-toe', '-toe2', '-toe3',
+                '-vanilla_wang_landau', '-sad']
+    if 'allmethods' not in sys.argv:
+        methods = ['-sad3', '-sad3-s2', '-sad3-s5', '-sad3-s6', '-tmmc', '-vanilla_wang_landau', '-vanilla_wang_landau-minE', '-vanilla_wang_landau-s2', '-sad3-test', '-sad3-T13', '-one_over_t_wang_landau-T13-t',
+                   '-vanilla_wang_landau-T13', '-vanilla_wang_landau-T13-slow', '-n256-tmmc']
+    fast_methods = [m+'-fast' for m in methods]
+    slow_methods = [m+'-slow' for m in methods]
+    methods = methods + fast_methods + slow_methods
+
+    # For WLTMMC compatibility with LVMC
+    lvextra = glob('data/%s-wltmmc*-movie' % filebase)
+    split1 = [i.split('%s-'%filebase, 1)[-1] for i in lvextra]
+    split2 = [i.split('-m', 1)[0] for i in split1]
+    for j in range(len(split2)):
+        methods.append('-%s' %split2[j])
+
+    # For SAMC compatibility with LVMC
+    lvextra1 = glob('data/%s-samc*-movie' % filebase)
+    split3 = [i.split('%s-'%filebase, 1)[-1] for i in lvextra1]
+    split4 = [i.split('-m', 1)[0] for i in split3]
+    for j in range(len(split4)):
+        methods.append('-%s' %split4[j])
+
+    print(methods)
+
+    ref = reference_name
+    if ref[:len('data/')] != 'data/':
+        ref = 'data/' + ref
+    maxref = int(readnew.max_entropy_state(ref))
+    minref = int(readnew.min_important_energy(ref))
+    n_energies = int(minref - maxref+1)
+    print(maxref, minref)
+    try:
+        eref, lndosref, Nrt_ref = readnew.e_lndos_ps(ref)
+    except:
+        eref, lndosref = readnew.e_lndos(ref)
+    set_reference(energy, eref, lndosref, maxref, minref)
+    ref_file = ref if '.dat' in ref else ref + '-lndos.dat'
+    key = {'reference': os.path.abspath(ref_file), 'stamp': stamp(ref_file),
+           'energy': energy}
+
+    pool = None
+    for method in methods:
+        dirname = 'data/comparison/%s%s' % (filebase, method)
+        dirnametm = 'data/comparison/%s%s-tm' % (filebase, method)
+        try:
+            r = glob('data/%s%s-movie/*lndos.dat' % (filebase, method))
+            if len(r)==0:
+                # print(" ... but it has no data in data/%s%s-movie/*lndos.dat" % (filebase,method))
+                continue
+            if not os.path.exists(dirname):
+                os.makedirs(dirname)
+            if not os.path.exists(dirnametm):
+                os.makedirs(dirnametm)
+            statefile = '%s/frames.json' % dirname
+            state = load_state(statefile, key)
+            frames = state['frames']
+
+            # Forget frames that are gone, and find the ones we haven't
+            # seen (or that have changed since we saw them).
+            names = set(os.path.basename(f) for f in r)
+            changed = any(name not in names for name in frames)
+            for name in list(frames):
+                if name not in names:
+                    del frames[name]
+            new = [f for f in sorted(r)
+                   if frames.get(os.path.basename(f), {}).get('stamp') != stamp(f)]
+            # If a frame we knew changed, or a new one sorts before the
+            # last one we knew, the tables can't just be appended to.
+            last = max(frames) if frames else ''
+            changed = changed or any(os.path.basename(f) in frames or os.path.basename(f) < last
+                                     for f in new)
+            print('%s: %d frames, %d of them new' % (method, len(r), len(new)))
+
+            if len(new) > 1 and pool is None:
+                pool = multiprocessing.Pool(initializer=set_reference,
+                                            initargs=(energy, eref, lndosref, maxref, minref))
+            results = pool.imap(frame_errors, new) if len(new) > 1 else map(frame_errors, new)
+            for f, st, row in results:
+                if row is None:
+                    frames.pop(os.path.basename(f), None)
+                else:
+                    frames[os.path.basename(f)] = {'stamp': st, 'row': row}
+
+            order = sorted(frames)
+            if len(order) == 0:
+                save_state(statefile, state)
+                continue
+            data = numpy.array([frames[name]['row'] for name in order])
+            (iterations, Nrt_at_energy, maxentropystate, minimportantenergy,
+             erroratenergy, errorinentropy, maxerror,
+             has_tm, erroratenergytm, errorinentropytm, maxerrortm) = data.T
+
+            # The following is intended for testing whether there is a
+            # systematic error in any of our codes.
+
+            #numpy.savetxt('%s/error-vs-energy.txt' %(dirname),
+                        #numpy.c_[eref, doserror],
                         #fmt = ('%.4g'),
-                        #delimiter = '\t',
-                        #header = 'iterations\t wl_factor\t(generated with python %s' % ' '.join(sys.argv))
-
-        if lndostm is not None:
-            print('saving to', dirnametm)
-            numpy.savetxt('%s/energy-%d.txt' %(dirnametm, energy),
-                        numpy.c_[Nrt_at_energy, erroratenergytm],
-                        fmt = ('%.4g'),
-                        delimiter = '\t', header = 'round trips\t doserror')
-            numpy.savetxt('%s/errors.txt' %(dirnametm),
-                        numpy.c_[iterations, errorinentropytm, maxerrortm],
-                        fmt = ('%.4g'),
-                        delimiter = '\t',
-                        header = 'iterations\t errorinentropy\t maxerror\t(generated with python %s' % ' '.join(sys.argv))
+                        #delimiter = '\t', header = 'E\t Serror')
+            num_frames_to_count = 1
+            i = 1
+            while i < len(iterations) and iterations[i] >= iterations[i-1]:
+                num_frames_to_count = i+1
+                i+=1
+            #wl_factor = wl_factor[:num_frames_to_count]
+            iterations = iterations[:num_frames_to_count]
+            minimportantenergy = minimportantenergy[:num_frames_to_count]
+            maxentropystate = maxentropystate[:num_frames_to_count]
+            Nrt_at_energy = Nrt_at_energy[:num_frames_to_count]
+            erroratenergy = erroratenergy[:num_frames_to_count]
+            errorinentropy = errorinentropy[:num_frames_to_count]
+            windows = int(len(iterations)/10 + 1)
+            windows = 10
+            maxerror = maxerror[:num_frames_to_count]
+            #uncomment the following line for windowed averages
+            #maxerror = running_mean(maxerror[:num_frames_to_count],windows)
+
+            erroratenergytm = erroratenergytm[:num_frames_to_count]
+            errorinentropytm = errorinentropytm[:num_frames_to_count]
+            maxerrortm = maxerrortm[:num_frames_to_count]
+
+            print('saving to', dirname)
+            write_table('%s/energy-%d.txt' %(dirname, energy),
+                        numpy.c_[Nrt_at_energy, erroratenergy],
+                        'round trips\t doserror', state, changed)
+            write_table('%s/errors.txt' %(dirname),
+                        numpy.c_[iterations, errorinentropy, maxerror],
+                        'iterations\t errorinentropy\t maxerror\t(generated with python %s' % ' '.join(sys.argv),
+                        state, changed)
             #if not numpy.isnan(numpy.sum(wl_factor)):
-                #numpy.savetxt('%s/wl-factor.txt' %(dirnametm),
-                        #numpy.c_[iterations, wl_factor],
-                        #fmt = ('%.4g'),
-                        #delimiter = '\t',
-                        #header = 'iterations\t wl_factor\t(generated with python %s' % ' '.join(sys.argv))
-    except:
-        print('I had trouble with', method)
-        raise
+                #numpy.savetxt('%s/wl-factor.txt' %(dirname),
+                            #numpy.c_[iterations, wl_factor],
+                            #fmt = ('%.4g'),
+                            #delimiter = '\t',
+                            #header = 'iterations\t wl_factor\t(generated with python %s' % ' '.join(sys.argv))
+
+            # as before, whether we have lndostm is decided by the last frame
+            if has_tm[-1]:
+                print('saving to', dirnametm)
+                write_table('%s/energy-%d.txt' %(dirnametm, energy),
+                            numpy.c_[Nrt_at_energy, erroratenergytm],
+                            'round trips\t doserror', state, changed)
+                write_table('%s/errors.txt' %(dirnametm),
+                            numpy.c_[iterations, errorinentropytm, maxerrortm],
+                            'iterations\t errorinentropy\t maxerror\t(generated with python %s' % ' '.join(sys.argv),
+                            state, changed)
+                #if not numpy.isnan(numpy.sum(wl_factor)):
+                    #numpy.savetxt('%s/wl-factor.txt' %(dirnametm),
+                            #numpy.c_[iterations, wl_factor],
+                            #fmt = ('%.4g'),
+                            #delimiter = '\t',
+                            #header = 'iterations\t wl_factor\t(generated with python %s' % ' '.join(sys.argv))
+            save_state(statefile, state)
+        except:
+            print('I had trouble with', method)
+            raise
+    if pool is not None:
+        pool.close()
+        pool.join()
@@ -0,0 +1,133 @@
+#!/usr/bin/python2
+from __future__ import division
+import os, json
+import numpy
+
+# A cache for the text output of our Monte Carlo simulations (-E.dat,
+# -lnw.dat, -lndos.dat, -transitions.dat and friends).  The first
+# time we read a file we parse it once, and save its numeric block as
+# a .npy sidecar and its comment header as a .json sidecar right next
+# to the original.  Later reads memory-map the .npy file and read the
+# header from the .json, without touching the text at all.  Both
+# sidecars record the mtime and size of the text file they came from,
+# so when the simulation rewrites its output we notice and reparse.
+
+_memo = {} # maps path to ((path, mtime, size), (data, comments))
+
+def _sidecars(fname):
+    return fname + '.npy', fname + '.json'
+
+def _stamp(fname):
+    st = os.stat(fname)
+    return os.path.abspath(fname), st.st_mtime, st.st_size
+
+def parse_header(comments):
+    """Turn a list of comment lines (without the leading '#') into a
+    dict mapping each "key: value" key to its value as a string."""
+    header = {}
+    for line in comments:
+        if ': ' in line:
+            key, value = line.split(': ', 1)
+            key = key.strip()
+            if key not in header:
+                header[key] = value.strip()
+    return header
+
+def _parse(fname):
+    comments = []
+    rows = []
+    with open(fname) as f:
+        for line in f:
+            if line.startswith('#'):
+                comments.append(line[1:].rstrip('\n'))
+            elif line.strip():
+                rows.append(line)
+    if len(rows) > 0:
+        data = numpy.loadtxt(rows, ndmin=2, dtype=float)
+    else:
+        data = numpy.zeros((0, 0))
+    return data, comments
+
+def _write_sidecars(fname, stamp, data, comments):
+    fnpy, fjson = _sidecars(fname)
+    # write to temporary files and rename them, so a reader never sees
+    # a half-written cache.  The temporary names include our pid, since
+    # several processes (e.g. the comparison.py pool) may be caching
+    # the same file at once.
+    tmpnpy = '%s.%d.tmp' % (fnpy, os.getpid())
+    tmpjson = '%s.%d.tmp' % (fjson, os.getpid())
+    try:
+        with open(tmpnpy, 'wb') as f:
+            numpy.save(f, data)
+        with open(tmpjson, 'w') as f:
+            json.dump({'mtime': stamp[1], 'size': stamp[2],
+                       'comments': comments}, f)
+        os.rename(tmpnpy, fnpy)
+        os.rename(tmpjson, fjson)
+    except (IOError, OSError):
+        # we can live without a cache, e.g. in a read-only directory
+        for tmp in (tmpnpy, tmpjson):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+def _read_sidecars(fname, stamp):
+    fnpy, fjson = _sidecars(fname)
+    try:
+        with open(fjson) as f:
+            meta = json.load(f)
+        if meta['mtime'] != stamp[1] or meta['size'] != stamp[2]:
+            return None
+        data = numpy.load(fnpy, mmap_mode='r')
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+    return data, meta['comments']
+
+def load_comments(fname):
+    """Return the numeric data of fname as a (read-only) 2D array,
+    along with a list of its comment lines."""
+    stamp = _stamp(fname)
+    if stamp[0] in _memo and _memo[stamp[0]][0] == stamp:
+        return _memo[stamp[0]][1]
+    cached = _read_sidecars(fname, stamp)
+    if cached is None:
+        data, comments = _parse(fname)
+        _write_sidecars(fname, stamp, data, comments)
+        cached = _read_sidecars(fname, stamp)
+        if cached is None:
+            cached = (data, comments)
+    _memo[stamp[0]] = (stamp, cached)
+    return cached
+
+def cached_comments(fname):
+    """Return the comment lines of fname if we have them cached, or
+    None if we would have to parse the file to find them."""
+    stamp = _stamp(fname)
+    if stamp[0] in _memo and _memo[stamp[0]][0] == stamp:
+        return _memo[stamp[0]][1][1]
+    fnpy, fjson = _sidecars(fname)
+    try:
+        with open(fjson) as f:
+            meta = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if meta.get('mtime') != stamp[1] or meta.get('size') != stamp[2]:
+        return None
+    return meta.get('comments')
+
+def load(fname):
+    """Return the numeric data of fname as a (read-only) 2D array,
+    along with its header as a dict."""
+    data, comments = load_comments(fname)
+    return data, parse_header(comments)
+
+def loadtxt(fname):
+    """A drop-in for numpy.loadtxt(fname, ndmin=2)."""
+    return load_comments(fname)[0]
+
+def comments(fname):
+    return load_comments(fname)[1]
+
+def header(fname):
+    return parse_header(comments(fname))
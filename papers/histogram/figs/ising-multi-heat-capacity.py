@@ -7,7 +7,7 @@ import readnew
 from glob import glob
 #import re
 import matplotlib.pyplot as plt
-import yaml
+import yamlcache
 import os.path
 import time # Need to wait some time if file is being written
 
@@ -47,42 +47,20 @@ for f in filename:
 
             # Read YAML file
             if os.path.isfile(filename_location + name):
-                with open(filename_location + name, 'r') as stream:
-                    yaml_data = yaml.load(stream)
+                yaml_data = yamlcache.load(filename_location + name)
             else:
                 print(('unable to read file', filename_location + name))
                 raise ValueError("%s isn't a file!" % (filename_location + name))
 
             data = yaml_data
-            data['bins']['histogram'] = np.array(data['bins']['histogram'])
-            data['bins']['lnw'] = np.array(data['bins']['lnw'])
-
-            data['movies']['entropy'] = np.array(data['movies']['entropy'])
-            lndos = data['movies']['entropy']
-            energies = data['movies']['energy']
-            N_save_times = len(data['movies']['entropy'])
-            try:
-                maxyaml = energies.index(-Emin)
-            except:
-                my_minE = energies[0]
-                num_new_energies = int(my_minE - (-Emin))
-                print(('num_new_maxyaml', num_new_energies))
-                lndos_new = np.zeros((lndos.shape[0], lndos.shape[1]+num_new_energies))
-                lndos_new[:, num_new_energies:] = lndos[:,:]
-                lndos = lndos_new
-                energies = [0]*num_new_energies + energies
-                maxyaml = 0
-
-            try:
-                minyaml = energies.index(-Emax)
-            except:
-                my_maxE = energies[-1]
-                num_new_energies = -int(my_maxE - (-Emax))
-                print(('num_new_minyaml', num_new_energies))
-                lndos_new = np.zeros((lndos.shape[0], lndos.shape[1]+num_new_energies))
-                lndos_new[:, :lndos.shape[1]] = lndos[:,:]
-                lndos = lndos_new
-                minyaml = lndos.shape[1]-1
+            # the entropy of each frame from -Emin to -Emax, padded with
+            # zeros where this run has not been
+            lndos = yamlcache.energy_window(data['movies']['energy'],
+                                            data['movies']['entropy'], -Emin, -Emax)
+            energies = list(range(-Emin, -Emax+1))
+            N_save_times = len(lndos)
+            maxyaml = 0
+            minyaml = lndos.shape[1]-1
 
             #moves = data['moves']
 
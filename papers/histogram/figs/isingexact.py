@@ -0,0 +1,215 @@
+#!/usr/bin/python2
+from __future__ import division, print_function
+import os, decimal
+import numpy as np
+import mpmath
+
+# The exact density of states of the n x m periodic Ising model, from
+# Beale's exact partition function (Phys. Rev. Lett. 76, 78 (1996),
+# https://spot.colorado.edu/~beale/IsingExactMathematica.html).  The
+# partition function is a polynomial in x = exp(-2J/kT), whose
+# coefficient of x^d is the number of states with d unsatisfied bonds,
+# i.e. with energy E = -2nm + 2d.
+#
+# Beale's formula has coefficients involving cos(pi k/n), so rather
+# than rational arithmetic we work in fixed point: each polynomial is a
+# list of big integer coefficients times a shared power of ten,
+# carrying enough digits that the final coefficients round to the
+# right integers, which we check.  We multiply two polynomials by
+# packing each into one huge integer (Kronecker substitution), so the
+# work is done by a single big integer multiply.  The integers are
+# Decimals, because the decimal module multiplies huge numbers with a
+# number theoretic transform, and converts them to and from strings in
+# linear time, which python's int does not.
+#
+# This still takes about a minute for a 48 x 48 lattice and an hour or
+# two for 128 x 128, so reference() saves ln g(E) of each lattice in
+# data/ising-exact/ and only computes it the first time it is asked
+# for.
+
+cachedir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'data', 'ising-exact')
+
+# exact integer arithmetic, however many digits we need
+_exact = decimal.Context(prec=getattr(decimal, 'MAX_PREC', 999999999999999999),
+                         Emax=getattr(decimal, 'MAX_EMAX', 999999999999999999),
+                         Emin=getattr(decimal, 'MIN_EMIN', -999999999999999999),
+                         rounding=decimal.ROUND_HALF_EVEN)
+_one = decimal.Decimal(1)
+
+def _digits(c):
+    """The number of digits of the integer c."""
+    return c.adjusted() + 1 if c else 0
+
+def _shift(c, digits):
+    """c * 10^digits, for digits >= 0, as an integer with exponent 0."""
+    return c.scaleb(digits).quantize(_one)
+
+def _join(p, digits):
+    """Pack nonnegative integer coefficients p, lowest first, into one
+    integer with the given number of digits per coefficient."""
+    return decimal.Decimal(''.join(str(c).rjust(digits, '0') for c in reversed(p)) or '0')
+
+def _pack(p, digits):
+    zero = decimal.Decimal(0)
+    return (_join([c if c > 0 else zero for c in p], digits)
+            - _join([-c if c < 0 else zero for c in p], digits))
+
+def _unpack(v, digits, length):
+    half = decimal.Decimal('5' + '0'*(digits - 1))
+    s = str(v + _join([half]*length, digits)).rjust(digits*length, '0')
+    return [decimal.Decimal(s[len(s)-(i+1)*digits:len(s)-i*digits]) - half for i in range(length)]
+
+def _convolve(p, q):
+    if len(p) < len(q):
+        p, q = q, p
+    if len(q) <= 8:
+        out = [decimal.Decimal(0)]*(len(p) + len(q) - 1)
+        for j, b in enumerate(q):
+            if b:
+                for i, a in enumerate(p):
+                    out[i+j] += a*b
+        return out
+    digits = (max(_digits(c) for c in p) + max(_digits(c) for c in q)
+              + len(str(len(q))) + 2)
+    return _unpack(_pack(p, digits)*_pack(q, digits), digits, len(p) + len(q) - 1)
+
+class _Poly(object):
+    """The polynomial sum(c[i] x^i) * 10^e, with integer c[i]."""
+    def __init__(self, c, e=0):
+        self.c = [decimal.Decimal(v) for v in c]
+        self.e = e
+
+    def __mul__(self, other):
+        return _Poly(_convolve(self.c, other.c), self.e + other.e)
+
+    def __add__(self, other):
+        e = min(self.e, other.e)
+        a = [_shift(c, self.e - e) for c in self.c]
+        b = [_shift(c, other.e - e) for c in other.c]
+        if len(a) < len(b):
+            a, b = b, a
+        return _Poly([u + v for u, v in zip(a, b + [0]*(len(a) - len(b)))], e)
+
+    def __neg__(self):
+        return _Poly([-c for c in self.c], self.e)
+
+    def __sub__(self, other):
+        return self + -other
+
+    def __pow__(self, power):
+        result = _Poly([1])
+        for i in range(power):
+            result = result*self
+        return result
+
+    def times_power_of_two(self, k):
+        """Multiplied by 2^k, which for negative k is 5^-k 10^k."""
+        if k >= 0:
+            return _Poly([c*2**k for c in self.c], self.e)
+        five = decimal.Decimal(5)**-k
+        return _Poly([c*five for c in self.c], self.e + k)
+
+    def rounded(self, digits):
+        """Rounded to the given number of significant digits of the
+        largest coefficient."""
+        drop = max(_digits(c) for c in self.c) - digits
+        if drop <= 0:
+            return self
+        return _Poly([c.scaleb(-drop).quantize(_one) for c in self.c], self.e + drop)
+
+x = _Poly([0, 1])
+one = _Poly([1])
+b = _Poly([0, 2, 0, -2]) # 2x - 2x^3
+
+def _product(polys, digits):
+    """The product of polys, multiplied pairwise so that the sizes of
+    the factors stay balanced."""
+    while len(polys) > 1:
+        pairs = [polys[i]*polys[i+1] for i in range(0, len(polys) - 1, 2)]
+        if len(polys) % 2:
+            pairs.append(polys[-1])
+        polys = [p.rounded(digits) for p in pairs]
+    return polys[0] if polys else one
+
+def _c2_sum(n, m, k, digits):
+    """sum over even j of binomial(m, j) (a^2 - b^2)^(j/2) a^(m-j), with
+    a = (1 + x^2)^2 - b cos(pi k/n), which is ((a+u)^m + (a-u)^m)/2
+    with u^2 = a^2 - b^2, so we find it with the recurrence
+    S_j = 2 a S_(j-1) - b^2 S_(j-2)."""
+    with mpmath.workdps(digits + 10):
+        cos = decimal.Decimal(mpmath.nstr(mpmath.nint(mpmath.cospi(mpmath.mpf(k)/n)
+                                                      * mpmath.mpf(10)**digits),
+                                          digits + 5, strip_zeros=False).split('.')[0])
+    unit = decimal.Decimal(10)**digits
+    a = _Poly([unit, -2*cos, 2*unit, 2*cos, unit], -digits)
+    twoa = a + a
+    b2 = b*b
+    previous, S = one, a
+    for j in range(2, m + 1):
+        previous, S = S, (twoa*S - b2*previous).rounded(digits)
+    return S if m > 0 else one
+
+def _partition_function(n, m, digits):
+    """Beale's partition function of the n x m lattice, in fixed point
+    with the given number of significant digits."""
+    bm = b**m
+    c2 = {}
+    s2 = {}
+    S = {}
+    for k in range(1, n):
+        if n - k < k:
+            # cos(pi k/n) = -cos(pi (n-k)/n), so this is S[n-k] of -x
+            S[k] = _Poly([(-c if i % 2 else c) for i, c in enumerate(S[n-k].c)], S[n-k].e)
+        else:
+            S[k] = _c2_sum(n, m, k, digits)
+        c2[k] = (S[k] + bm).times_power_of_two(1 - 2*m).rounded(digits)
+        s2[k] = (S[k] - bm).times_power_of_two(1 - 2*m).rounded(digits)
+    # Beale divides each of these by 2^(m/2), so each product of two
+    # of them by 2^m.
+    c0cn = (((one - x)**m + (x*(one + x))**m)*((one + x)**m + (x*(one - x))**m)).times_power_of_two(-m)
+    s0sn = (((one - x)**m - (x*(one + x))**m)*((one + x)**m - (x*(one - x))**m)).times_power_of_two(-m)
+    odd = range(1, n, 2)
+    even = range(2, n, 2)
+    z1 = _product([c2[k] for k in odd], digits)
+    z2 = _product([s2[k] for k in odd], digits)
+    z3 = _product([c0cn] + [c2[k] for k in even], digits)
+    z4 = _product([s0sn] + [s2[k] for k in even], digits)
+    return (z1 + z2 + z3 + z4).times_power_of_two(m*n//2 - 1)
+
+def density_of_states(n, m):
+    """The number of states of the n x m periodic Ising model with d
+    unsatisfied bonds, for d from 0 to 2nm, as exact integers (Decimals
+    with no fractional part)."""
+    if n % 2:
+        n, m = m, n
+    if n % 2:
+        raise ValueError('we only know Z for lattices with an even side, not %d x %d' % (n, m))
+    # enough digits to resolve the largest coefficient, 2^nm at most
+    digits = int(0.302*n*m) + 20 + 2*(n + m)
+    with decimal.localcontext(_exact):
+        while True:
+            Z = _partition_function(n, m, digits)
+            g = [c.scaleb(Z.e).quantize(_one) for c in Z.c]
+            g += [decimal.Decimal(0)]*(2*n*m + 1 - len(g))
+            error = max(abs(c - _shift(gi, -Z.e)) for c, gi in zip(Z.c, g)) if Z.e < 0 else 0
+            if (error < decimal.Decimal(10)**-Z.e/8 and min(g) >= 0
+                    and sum(g) == decimal.Decimal(2)**(n*m)):
+                return g
+            digits *= 2 # not precise enough, so try again
+
+def reference(n, m):
+    """The energies E and ln g(E) of the states the n x m periodic
+    Ising model can have, which we compute only once and save."""
+    fname = os.path.join(cachedir, 'ising-exact-%dx%d-lndos.dat' % (n, m))
+    if not os.path.exists(fname):
+        g = density_of_states(n, m)
+        d = np.array([i for i in range(len(g)) if g[i] > 0])
+        lndos = np.array([float(g[i].ln(decimal.Context(prec=20))) for i in d])
+        if not os.path.isdir(cachedir):
+            os.makedirs(cachedir)
+        np.savetxt(fname + '.tmp', np.c_[-2*n*m + 2*d, lndos], fmt=('%d', '%.16g'),
+                   delimiter='\t',
+                   header='exact density of states of the %d x %d periodic ising model\nenergy\tlndos' % (n, m))
+        os.rename(fname + '.tmp', fname)
+    data = np.loadtxt(fname, ndmin=2)
+    return data[:, 0], data[:, 1]
@@ -0,0 +1,116 @@
+#!/usr/bin/python2
+from __future__ import division
+import os
+import datcache
+
+# The comment header of our Monte Carlo output files, read once.  We
+# only read up to the first line of data, so even a huge
+# -transitions.dat file costs us just a few dozen lines, and we
+# remember what we found until the file is rewritten.  If datcache
+# already has the header we don't read the text at all.
+
+_memo = {} # maps path to ((path, mtime, size), Header)
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+def _find(comments, *keys):
+    # the value on the first line containing any of the keys
+    for line in comments:
+        for k in keys:
+            if k in line:
+                return line.split()[-1]
+    return None
+
+def _exact(comments, key):
+    # the value of the first "# key: value" line
+    for line in comments:
+        if ': ' in line and line.split(': ', 1)[0].strip() == key:
+            return line.split(': ', 1)[1].strip()
+    return None
+
+def _read_comments(fname):
+    comments = []
+    with open(fname) as f:
+        for line in f:
+            if line.startswith('#'):
+                comments.append(line[1:].rstrip('\n'))
+            elif line.strip():
+                break # the data has begun
+    return comments
+
+def _found(comments, convert, *keys):
+    value = _find(comments, *keys)
+    if value is None:
+        return None
+    return convert(value)
+
+def _field(convert, *keys):
+    """A Header property holding the converted value on the first
+    line containing any of the keys, or None.  Each field is parsed
+    only when asked for, so one malformed line breaks just its own
+    field rather than the whole header."""
+    return property(lambda self: _found(self.comments, convert, *keys))
+
+def _exact_field(convert, key):
+    """A Header property holding the converted value of the first
+    "# key: value" line, or None."""
+    def get(self):
+        value = _exact(self.comments, key)
+        return None if value is None else convert(value)
+    return property(get)
+
+def _dimensions(value):
+    return tuple(float(x) for x in value.strip('()').split(','))
+
+class Header(object):
+    """Everything we know from the comments at the top of a file."""
+    def __init__(self, comments):
+        self.comments = comments
+
+    @property
+    def min_T(self):
+        return max(0, _found(self.comments, float, 'min_T') or 0)
+
+    @property
+    def converged_T(self):
+        return _found(self.comments, float, 'converged temperature:') or 0
+
+    @property
+    def moves(self):
+        return max(0, _found(self.comments, float, 'total') or 0)
+
+    converged_state = _field(int, 'converged state:')
+    iterations = _field(int, 'iterations:')
+    de_g = _field(float, 'de_g')
+    min_important_energy = _field(float, 'min_important_energy')
+    max_entropy_state = _field(int, 'max_entropy_state')
+    too_low_energy = _field(float, 'too_low_energy', 'too_lo_energy')
+    too_high_energy = _field(float, 'too_high_energy', 'too_hi_energy')
+
+    wl_factor = _exact_field(_number, 'WL Factor')
+    N = _exact_field(int, 'N')
+    ff = _exact_field(float, 'ff')
+    dimensions = _exact_field(_dimensions, 'cell dimensions')
+
+    def __getitem__(self, key):
+        """The raw string value of a "# key: value" line."""
+        value = _exact(self.comments, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+def read(fname):
+    """Return the Header of fname."""
+    stamp = os.path.abspath(fname), os.path.getmtime(fname), os.path.getsize(fname)
+    if stamp[0] in _memo and _memo[stamp[0]][0] == stamp:
+        return _memo[stamp[0]][1]
+    comments = datcache.cached_comments(fname)
+    if comments is None:
+        comments = _read_comments(fname)
+    header = Header(comments)
+    _memo[stamp[0]] = (stamp, header)
+    return header
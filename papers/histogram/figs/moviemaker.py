@@ -0,0 +1,204 @@
+#!/usr/bin/python2
+from __future__ import division, print_function
+import os, re, io, json, subprocess, multiprocessing
+
+# Helpers for the animate-*.py scripts, which turn the frames our
+# Monte Carlo writes into a -movie/ directory (000012-lndos.dat,
+# 000012-transitions.dat, ...) into a movie.
+#
+# index() reads each frame once to find what the scripts need for
+# their axis limits, and remembers it in a NAME-movie-index.json file
+# next to the movie directory, so that making the movie again (or
+# after the simulation has written more frames) only reads the new
+# frames.
+#
+# render() draws the frames in a pool of processes.  Each worker
+# makes its figure once, and then for each frame the script's update
+# function just changes the data of its lines, which is much faster
+# than clearing and redrawing the axes.  The frames are saved as
+# frame%06d.png, and can also be piped straight into ffmpeg (or
+# avconv) to make the video.
+
+def summarize_curve(e, y):
+    """What the animate scripts want to know of a frame's curve y(e)
+    to choose their axis limits."""
+    summary = {'e_min': float(e.min()), 'e_max': float(e.max()),
+               'y_min': float(y.min()), 'y_max': float(y.max()),
+               # the extremes of where the curve differs from its ends
+               'e_not_last_min': None, 'e_not_first_max': None,
+               # the extremes of where the curve equals its ends
+               'e_last_max': float(e[y == y[-1]].max()),
+               'e_first_min': float(e[y == y[0]].min())}
+    if len(e[y != y[-1]]) > 1:
+        summary['e_not_last_min'] = float(e[y != y[-1]].min())
+    if len(e[y != y[0]]):
+        summary['e_not_first_max'] = float(e[y != y[0]].max())
+    return summary
+
+def index(moviedir, kind, read, first=0, summarize=summarize_curve):
+    """The summary of each frame of moviedir, starting with frame
+    first and ending before the first one missing a %06d-KIND.dat
+    file.  read(basename) gives the (e, y) of a frame."""
+    moviedir = moviedir.rstrip('/')
+    cachefile = moviedir + '-index.json'
+    try:
+        with open(cachefile) as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        cache = {}
+    entries = cache.setdefault(kind, {})
+    summaries = []
+    changed = False
+    frame = first
+    while True:
+        basename = '%s/%06d' % (moviedir, frame)
+        try:
+            st = os.stat(basename + '-%s.dat' % kind)
+        except OSError:
+            break
+        stamp = [st.st_mtime, st.st_size]
+        key = '%06d' % frame
+        if key not in entries or entries[key]['stamp'] != stamp:
+            try:
+                e, y = read(basename)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                break # e.g. a frame that is being written right now
+            entries[key] = {'stamp': stamp, 'summary': summarize(e, y)}
+            changed = True
+        summaries.append(entries[key]['summary'])
+        frame += 1
+    if changed:
+        try:
+            with open(cachefile + '.tmp', 'w') as f:
+                json.dump(cache, f)
+            os.rename(cachefile + '.tmp', cachefile)
+        except (IOError, OSError):
+            pass # we can live without the index
+    return summaries
+
+def choose_frames(first, last, maxframes=200, skipby=None, all_frames=False):
+    """The frames from first to last that we show, which are every
+    skipby-th one, with skipby chosen so we show at most maxframes
+    unless we want all of them."""
+    if skipby is None:
+        skipby = 1
+        numframes = last + 1
+        if numframes > maxframes and not all_frames:
+            skipby = numframes // maxframes
+    if skipby > 1:
+        print('only showing 1/%d of the frames' % skipby)
+    return [frame for frame in range(first, last+1) if frame % skipby == 0]
+
+def options(argv):
+    """Take the --all-frames, --skip=N, --only-new, --jobs=J and --video
+    flags out of argv, for scripts that read sys.argv by hand."""
+    opts = {'all_frames': False, 'skip': None, 'only_new': False,
+            'jobs': None, 'video': False}
+    for arg in list(argv):
+        if arg in ['--all-frames', '--only-new', '--video']:
+            opts[arg[2:].replace('-', '_')] = True
+        elif arg.startswith('--skip=') or arg.startswith('--jobs='):
+            opts[arg[2:6]] = int(arg[7:])
+        else:
+            continue
+        argv.remove(arg)
+    return opts
+
+_job = {} # what each worker of render() draws
+
+def _render(item):
+    number, frame = item
+    if 'fig' not in _job:
+        _job['fig'], _job['state'] = _job['setup']()
+    _job['update'](_job['state'], frame)
+    png = None
+    if _job['moviedir'] is not None:
+        _job['fig'].savefig('%s/frame%06d.png' % (_job['moviedir'], number))
+    if _job['video'] is not None:
+        f = io.BytesIO()
+        _job['fig'].savefig(f, format='png')
+        png = f.getvalue()
+    return number, png
+
+def _video_pipe(video, fps):
+    for program in ['ffmpeg', 'avconv']:
+        try:
+            return subprocess.Popen([program, '-y', '-loglevel', 'error',
+                                     '-f', 'image2pipe', '-vcodec', 'png', '-r', '%g' % fps,
+                                     '-i', '-', '-b:v', '1000k', video],
+                                    stdin=subprocess.PIPE)
+        except OSError:
+            pass
+    raise OSError('we need ffmpeg or avconv to write %s' % video)
+
+def render(frames, setup, update, moviedir=None, video=None, fps=20,
+           processes=None, only_new=False, limits=None):
+    """Draw each of the frames, saving them as moviedir/frame%06d.png
+    (numbered from zero) and/or piping them into the video file.
+    setup() makes a figure and returns it along with whatever update
+    needs, and update(state, frame) draws one frame into it.  With
+    only_new we leave alone frames we drew before, unless the limits
+    (whatever the script passes, e.g. its axis limits) have changed."""
+    items = list(enumerate(frames))
+    done = {}
+    if moviedir is not None:
+        if not os.path.isdir(moviedir):
+            os.makedirs(moviedir)
+        statefile = moviedir + '/frames.json'
+        if only_new:
+            try:
+                with open(statefile) as f:
+                    state = json.load(f)
+                if state['limits'] == json.loads(json.dumps(limits)):
+                    done = dict((int(k), v) for k, v in state['frames'].items())
+            except (IOError, OSError, ValueError, KeyError):
+                pass
+    def drawn(item):
+        number, frame = item
+        return (done.get(number) == frame and
+                os.path.exists('%s/frame%06d.png' % (moviedir, number)))
+    todo = [item for item in items if not drawn(item)]
+    todo_numbers = set(number for number, _ in todo)
+    if len(todo) < len(items):
+        print('%d of %d frames are already drawn' % (len(items) - len(todo), len(items)))
+
+    _job.clear()
+    _job.update(setup=setup, update=update, moviedir=moviedir, video=video)
+    pipe = None
+    if video is not None:
+        pipe = _video_pipe(video, fps)
+    if processes == 1 or len(todo) < 2:
+        pool = None
+        results = map(_render, todo)
+    else:
+        # the workers inherit _job when they fork
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap(_render, todo, chunksize=max(1, len(todo)//(16*multiprocessing.cpu_count())))
+    try:
+        results = iter(results)
+        for number, frame in items:
+            if number not in todo_numbers:
+                png = None
+                if pipe is not None:
+                    with open('%s/frame%06d.png' % (moviedir, number), 'rb') as f:
+                        png = f.read()
+            else:
+                number, png = next(results)
+                done[number] = frame
+            if number % 25 == 0:
+                print('drew frame %d/%d' % (number, len(items)))
+            if pipe is not None:
+                pipe.stdin.write(png)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if pipe is not None:
+            pipe.stdin.close()
+            pipe.wait()
+        _job.clear()
+    if moviedir is not None:
+        with open(statefile, 'w') as f:
+            json.dump({'limits': limits, 'frames': done}, f)
@@ -6,7 +6,7 @@ import numpy as np
 import readnew
 from glob import glob
 
-import yaml
+import yamlcache
 import os.path
 
 # Example: /home/jordan/sad-monte-carlo/
@@ -30,8 +30,7 @@ for f in filename:
             print(('trying filename ', name))
             # Read YAML file
             if os.path.isfile(filename_location + name):
-                with open(filename_location + name, 'r') as stream:
-                    data = yaml.load(stream)
+                data = yamlcache.load(filename_location + name)
             else:
                 raise ValueError("%s isn't a file or is being written to!" % (filename_location + name))
 
@@ -8,6 +8,7 @@ matplotlib.rc('font', **{'family': 'serif', 'serif': ['Computer Modern']})
 matplotlib.rc('text', usetex=True)
 
 import styles
+import thermodynamics
 
 if len(sys.argv) != 7:
     print('useage: %s ww ff N min_T methods seed' % sys.argv[0])
@@ -33,10 +34,7 @@ seed = int(sys.argv[6])
 
 # input: ["data/s%03d/periodic-ww%04.2f-ff%04.2f-N%i-%s-conv_T%g-%s.dat" % (seed, ww, ff, N, method, min_T, data) for method in methods for data in ["E","lnw"]]
 
-max_T = 2
-T_bins = 1e3
-dT = max_T/T_bins
-T_range = numpy.arange(dT, max_T, dT)
+T_range = thermodynamics.T_range(max_T=2, T_bins=1e3)
 
 # make dictionaries which we can index by method name
 U = {} # internal energy
@@ -63,24 +61,7 @@ for method in methods:
     plt.figure('dos')
     plt.plot(energy, log10_dos, styles.dots(method), label=styles.title(method))
 
-    Z = numpy.zeros(len(T_range)) # partition function
-    U[method] = numpy.zeros(len(T_range)) # internal energy
-    CV[method] = numpy.zeros(len(T_range)) # heat capacity
-    S[method] = numpy.zeros(len(T_range)) # entropy
-
-    Z_inf = sum(numpy.exp(ln_dos - ln_dos.max()))
-    S_inf = sum(-numpy.exp(ln_dos - ln_dos.max())*(-ln_dos.max() - numpy.log(Z_inf))) / Z_inf
-
-    for i in range(len(T_range)):
-        ln_dos_boltz = ln_dos - energy/T_range[i]
-        dos_boltz = numpy.exp(ln_dos_boltz - ln_dos_boltz.max())
-        Z[i] = sum(dos_boltz)
-        U[method][i] = sum(energy*dos_boltz)/Z[i]
-        S[method][i] = sum(-dos_boltz*(-energy/T_range[i] - ln_dos_boltz.max() \
-                                       - numpy.log(Z[i])))/Z[i]
-        S[method][i] -= S_inf
-        CV[method][i] = sum((energy/T_range[i])**2*dos_boltz)/Z[i] - \
-                         (sum(energy/T_range[i]*dos_boltz)/Z[i])**2
+    U[method], CV[method], S[method] = thermodynamics.U_CV_S(energy, ln_dos, T_range)
 
     plt.figure('u')
     plt.plot(T_range, U[method]/N, styles.plot(method), label=styles.title(method))
@@ -58,25 +58,26 @@ for i in range(len(methods)):
         minT = readnew.minT(fname)
         convergedT = readnew.convergedT(fname)
 
-        for T in Ts:
-            if T >= minT and T >= convergedT*1.0:
-                density, x = readnew.density_x(fbase, T)
-                plt.plot(x/2, density, color(T)+lines[i])
-                if first_method or method == the_first_method:
-                    if first_temperature[i]:
-                        plt.plot(x/2, density, color(T)+lines[i],
-                                 label='T=%g %s (converged to %.2g)' % (T, method[1:], convergedT))
-                        first_temperature[i] = False
-                    else:
-                        plt.plot(x/2, density, color(T)+lines[i], label='T=%g' % T)
-                    the_first_method = method
-                    first_method = False
-                elif first_temperature[i]:
+        # reweight the density to all of our temperatures at once
+        good_Ts = [T for T in Ts if T >= minT and T >= convergedT*1.0]
+        densities, x = readnew.density_x_Ts(fbase, good_Ts)
+        for T, density in zip(good_Ts, densities):
+            plt.plot(x/2, density, color(T)+lines[i])
+            if first_method or method == the_first_method:
+                if first_temperature[i]:
                     plt.plot(x/2, density, color(T)+lines[i],
                              label='T=%g %s (converged to %.2g)' % (T, method[1:], convergedT))
                     first_temperature[i] = False
                 else:
-                    plt.plot(x/2, density, color(T)+lines[i])
+                    plt.plot(x/2, density, color(T)+lines[i], label='T=%g' % T)
+                the_first_method = method
+                first_method = False
+            elif first_temperature[i]:
+                plt.plot(x/2, density, color(T)+lines[i],
+                         label='T=%g %s (converged to %.2g)' % (T, method[1:], convergedT))
+                first_temperature[i] = False
+            else:
+                plt.plot(x/2, density, color(T)+lines[i])
     except:
         pass
 
@@ -1,16 +1,20 @@
 #!/usr/bin/python2
 
 import numpy
+import thermodynamics
+import datcache
+import mcheader
+import transitions
 
 def e_hist(fbase):
     try:
-        trans = numpy.loadtxt(fbase +"-transitions.dat", dtype=numpy.float)
+        trans = datcache.loadtxt(fbase +"-transitions.dat")
         energy = -trans[:, 0]
         trans = trans[:, 1:]
         hist = numpy.sum(trans, axis=1)
     except:
         # energy histogram file; indexed by [-energy,counts]
-        e_hist = numpy.loadtxt(fbase+"-E.dat", ndmin=2, dtype=numpy.float)
+        e_hist = datcache.loadtxt(fbase+"-E.dat")
         energy = -e_hist[:, 0] # array of energies
         hist = e_hist[:, 1]
     return energy, hist
@@ -18,7 +22,7 @@ def e_hist(fbase):
 def e_lndos(f):
     if '.dat' not in f:
         f = f+"-lndos.dat"
-    e_lndos = numpy.loadtxt(f, ndmin=2, dtype=numpy.float)
+    e_lndos = datcache.loadtxt(f)
     energy = -e_lndos[:, 0] # array of energies
     lndos = e_lndos[:, 1]
     return energy, lndos
@@ -26,7 +30,7 @@ def e_lndos(f):
 def e_lndos_ps(fbase):
     if '.dat' not in fbase:
         fbase = fbase + "-lndos.dat"
-    e_lndos_ps = numpy.loadtxt(fbase, ndmin=2, dtype=numpy.float)
+    e_lndos_ps = datcache.loadtxt(fbase)
     energy = -e_lndos_ps[:, 0]
     lndos = e_lndos_ps[:, 1]
     ps = e_lndos_ps[:, 2] # pessimistic samples
@@ -36,7 +40,7 @@ def e_lndos_ps(fbase):
 def e_lndos_ps_lndostm(fbase):
     if '.dat' not in fbase:
         fbase = fbase + "-lndos.dat"
-    e_lndos_ps = numpy.loadtxt(fbase, ndmin=2, dtype=numpy.float)
+    e_lndos_ps = datcache.loadtxt(fbase)
     energy = -e_lndos_ps[:, 0]
     lndos = e_lndos_ps[:, 1]
     ps = e_lndos_ps[:, 2] # pessimistic samples
@@ -47,17 +51,14 @@ def e_lndos_ps_lndostm(fbase):
     return energy, lndos, ps, lndostm
 
 def e_lnw(fbase):
-    e_lnw = numpy.loadtxt(fbase+"-lnw.dat", ndmin=2, dtype=numpy.float)
+    e_lnw = datcache.loadtxt(fbase+"-lnw.dat")
 
     energy = -e_lnw[:, 0] # array of energies
     lnw = e_lnw[:, 1]
     return energy, lnw
 
 def T_u_cv_s_minT(fbase):
-    max_T = 20.0
-    T_bins = 1e3
-    dT = max_T/T_bins
-    T_range = numpy.arange(dT, max_T, dT)
+    T_range = thermodynamics.T_range(max_T=20.0, T_bins=1e3)
     
     # Now compute (or just read in) the lndos and the energies
     try:
@@ -66,61 +67,26 @@ def T_u_cv_s_minT(fbase):
     except:
         min_T = minT(fbase)
         # energy histogram file; indexed by [-energy,counts]
-        e_hist = numpy.loadtxt(fbase+"-E.dat", ndmin=2)
+        e_hist = datcache.loadtxt(fbase+"-E.dat")
         # weight file; indexed by [-energy,ln(weight)]
-        lnw_hist = numpy.loadtxt(fbase+"-lnw.dat", ndmin=2)
+        lnw_hist = datcache.loadtxt(fbase+"-lnw.dat")
 
         energy = -e_hist[:, 0] # array of energies
         lnw = lnw_hist[e_hist[:, 0].astype(int), 1] # look up the lnw for each actual energy
         ln_dos = numpy.log(e_hist[:, 1]) - lnw
 
-    Z = numpy.zeros(len(T_range)) # partition function
-    U = numpy.zeros(len(T_range)) # internal energy
-    CV = numpy.zeros(len(T_range)) # heat capacity
-    S = numpy.zeros(len(T_range)) # entropy
-
-    Z_inf = sum(numpy.exp(ln_dos - ln_dos.max()))
-    S_inf = sum(-numpy.exp(ln_dos - ln_dos.max())*(-ln_dos.max() - numpy.log(Z_inf))) / Z_inf
-
-    for i in range(len(T_range)):
-        ln_dos_boltz = ln_dos - energy/T_range[i]
-        dos_boltz = numpy.exp(ln_dos_boltz - ln_dos_boltz.max())
-        Z[i] = sum(dos_boltz)
-        U[i] = sum(energy*dos_boltz)/Z[i]
-        # S = \sum_i^{microstates} P_i \log P_i
-        # S = \sum_E D(E) e^{-\beta E} \log\left(\frac{e^{-\beta E}}{\sum_{E'} D(E') e^{-\beta E'}}\right)
-        S[i] = sum(-dos_boltz*(-energy/T_range[i] - ln_dos_boltz.max() \
-                                       - numpy.log(Z[i])))/Z[i]
-        # Actually compute S(T) - S(T=\infty) to deal with the fact
-        # that we don't know the actual number of eigenstates:
-        S[i] -= S_inf
-        CV[i] = sum((energy/T_range[i])**2*dos_boltz)/Z[i] - \
-                         (sum(energy/T_range[i]*dos_boltz)/Z[i])**2
+    # S is actually S(T) - S(T=\infty) to deal with the fact that we
+    # don't know the actual number of eigenstates.
+    U, CV, S = thermodynamics.U_CV_S(energy, ln_dos, T_range)
     return T_range, U, CV, S, min_T
 
 def minT(f):
     if '.dat' not in f:
         f = f+"-E.dat"
-    min_T = 0
-    with open(f) as file:
-        for line in file:
-            if("min_T" in line):
-                this_min_T = float(line.split()[-1])
-                if this_min_T > min_T:
-                    min_T = this_min_T
-                break
-    return min_T
+    return mcheader.read(f).min_T
 
 def moves(fbase):
-    moves = 0
-    with open(fbase) as file:
-        for line in file:
-            if("total" in line):
-                this_moves = float(line.split()[-1])
-                if this_moves > moves:
-                    moves = this_moves
-                break
-    return moves
+    return mcheader.read(fbase).moves
 
 def minT_from_transitions(fbase):
     return minT(fbase+"-transitions.dat")
@@ -128,225 +94,168 @@ def minT_from_transitions(fbase):
 def convergedT(f):
     if not '.dat' in f:
         f = f+"-E.dat"
-    with open(f) as file:
-        for line in file:
-            if "converged temperature:" in line:
-                return float(line.split()[-1])
-    return 0
+    return mcheader.read(f).converged_T
 
 def converged_state(f):
     if not '.dat' in f:
         f = f+"-E.dat"
-    with open(f) as file:
-        for line in file:
-            if "converged state:" in line:
-                return int(line.split()[-1])
-    print(('ERROR FINDING converged_state in', f))
+    state = mcheader.read(f).converged_state
+    if state is None:
+        print(('ERROR FINDING converged_state in', f))
+    return state
 
 def iterations(f):
     if '.dat' not in f:
         f = f+"-E.dat"
-    with open(f) as file:
-        for line in file:
-            if "iterations:" in line:
-                return int(line.split()[-1])
+    return mcheader.read(f).iterations
 
 def wl_factor(f):
     if '.dat' not in f:
         f = f+"-lndos.dat"
-    with open(f) as file:
-        for line in file:
-            if "# WL Factor: " in line:
-                return eval(line.split(': ')[-1])
+    return mcheader.read(f).wl_factor
 
 def dr_g(fbase):
-    with open(fbase+"-E.dat") as file:
-        for line in file:
-            if "de_g" in line:
-                return float(line.split()[-1])
+    return mcheader.read(fbase+"-E.dat").de_g
 
 def dimensions(f):
     if '.dat' not in f:
         f = f+"-E.dat"
-    with open(f) as file:
-        for line in file:
-            if "# cell dimensions: " in line:
-                return eval(line.split(': ')[-1])
+    return mcheader.read(f).dimensions
 
 def read_N(f):
     if not '.dat' in f:
         f = f+"-transitions.dat"
-    with open(f) as file:
-        for line in file:
-            if "N" in line:
-                return int(line.split(': ')[-1])
+    return mcheader.read(f).N
 
 def read_ff(fbase):
-    with open(fbase+"-E.dat") as file:
-        for line in file:
-            if "ff" in line:
-                return float(line.split(': ')[-1])
+    return mcheader.read(fbase+"-E.dat").ff
 
 def min_important_energy(f):
     if not '.dat' in f:
         f = f+"-transitions.dat"
-    with open(f) as file:
-        for line in file:
-            if("min_important_energy" in line):
-                return float(line.split()[-1])
+    return mcheader.read(f).min_important_energy
 
 def too_low_high_energy(f):
     if not '.dat' in f:
         f = f+"-transitions.dat"
-    too_low = None
-    too_high = None
-    with open(f) as file:
-        for line in file:
-            if("too_low_energy" in line or "too_lo_energy" in line):
-                too_low = float(line.split()[-1])
-                if too_high is not None:
-                  return too_low, too_high
-            if("too_high_energy" in line or "too_hi_energy" in line):
-                too_high = float(line.split()[-1])
-                if too_low is not None:
-                  return too_low, too_high
-    return too_low, too_high
+    header = mcheader.read(f)
+    return header.too_low_energy, header.too_high_energy
 
 def max_entropy_state(f):
     if not '.dat' in f:
         f = f+"-transitions.dat"
-    with open(f) as file:
-        for line in file:
-            if("max_entropy_state" in line):
-                return int(line.split()[-1])
-
-def g_r(fbase, T):
-    data = numpy.loadtxt(fbase+"-g.dat", ndmin=2)
-    ghist = data[1:, 3:]
-    dr = dr_g(fbase)
-    r_1d = data[0, 3:]
-    E_1d = data[1:, 0]
-    hist_1d = data[1:, 1]
-    lnw_1d = data[1:, 2]
-    n_E = len(E_1d)
-    n_r = len(r_1d)
-    r, E = numpy.meshgrid(r_1d, E_1d)
-    r, lnw = numpy.meshgrid(r_1d, lnw_1d)
-    r, hist = numpy.meshgrid(r_1d, hist_1d)
-
-    ln_dos = numpy.log(hist) - lnw
-
-
-    ln_dos_boltz = ln_dos - E/T
-    dos_boltz = numpy.exp(ln_dos_boltz - ln_dos_boltz.max())
-    dos_boltz[hist == 0] = 0
-
-    # now let's normalize the density of states
-    for i in range(n_r):
-        dos_boltz[:, i] /= sum(dos_boltz[:, i])
-
-    dr = r[0, 1] - r[0, 0]
-    dV = (4/3)*numpy.pi*((r+dr/2)**3 - (r-dr/2)**3)
+    return mcheader.read(f).max_entropy_state
+
+def _row_chunks(n_rows, n_cols, max_bytes=64*1024*1024):
+    # slices of rows of a float array, each at most max_bytes big, so
+    # we never copy the whole of a huge (memory-mapped) histogram
+    step = max(1, max_bytes//(8*max(n_cols, 1)))
+    return [slice(i, min(i+step, n_rows)) for i in range(0, n_rows, step)]
+
+def _boltzmann_weights(ln_dos, E, Ts, valid):
+    # the normalized probability of each (valid) energy at each T,
+    # indexed [T, E]
+    Ts = numpy.atleast_1d(numpy.asarray(Ts, dtype=float))
+    ln_dos_boltz = ln_dos[numpy.newaxis, :] - E[numpy.newaxis, :]/Ts[:, numpy.newaxis]
+    ln_dos_boltz[:, ~valid] = -numpy.inf
+    w = numpy.exp(ln_dos_boltz - ln_dos_boltz.max(axis=1)[:, numpy.newaxis])
+    return w/w.sum(axis=1)[:, numpy.newaxis]
+
+def g_r_Ts(fbase, Ts):
+    """g(r) at each of the temperatures Ts, indexed [T, r], along with
+    r.  We find the g(r) of each energy once, and reweight them to
+    every temperature with a single matrix product."""
+    data = datcache.loadtxt(fbase+"-g.dat")
+    r = numpy.array(data[0, 3:])
+    E = numpy.array(data[1:, 0])
+    hist = numpy.array(data[1:, 1])
+    lnw = numpy.array(data[1:, 2])
+    valid = hist != 0
+
+    with numpy.errstate(divide='ignore'):
+        ln_dos = numpy.log(hist) - lnw
+    weights = _boltzmann_weights(ln_dos, E, Ts, valid)
+
+    dr = r[1] - r[0]
+    dV = (4.0/3)*numpy.pi*((r+dr/2)**3 - (r-dr/2)**3)
     ff = read_ff(fbase)
-    n = ff/(4/3*numpy.pi)
+    n = ff/(4.0/3*numpy.pi)
     N = read_N(fbase)
-    g_of_E = ghist/dV/hist/n/N
-
-    g = numpy.zeros(n_r)
 
-    counts = 0
-    for i in range(n_E):
-        if hist[i, 0]:
-            g += dos_boltz[i,:]*g_of_E[i,:]
-            counts += dos_boltz[i, 0]*hist[i, 0]
-            # if dos_boltz[i,0] > 0.0001:
-            #     print 'hist %d at energy %d with weight %g' % (hist[i,0], E[i,0], dos_boltz[i,0])
-
-    # print 'with N %d we have counts %g' % (N, counts)
-    return g, r[0,:]
+    # sum over energies a block of rows at a time: g_of_E is
+    # ghist/dV/hist/n/N
+    g = numpy.zeros((len(weights), len(r)))
+    for rows in _row_chunks(len(E), len(r)):
+        keep = valid[rows]
+        ghist = numpy.asarray(data[1:, 3:][rows][keep])
+        g += numpy.dot(weights[:, rows][:, keep], ghist/hist[rows][keep, numpy.newaxis])
+    return g/(dV*n*N), r
 
+def g_r(fbase, T):
+    g, r = g_r_Ts(fbase, [T])
+    return g[0], r
 
-def density_x(fdensity, T):
+def density_x_Ts(fdensity, Ts):
+    """The density at each of the temperatures Ts, indexed [T, x],
+    along with x.  Like g_r_Ts, this reads the file once for all the
+    temperatures."""
     if '.dat' not in fdensity:
         fdensity = fdensity+"-density.dat"
-    #fdensity = fbase+"-density.dat"
-    data = numpy.loadtxt(fdensity)
-    denshist = data[1:, 2:]
-    x_1d = data[0, 2:]
-    dx = x_1d[1] - x_1d[0]
-    E_1d = data[1:, 0]
-    ln_dos_1d = data[1:, 1]
-    hist_1d = numpy.zeros_like(ln_dos_1d)
-    n_E = len(E_1d)
-    n_x = len(x_1d)
+    data = datcache.loadtxt(fdensity)
+    x = numpy.array(data[0, 2:])
+    dx = x[1] - x[0]
+    E = numpy.array(data[1:, 0])
+    ln_dos = numpy.array(data[1:, 1])
     N = read_N(fdensity)
-    for i in range(n_E):
-        hist_1d[i] = sum(denshist[i,:])/N
-    x, E = numpy.meshgrid(x_1d, E_1d)
-    x, ln_dos = numpy.meshgrid(x_1d, ln_dos_1d)
-    x, hist = numpy.meshgrid(x_1d, hist_1d)
-
-    ln_dos_boltz_1d = ln_dos_1d - E_1d/T
-    dos_boltz_1d = numpy.exp(ln_dos_boltz_1d - ln_dos_boltz_1d.max())
-    dos_boltz_1d[hist_1d == 0] = 0
 
-    # now let's normalize the density of states
-    dos_boltz_1d /= sum(dos_boltz_1d)
+    hist = numpy.zeros_like(ln_dos)
+    for rows in _row_chunks(len(E), len(x)):
+        hist[rows] = numpy.asarray(data[1:, 2:][rows]).sum(axis=1)/N
+    valid = hist != 0
+    weights = _boltzmann_weights(ln_dos, E, Ts, valid)
 
     # note:  what w
     lenx, leny, lenz = dimensions(fdensity)
-    density_of_E = denshist/(dx*leny*lenz*hist)*(4*numpy.pi/3)
 
-    density = numpy.zeros(n_x)
+    # density_of_E is denshist/(dx*leny*lenz*hist)*(4*pi/3)
+    density = numpy.zeros((len(weights), len(x)))
+    for rows in _row_chunks(len(E), len(x)):
+        keep = valid[rows]
+        denshist = numpy.asarray(data[1:, 2:][rows][keep])
+        density += numpy.dot(weights[:, rows][:, keep], denshist/hist[rows][keep, numpy.newaxis])
+    return density*(4*numpy.pi/3)/(dx*leny*lenz), x
 
-    counts = 0
-    for i in range(n_E):
-        if hist_1d[i]:
-            density += dos_boltz_1d[i]*density_of_E[i,:]
-            counts += dos_boltz_1d[i]*hist_1d[i]
-            # if dos_boltz_1d[i] > 0.0001:
-            #     print 'hist %d at energy %d with weight %g' % (hist_1d[i], E_1d[i], dos_boltz_1d[i])
-
-    # print 'we have counts %g with element dimensions %gx%gx%g' % (counts, dx, leny, lenz)
-    # print 'sum', sum(hist_1d), sum(sum(denshist))
-    return density, x_1d
+def density_x(fdensity, T):
+    density, x = density_x_Ts(fdensity, [T])
+    return density[0], x
 
 def e_de_transitions(basename):
-    trans = numpy.loadtxt(basename+"-transitions.dat", dtype=numpy.float)
-    with open(basename+"-transitions.dat") as f:
-        for line in f:
-            if '# energy\t' in line:
-                de = numpy.array([ -float(val) for val in line.split()[2:] ])
-                break
-    N = read_N(basename)
-    e = -trans[:, 0]/N
-    de /= -N
-    trans = trans[:, 1:]
-    for i in range(len(e)):
-        trans[i,:] /= sum(trans[i,:])
+    t = transitions.load(basename)
+    N = t.N
+    e = -t.energy/N
+    de = t.de/N
+    trans = t.counts.toarray()
+    trans = trans/trans.sum(axis=1)[:, numpy.newaxis]
     e, de = numpy.meshgrid(e, de)
     return e, de, trans
 
 def total_init_iterations(basename):
-    trans = numpy.loadtxt(basename+"-transitions.dat", dtype=numpy.float)
-    trans = trans[:, 1:]
-    return numpy.sum(trans)/read_N(basename)
+    t = transitions.load(basename)
+    return t.total()/t.N
 
 def e_and_total_init_histogram(basename):
-    trans = numpy.loadtxt(basename+"-transitions.dat", dtype=numpy.float)
-    N = read_N(basename)
-    e = -trans[:, 0]
-    trans = trans[:, 1:]
-    return e, numpy.sum(trans, axis=1)
+    t = transitions.load(basename)
+    return -t.energy, t.histogram()
 
 def e_diffusion_estimate(basename):
-    e, de, trans = e_de_transitions(basename)
-    e = e[0,:]
-    de = de[:, 0]
-    diffusion = numpy.zeros_like(e)
-    for i in range(len(e)):
-        meane = sum(de*trans[i,:])/len(de)
-        meane2 = sum(de**2*trans[i,:])/len(de)
-        norm = sum(trans[i,:])
-        diffusion[i] = numpy.sqrt(meane2 - meane**2)
+    t = transitions.load(basename)
+    e = -t.energy/t.N
+    de = t.de/t.N
+    # the sums of de and de**2 over each row of the normalized
+    # counts, each divided by the number of de as we always have
+    p = t.normalized()
+    meane = p.dot(de)/len(de)
+    meane2 = p.dot(de**2)/len(de)
+    diffusion = numpy.sqrt(meane2 - meane**2)
+    diffusion[t.histogram() == 0] = numpy.nan
     return e, diffusion
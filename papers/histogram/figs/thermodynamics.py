@@ -0,0 +1,63 @@
+#!/usr/bin/python2
+from __future__ import division
+import numpy
+
+# Canonical thermodynamics from a density of states.  Given the
+# energies and ln_dos of a simulation, we compute ln Z, U, CV and S at
+# every temperature at once by broadcasting over an (E x T) array and
+# doing a log-sum-exp along the energy axis.  For very long
+# temperature grids we can work through T in chunks, so that we never
+# hold more than len(energy)*chunk_size numbers at once.
+
+def T_range(max_T=20.0, T_bins=1e3):
+    dT = max_T/T_bins
+    return numpy.arange(dT, max_T, dT)
+
+def _chunk(energy, ln_dos, T):
+    E = energy[:, numpy.newaxis]
+    ln_dos_boltz = ln_dos[:, numpy.newaxis] - E/T[numpy.newaxis, :]
+    ln_dos_boltz_max = ln_dos_boltz.max(axis=0)
+    dos_boltz = numpy.exp(ln_dos_boltz - ln_dos_boltz_max)
+    Z = dos_boltz.sum(axis=0)
+    lnZ = numpy.log(Z) + ln_dos_boltz_max
+    U = (E*dos_boltz).sum(axis=0)/Z
+    # Computing the variance about U rather than <E^2> - <E>^2 avoids
+    # catastrophic cancellation at low temperatures.
+    CV = ((E - U)**2*dos_boltz).sum(axis=0)/Z/T**2
+    # S = \sum_i^{microstates} P_i \log P_i = U/T + \ln Z
+    S = U/T + lnZ
+    return lnZ, U, CV, S
+
+def lnZ_U_CV_S(energy, ln_dos, T, chunk_size=None):
+    """Return ln Z, U, CV and S for every temperature in T.
+
+    S is actually S(T) - S(T=\infty), since we don't know the actual
+    number of eigenstates.  If chunk_size is given, we only work on
+    that many temperatures at a time to bound our memory use.
+    """
+    energy = numpy.asarray(energy, dtype=float)
+    ln_dos = numpy.asarray(ln_dos, dtype=float)
+    T = numpy.atleast_1d(numpy.asarray(T, dtype=float))
+    # states with zero density of states (e.g. empty histogram bins)
+    # contribute nothing, and would otherwise produce nans.
+    ok = numpy.isfinite(ln_dos)
+    energy = energy[ok]
+    ln_dos = ln_dos[ok]
+
+    if chunk_size is None or chunk_size >= len(T):
+        lnZ, U, CV, S = _chunk(energy, ln_dos, T)
+    else:
+        lnZ = numpy.zeros(len(T))
+        U = numpy.zeros(len(T))
+        CV = numpy.zeros(len(T))
+        S = numpy.zeros(len(T))
+        for start in range(0, len(T), chunk_size):
+            here = slice(start, start + chunk_size)
+            lnZ[here], U[here], CV[here], S[here] = _chunk(energy, ln_dos, T[here])
+
+    S_inf = ln_dos.max() + numpy.log(numpy.exp(ln_dos - ln_dos.max()).sum())
+    return lnZ, U, CV, S - S_inf
+
+def U_CV_S(energy, ln_dos, T, chunk_size=None):
+    lnZ, U, CV, S = lnZ_U_CV_S(energy, ln_dos, T, chunk_size)
+    return U, CV, S
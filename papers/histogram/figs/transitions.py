@@ -0,0 +1,209 @@
+#!/usr/bin/python2
+from __future__ import division
+import os, json
+import numpy
+import scipy.sparse, scipy.sparse.linalg
+import mcheader
+
+# The -transitions.dat files of our Monte Carlo count, for each
+# energy, how many moves were proposed to each change in energy de.
+# Almost all of the (energy x de) entries are zero at large N, so
+# rather than loading the dense table (as datcache would) we parse the
+# text one line at a time into a sparse matrix, and save its CSR form
+# as a .npz sidecar next to the text file.  Like the datcache
+# sidecars, it records the mtime and size of the text it came from, so
+# a rewritten file is parsed again.
+
+_memo = {} # maps path to ((path, mtime, size), Transitions)
+
+def _stamp(fname):
+    st = os.stat(fname)
+    return os.path.abspath(fname), st.st_mtime, st.st_size
+
+def _parse(fname):
+    comments = []
+    energy = []
+    rows = []
+    cols = []
+    counts = []
+    with open(fname) as f:
+        for line in f:
+            if line.startswith('#'):
+                comments.append(line[1:].rstrip('\n'))
+                continue
+            if not line.strip():
+                continue
+            row = numpy.array(line.split(), dtype=float)
+            nonzero = numpy.flatnonzero(row[1:])
+            rows.append(numpy.full(len(nonzero), len(energy)))
+            cols.append(nonzero)
+            counts.append(row[1:][nonzero])
+            energy.append(row[0])
+    de = None
+    for line in comments:
+        if line.startswith(' energy\t'):
+            de = numpy.array([float(val) for val in line.split()[1:]])
+            break
+    if de is None:
+        raise ValueError('no "energy\tde" line in %s' % fname)
+    matrix = scipy.sparse.csr_matrix(
+        (numpy.concatenate(counts or [[]]),
+         (numpy.concatenate(rows or [[]]).astype(int), numpy.concatenate(cols or [[]]).astype(int))),
+        shape=(len(energy), len(de)))
+    return numpy.array(energy), de, matrix, comments
+
+def _write_sidecar(fname, stamp, energy, de, matrix, comments):
+    try:
+        # write a temporary file and rename it, so a reader never sees
+        # a half-written cache.
+        with open(fname + '.npz.tmp', 'wb') as f:
+            numpy.savez(f, energy=energy, de=de, data=matrix.data,
+                        indices=matrix.indices, indptr=matrix.indptr,
+                        shape=numpy.array(matrix.shape),
+                        meta=numpy.array(json.dumps({'mtime': stamp[1], 'size': stamp[2],
+                                                     'comments': comments})))
+        os.rename(fname + '.npz.tmp', fname + '.npz')
+    except (IOError, OSError):
+        pass # we can live without a cache, e.g. in a read-only directory
+
+def _read_sidecar(fname, stamp):
+    try:
+        with numpy.load(fname + '.npz') as f:
+            meta = json.loads(str(f['meta']))
+            if meta['mtime'] != stamp[1] or meta['size'] != stamp[2]:
+                return None
+            matrix = scipy.sparse.csr_matrix((f['data'], f['indices'], f['indptr']),
+                                             shape=tuple(f['shape']))
+            return f['energy'], f['de'], matrix, meta['comments']
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+def load(f):
+    """The Transitions of basename f (or of the file f, if it ends in
+    .dat)."""
+    if '.dat' not in f:
+        f = f+"-transitions.dat"
+    stamp = _stamp(f)
+    if stamp[0] in _memo and _memo[stamp[0]][0] == stamp:
+        return _memo[stamp[0]][1]
+    cached = _read_sidecar(f, stamp)
+    if cached is None:
+        cached = _parse(f)
+        _write_sidecar(f, stamp, *cached)
+    t = Transitions(*cached)
+    _memo[stamp[0]] = (stamp, t)
+    return t
+
+class Transitions(object):
+    """The counts of proposed moves from each energy (as written in the
+    file, i.e. -E) by each de (again as written), as a sparse matrix
+    counts[energy, de]."""
+    def __init__(self, energy, de, counts, comments):
+        self.energy = energy
+        self.de = de
+        self.counts = counts
+        self.comments = comments
+        self.N = mcheader.Header(comments).N
+
+    def histogram(self):
+        """The number of moves proposed from each energy."""
+        return numpy.asarray(self.counts.sum(axis=1)).ravel()
+
+    def total(self):
+        return self.counts.sum()
+
+    def normalized(self):
+        """The counts with each (nonempty) row normalized to one, which
+        is the probability of each de being proposed."""
+        hist = self.histogram()
+        scale = numpy.zeros_like(hist)
+        scale[hist > 0] = 1/hist[hist > 0]
+        return scipy.sparse.diags(scale).dot(self.counts).tocsr()
+
+    def moments(self):
+        """The mean and variance of de from each energy, which are nan
+        for energies we never visited."""
+        p = self.normalized()
+        mean = p.dot(self.de)
+        mean2 = p.dot(self.de**2)
+        empty = self.histogram() == 0
+        mean[empty] = numpy.nan
+        mean2[empty] = numpy.nan
+        return mean, mean2 - mean**2
+
+    def diffusion(self):
+        """The diffusion constant in energy, <(de - <de>)^2>/2 per
+        proposed move, from each energy."""
+        return self.moments()[1]/2
+
+    def matrix(self):
+        """The square matrix of probabilities P[i, j] of proposing a
+        move from the ith energy to the jth.  Moves to energies we do
+        not have a row for are dropped."""
+        p = self.normalized().tocoo()
+        target = self.energy[p.row] + self.de[p.col]
+        order = numpy.argsort(self.energy)
+        j = numpy.searchsorted(self.energy[order], target)
+        j = numpy.minimum(j, len(order)-1)
+        ok = self.energy[order][j] == target
+        return scipy.sparse.csr_matrix((p.data[ok], (p.row[ok], order[j[ok]])),
+                                       shape=(len(self.energy), len(self.energy)))
+
+    def stationary(self):
+        """The stationary distribution of the proposal matrix over the
+        energies we visited.  Since our proposals have infinite
+        temperature, this is an estimate of the density of states."""
+        P = self.matrix()
+        visited = numpy.flatnonzero(self.histogram() > 0)
+        P = P[visited][:, visited]
+        # pi (P - 1) = 0, with one equation swapped for sum(pi) = 1
+        A = (P.T - scipy.sparse.identity(len(visited))).tolil()
+        A[0, :] = 1
+        b = numpy.zeros(len(visited))
+        b[0] = 1
+        pi = numpy.zeros(len(self.energy))
+        pi[visited] = scipy.sparse.linalg.spsolve(A.tocsc(), b)
+        return pi
+
+    def round_trip_time(self, low=None, high=None, min_counts=1000, min_weight=1e-12):
+        """The mean number of moves for a flat-histogram walk (which
+        accepts a move with probability min(1, pi_i/pi_j), pi being
+        the stationary distribution) to go from energy low to energy
+        high and back.  The default is the extremes of the energies we
+        know well: those with at least min_counts proposed moves and a
+        stationary weight of at least min_weight of the largest.  The
+        extreme energies we visited have only a handful of counts, or
+        weights so small (1e-150 at N = 50) that the walk is trapped
+        by the errors in them, and give round trips of 1e17 moves."""
+        pi = self.stationary()
+        visited = numpy.flatnonzero(pi > 0)
+        e = self.energy[visited]
+        if low is None or high is None:
+            known = e[(self.histogram()[visited] >= min_counts)
+                      & (pi[visited] >= min_weight*pi.max())]
+            if len(known) == 0:
+                raise ValueError('no energy has %d counts and weight %g' % (min_counts, min_weight))
+            if low is None:
+                low = known.min()
+            if high is None:
+                high = known.max()
+        for end in (low, high):
+            if end not in e:
+                raise ValueError('energy %g was never visited' % end)
+        P = self.matrix()[visited][:, visited].tocoo()
+        accept = numpy.minimum(1, pi[visited][P.row]/pi[visited][P.col])
+        W = scipy.sparse.csr_matrix((P.data*accept, (P.row, P.col)), shape=P.shape)
+        # moves that are rejected stay put
+        W = W + scipy.sparse.diags(1 - numpy.asarray(W.sum(axis=1)).ravel())
+        return (self._first_passage(W, e == high)[e == low][0]
+                + self._first_passage(W, e == low)[e == high][0])
+
+    def _first_passage(self, W, target):
+        # the mean number of moves to reach target from each state,
+        # solving t = 1 + W t away from the target
+        others = numpy.flatnonzero(~target)
+        Q = W[others][:, others]
+        t = numpy.zeros(len(target))
+        t[others] = scipy.sparse.linalg.spsolve(
+            (scipy.sparse.identity(len(others)) - Q).tocsc(), numpy.ones(len(others)))
+        return t
@@ -7,7 +7,7 @@ import readnew
 from glob import glob
 #import re
 
-import yaml
+import yamlcache
 import os.path
 import time # Need to wait some time if file is being written
 
@@ -41,21 +41,17 @@ for f in filename:
         time.sleep(30)
     # Read YAML file
     if os.path.isfile(filename_location + name):
-        with open(filename_location + name, 'r') as stream:
-            yaml_data = yaml.load(stream)
+        yaml_data = yamlcache.load(filename_location + name)
     else:
         raise ValueError("%s isn't a file!" % (filename_location + name))
     #print(data_loaded)
     data = yaml_data
-    data['bins']['histogram'] = np.array(data['bins']['histogram'])
-    data['bins']['lnw'] = np.array(data['bins']['lnw'])
     data['movies']['energy']
     minyaml = data['movies']['energy'].index(-Smax)
     maxyaml = data['movies']['energy'].index(-Smin)
     #print(data['bins']['lnw'])
     moves = data['moves']
     
-    data['movies']['entropy'] = np.array(data['movies']['entropy'])
     lndos = data['movies']['entropy']
     N_save_times = len(data['movies']['entropy'])
     
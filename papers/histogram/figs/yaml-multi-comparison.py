@@ -7,7 +7,7 @@ import readnew
 from glob import glob
 #import re
 
-import yaml
+import yamlcache
 import os.path
 import time # Need to wait some time if file is being written
 
@@ -35,122 +35,93 @@ seed_avg = int(sys.argv[8])
 filename = sys.argv[9:]
 print(('filenames are ', filename))
 
+# The reference is the same for every file and seed.
+ref = reference
+maxref = Emax #int(readnew.max_entropy_state(ref))
+minref = Emin # int(readnew.min_important_energy(ref))
+n_energies = int(minref - maxref+1)
+#print maxref, minref
+try:
+    eref, lndosref, Nrt_ref = readnew.e_lndos_ps(ref)
+except:
+    eref, lndosref = readnew.e_lndos(ref)
+
+def entropy_errors(lndos):
+    """The mean and the spread of the error in the entropy of each
+    frame (row) of lndos, which holds the entropies from -Emin to -Emax,
+    after shifting each to the same mean as the reference."""
+    # below just set average S equal between lndos and lndosref
+    if yamlRef:
+        # if using yaml as a reference the range is from 0 to len while for C++ the range is
+        # from maxref to minref + 1
+        if 'ising' in filebase:
+            # the states are counted backward hence the second to last state would be at index = 1
+            ising_norm = np.delete(lndos, [1], axis=1) # remove impossible state
+            ising_lndos = np.delete(lndos[:, ::-1], [lndos.shape[1]-2], axis=1) # remove impossible state
+
+            norm_factor = np.mean(ising_norm, axis=1) - np.mean(lndosref[0:minref-maxref+1])
+            doserror = ising_lndos - lndosref[0:minref-maxref+1] - norm_factor[:, np.newaxis]
+        else:
+            norm_factor = np.mean(lndos, axis=1) - np.mean(lndosref[0:minref-maxref+1])
+            doserror = lndos[:, ::-1] - lndosref[0:minref-maxref+1] - norm_factor[:, np.newaxis]
+    else:
+        norm_factor = np.mean(lndos, axis=1) - np.mean(lndosref[maxref:minref+1])
+        doserror = lndos[:, ::-1] - lndosref[maxref:minref+1] - norm_factor[:, np.newaxis]
+    errorinentropy = np.sum(abs(doserror), axis=1)/doserror.shape[1] #- np.mean(doserror)
+    maxerror = np.amax(doserror, axis=1) - np.amin(doserror, axis=1)
+    return errorinentropy, maxerror
+
 for f in filename:
     err_in_S = []
     err_max = []
     min_moves = []
     name = '%s.yaml' % (f)
+    names = []
+    times = []
+    windows = []
     for n in range(1, seed_avg+1):
-        #try:
-            name = '%s-s%s.yaml' % (f, n)
-            print(('trying filename ', name))
-
-            # Read YAML file
-            if os.path.isfile(filename_location + name):
-                with open(filename_location + name, 'r') as stream:
-                    yaml_data = yaml.load(stream)
-            else:
-                print(('unable to read file', filename_location + name))
-                raise ValueError("%s isn't a file!" % (filename_location + name))
-
-            data = yaml_data
-            data['bins']['histogram'] = np.array(data['bins']['histogram'])
-            data['bins']['lnw'] = np.array(data['bins']['lnw'])
-
-            data['movies']['entropy'] = np.array(data['movies']['entropy'])
-            lndos = data['movies']['entropy']
-            energies = data['movies']['energy']
-            N_save_times = len(data['movies']['entropy'])
-            try:
-                maxyaml = energies.index(-Emin)
-            except:
-                my_minE = energies[0]
-                num_new_energies = int(my_minE - (-Emin))
-                print(('num_new_maxyaml', num_new_energies))
-                lndos_new = np.zeros((lndos.shape[0], lndos.shape[1]+num_new_energies))
-                lndos_new[:, num_new_energies:] = lndos[:,:]
-                lndos = lndos_new
-                energies = [0]*num_new_energies + energies
-                maxyaml = 0
-
-            try:
-                minyaml = energies.index(-Emax)
-            except:
-                my_maxE = energies[-1]
-                num_new_energies = -int(my_maxE - (-Emax))
-                print(('num_new_minyaml', num_new_energies))
-                lndos_new = np.zeros((lndos.shape[0], lndos.shape[1]+num_new_energies))
-                lndos_new[:, :lndos.shape[1]] = lndos[:,:]
-                lndos = lndos_new
-                minyaml = lndos.shape[1]-1
-
-            #moves = data['moves']
-
-
-            ref = reference
-            maxref = Emax #int(readnew.max_entropy_state(ref))
-            minref = Emin # int(readnew.min_important_energy(ref))
-            n_energies = int(minref - maxref+1)
-            #print maxref, minref
-            try:
-                eref, lndosref, Nrt_ref = readnew.e_lndos_ps(ref)
-            except:
-                eref, lndosref = readnew.e_lndos(ref)
-
-            errorinentropy = np.zeros(N_save_times)
-            maxerror = np.zeros(N_save_times)
-            for i in range(0, N_save_times):
-                # below just set average S equal between lndos and lndosref
-                if yamlRef:
-                    # if using yaml as a reference the range is from 0 to len while for C++ the range is
-                    # from maxref to minref + 1
-                    if 'ising' in filebase:
-                        ising_norm = lndos[i][maxyaml:minyaml+1] # remove impossible state
-                        ising_lndos = lndos[i][maxyaml:minyaml+1][::-1] # remove impossible state
-
-                        # the states are counted backward hence the second to last state would be at index = 1
-                        ising_norm = np.delete(ising_norm,[1])
-                        ising_lndos = np.delete(ising_lndos,[len(ising_lndos)-2])
-
-                        norm_factor = np.mean(ising_norm) - np.mean(lndosref[0:minref-maxref+1])
-                        doserror = ising_lndos - lndosref[0:minref-maxref+1] - norm_factor
-                    else:
-                        norm_factor = np.mean(lndos[i][maxyaml:minyaml+1]) - np.mean(lndosref[0:minref-maxref+1])
-                        doserror = lndos[i][maxyaml:minyaml+1][::-1] - lndosref[0:minref-maxref+1] - norm_factor
-                else:
-                    norm_factor = np.mean(lndos[i][maxyaml:minyaml+1]) - np.mean(lndosref[maxref:minref+1])
-                    doserror = lndos[i][maxyaml:minyaml+1][::-1] - lndosref[maxref:minref+1] - norm_factor
-
-                errorinentropy[i] = np.sum(abs(doserror))/len(doserror) #- np.mean(doserror)
-                maxerror[i] = np.amax(doserror) - np.amin(doserror)
-
-
-            # remove N from moves in yaml file because N is added back in the
-            # comparison-plot script
-            moves = data['movies']['time']
-            if min_moves == [] or len(min_moves) > len(moves):
-                min_moves = np.array(moves)/N
-            errorinentropy = errorinentropy[:len(moves)]
-            maxerror = maxerror[:len(moves)]
-            err_in_S.append(errorinentropy)
-            err_max.append(maxerror)
-
-            dirname = 'data/comparison/%s-%s' % (filebase, name.replace('.yaml', ''))
-            print('saving to', dirname)
-            try:
-                os.mkdir(dirname)
-            except OSError:
-                pass
-            else:
-                print(("Successfully created the directory %s " % dirname))
-            np.savetxt('%s/errors.txt' %(dirname),
-              np.c_[np.array(moves)/N, errorinentropy, maxerror],
-              fmt = ('%.4g'),
-              delimiter = '\t',
-              header = 'iterations\t errorinentropy\t maxerror\t(generated with python %s' % ' '.join(sys.argv))
-        #except:
-        #    print('I ran into some odd trouble.')
-        #    pass
+        name = '%s-s%s.yaml' % (f, n)
+        print(('trying filename ', name))
+
+        # Read YAML file
+        if not os.path.isfile(filename_location + name):
+            print(('unable to read file', filename_location + name))
+            raise ValueError("%s isn't a file!" % (filename_location + name))
+        data = yamlcache.load(filename_location + name)
+
+        # the entropy of each frame from -Emin to -Emax, padded with
+        # zeros where this run has not been
+        names.append(name)
+        times.append(data['movies']['time'])
+        windows.append(yamlcache.energy_window(data['movies']['energy'],
+                                               data['movies']['entropy'], -Emin, -Emax))
+
+    # work out the errors of every frame of every seed at once
+    errors, maxerrors = entropy_errors(np.concatenate(windows))
+    starts = np.cumsum([0] + [len(w) for w in windows])
+    for name, moves, start, end in zip(names, times, starts[:-1], starts[1:]):
+        # remove N from moves in yaml file because N is added back in the
+        # comparison-plot script
+        if min_moves == [] or len(min_moves) > len(moves):
+            min_moves = np.array(moves)/N
+        errorinentropy = errors[start:end][:len(moves)]
+        maxerror = maxerrors[start:end][:len(moves)]
+        err_in_S.append(errorinentropy)
+        err_max.append(maxerror)
+
+        dirname = 'data/comparison/%s-%s' % (filebase, name.replace('.yaml', ''))
+        print('saving to', dirname)
+        try:
+            os.mkdir(dirname)
+        except OSError:
+            pass
+        else:
+            print(("Successfully created the directory %s " % dirname))
+        np.savetxt('%s/errors.txt' %(dirname),
+          np.c_[np.array(moves)/N, errorinentropy, maxerror],
+          fmt = ('%.4g'),
+          delimiter = '\t',
+          header = 'iterations\t errorinentropy\t maxerror\t(generated with python %s' % ' '.join(sys.argv))
 
     for i in range(len(err_in_S)):
         err_in_S[i] = err_in_S[i][:len(min_moves)]
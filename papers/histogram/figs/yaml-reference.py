@@ -6,7 +6,7 @@ import numpy as np
 import readnew
 from glob import glob
 
-import yaml
+import yamlcache
 
 filename = sys.argv[1]
 
@@ -21,8 +21,7 @@ f = '%s.yaml' % (filename)
 filename = filename.split('/')[-1]
 
 # Read YAML file.
-with open(f, 'r') as stream:
-    yaml_data = yaml.load(stream)
+yaml_data = yamlcache.load(f)
 
 #print(data_loaded)
 data = yaml_data
@@ -0,0 +1,106 @@
+#!/usr/bin/python2
+from __future__ import division
+import os, json
+import numpy
+import yaml
+
+# A cache for the YAML files that sad-monte-carlo writes (NAME-sN.yaml),
+# which are several megabytes of numbers that the pure python YAML
+# parser takes ages to read.  We parse them with the C (libyaml) loader
+# when we have it, turn the big numeric lists (bins.histogram, bins.lnw
+# and movies.entropy) into numpy arrays, and save those in a .npz
+# sidecar next to the YAML file, with the rest of the document as JSON.
+# Like the datcache sidecars, it records the mtime and size of the
+# YAML file it came from, so a rewritten file is parsed again.
+
+try:
+    Loader = yaml.CSafeLoader
+except AttributeError:
+    Loader = yaml.SafeLoader # no libyaml, so this will be slow
+
+# the (section, key) of the lists we keep as arrays
+arrays = [('bins', 'histogram'), ('bins', 'lnw'), ('movies', 'entropy')]
+
+_memo = {} # maps path to ((path, mtime, size), data)
+
+def _stamp(fname):
+    st = os.stat(fname)
+    return os.path.abspath(fname), st.st_mtime, st.st_size
+
+def _parse(fname):
+    with open(fname) as f:
+        data = yaml.load(f, Loader=Loader)
+    found = {}
+    for section, key in arrays:
+        if key in data.get(section, {}):
+            try:
+                found['%s.%s' % (section, key)] = numpy.array(data[section][key], dtype=float)
+            except ValueError:
+                pass # e.g. ragged, so we leave it as it is
+    return data, found
+
+def _split(data, found):
+    """The document without the lists we made into arrays."""
+    rest = dict(data)
+    for name in found:
+        section, key = name.split('.')
+        rest[section] = dict(rest[section])
+        del rest[section][key]
+    return rest
+
+def _join(rest, found):
+    data = rest
+    for name, value in found.items():
+        section, key = name.split('.')
+        data[section][key] = value
+    return data
+
+def _write_sidecar(fname, stamp, rest, found):
+    try:
+        text = json.dumps({'mtime': stamp[1], 'size': stamp[2], 'rest': rest})
+        if json.loads(text)['rest'] != rest:
+            return # something JSON can't hold, such as an integer key
+        # write a temporary file and rename it, so a reader never sees
+        # a half-written cache.
+        with open(fname + '.npz.tmp', 'wb') as f:
+            numpy.savez(f, meta=numpy.array(text), **found)
+        os.rename(fname + '.npz.tmp', fname + '.npz')
+    except (IOError, OSError, TypeError, ValueError):
+        pass # we can live without a cache, e.g. in a read-only directory
+
+def _read_sidecar(fname, stamp):
+    try:
+        with numpy.load(fname + '.npz') as f:
+            meta = json.loads(str(f['meta']))
+            if meta['mtime'] != stamp[1] or meta['size'] != stamp[2]:
+                return None
+            return _join(meta['rest'], dict((name, f[name]) for name in f.files
+                                            if name != 'meta'))
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+def load(fname):
+    """The contents of the YAML file fname, with bins.histogram,
+    bins.lnw and movies.entropy as numpy arrays.  Don't modify it, as
+    we hand the same dict out each time the file is loaded."""
+    stamp = _stamp(fname)
+    if stamp[0] in _memo and _memo[stamp[0]][0] == stamp:
+        return _memo[stamp[0]][1]
+    data = _read_sidecar(fname, stamp)
+    if data is None:
+        data, found = _parse(fname)
+        _write_sidecar(fname, stamp, _split(data, found), found)
+        data = _join(data, found)
+    _memo[stamp[0]] = (stamp, data)
+    return data
+
+def energy_window(energies, entropy, emin, emax):
+    """The columns of entropy (one row per frame, one column for each
+    of the energies) for the energies from emin to emax, in steps of
+    one, with zeros for the energies we never reached."""
+    energies = numpy.round(numpy.asarray(energies)).astype(int)
+    entropy = numpy.atleast_2d(entropy)
+    window = numpy.zeros((entropy.shape[0], emax - emin + 1))
+    inside = (energies >= emin) & (energies <= emax)
+    window[:, energies[inside] - emin] = entropy[:, inside]
+    return window
@@ -10,22 +10,10 @@ min_N=5
 max_N=30
 max_golden_N=26
 
-for N in `seq $min_N $max_N`; do
-  echo "\n\n\n    working on N=$N\n"
-  for seed in `seq 18 24`; do
-    echo "\n\n  working on seed=$seed\n"
+# run-default.py runs these as a single sweep, which skips the runs that
+# are already done if it is interrupted and run again.
+python2 run-default.py $ww $ff $min_T "range($min_N, $max_N+1)" \
+        "['simple_flat', 'tmmc', 'oetmmc']" "range(18, 25)"
 
-    for method in simple_flat tmmc oetmmc; do
-      echo "\nworking on $method\n"
-      python2 run-default.py $ww $ff $min_T $N $method $seed
-    done
-
-    if [ $N -le $max_golden_N ]; then
-      for method in cfw wang_landau; do
-        echo "\nworking on $method\n"
-        python2 run-default.py $ww $ff $min_T $N $method $seed
-      done
-    fi
-
-  done
-done
+python2 run-default.py $ww $ff $min_T "range($min_N, $max_golden_N+1)" \
+        "['cfw', 'wang_landau']" "range(18, 25)"
@@ -4,6 +4,7 @@ import os, numpy, sys, re
 
 if len(sys.argv) not in [6,7]:
     print "usage:  python2 %s ww ff min_T N method [seed]" % sys.argv[0]
+    print "  N, method and seed may also be python lists, e.g. 'range(5,31)'"
     exit(1)
 
 # switch to deft project directory and build SWMC
@@ -11,9 +12,14 @@ filepath = os.path.abspath(__file__)
 deft_dir = re.sub('deft/.*','deft',filepath)
 paper_dir = re.sub('histogram/.*','histogram',filepath)
 data_dir = paper_dir+'/data/'
+sys.path.insert(0, paper_dir+'/..')
+import sweep
 os.chdir(deft_dir)
 os.system('fac square-well-monte-carlo')
 
+jobs = sweep.Sweep(ledger=data_dir+'run-default-sweep.json',
+                   backend='srun' if sweep.have_command('srun') else 'local')
+
 def run_default(ww, ff, min_T, N, method, seed):
     out_fname = '%s-N%d-ff%.0f-ww%.0f-s%.3i' % (method, N, ff*100, ww*100, seed)
     iterations = 1e5*N*N
@@ -23,19 +29,33 @@ def run_default(ww, ff, min_T, N, method, seed):
                  os.path.abspath(data_dir + 'periodic-ww%.2f-ff%.2f-N%i'%(ww,ff,N) + \
                                  '-tmmc-golden-transitions.dat')
 
-    cmd = ("srun --mem=600 -J %s time nice -19 ./square-well-monte-carlo --ww %g --ff %g --min_T %g --N %d --%s --seed %i --iterations %d > %s.out 2>&1 &"
-           % (out_fname, ww, ff, min_T, N, method, seed, iterations, data_dir+out_fname))
-    print(cmd)
-    os.system(cmd)
+    # the sweep's ledger records how long each run took, since time
+    # would end up inside its srun and nice wrapper.
+    cmd = ("./square-well-monte-carlo --ww %g --ff %g --min_T %g --N %d --%s --seed %i --iterations %d"
+           % (ww, ff, min_T, N, method, seed, iterations))
+    jobs.add(out_fname, cmd, log=data_dir+out_fname+'.out', srun_args='--mem=600')
+
+def as_list(arg, convert):
+    try:
+        values = eval(arg)
+    except:
+        values = arg
+    if isinstance(values, (list, tuple)):
+        return [convert(v) for v in values]
+    return [convert(values)]
 
 ww = float(sys.argv[1])
 ff = float(sys.argv[2])
 min_T = float(sys.argv[3])
-N = int(sys.argv[4])
-method = sys.argv[5]
+Ns = as_list(sys.argv[4], int)
+methods = as_list(sys.argv[5], str)
 try:
-    seed = int(sys.argv[6])
+    seeds = as_list(sys.argv[6], int)
 except:
-    seed = 0
+    seeds = [0]
 
-run_default(ww, ff, min_T, N, method, seed)
+for N in Ns:
+    for method in methods:
+        for seed in seeds:
+            run_default(ww, ff, min_T, N, method, seed)
+jobs.run()
@@ -8,7 +8,9 @@ from matplotlib import animation
 
 # Specify the filepath.
 dir_path = os.path.dirname(os.path.realpath(__file__))
-sys.path.insert(0, dir_path+'/../results/')
+results_path = dir_path+'/../results/'
+sys.path.insert(0, dir_path)
+import isingdata
 
 # change this to use colors rather than line at some point
 # so that each method gets its own color?
@@ -26,12 +28,14 @@ if animate_what == 'DOS':
   min_S_ever = 1e100
   max_Sdiff_ever = 0
   for m in methods:
-      d = __import__('%s' % (m))
+      d = isingdata.Movie(results_path + m)
       d.filename = m
-      if d.lndos.max() > max_S_ever:
-          max_S_ever = d.lndos.max()
-      if d.lndos[d.lndos != 0].min() < min_S_ever:
-          min_S_ever = d.lndos[d.lndos != 0].min()
+      # look at one frame at a time, so we never hold the whole movie
+      for lndos in d.lndos:
+          if lndos.max() > max_S_ever:
+              max_S_ever = lndos.max()
+          if (lndos != 0).any() and lndos[lndos != 0].min() < min_S_ever:
+              min_S_ever = lndos[lndos != 0].min()
       Sdiff = d.lndos[-1].max() - d.lndos[-1][d.lndos[-1] != 0].min()
       if Sdiff > max_Sdiff_ever:
           print('max_Sdiff_ever', Sdiff, 'from', m)
@@ -93,7 +97,7 @@ if animate_what == 'DOS':
 if animate_what == 'HIST':
   datas = []
   for m in methods:
-      d = __import__('%s' % (m))
+      d = isingdata.Movie(results_path + m)
       d.filename = m
       datas.append(d) # 'ising1-lnw'
   
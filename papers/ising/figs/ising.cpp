@@ -3,6 +3,7 @@
 #include <time.h>
 #include <cassert>
 #include <math.h>
+#include <stdint.h>
 #include <stdlib.h>
 #include <popt.h>
 #include <sys/stat.h>
@@ -735,23 +736,37 @@ int main(int argc, const char *argv[]) {
 
 // MAIN CODE EXECUTION HERE!
 
+  // The movie of lndos and histogram goes in a JSON header
+  // (NAME-lnw.json) describing a binary file of fixed-size frames
+  // (NAME-lnw.bin), which we append to as we go.  See isingdata.py.
   char *w_fname = new char[1024];
-  sprintf(w_fname, "%s/%s-lnw.py", data_dir, filename);
+  sprintf(w_fname, "%s/%s-lnw.bin", data_dir, filename);
   {
-    FILE *w_out = fopen((const char *)w_fname, "w");
-    if (w_out == 0) {
-      printf("unable to create file named \"%s\"\n", w_fname);
+    char *json_fname = new char[1024];
+    sprintf(json_fname, "%s/%s-lnw.json", data_dir, filename);
+    FILE *json_out = fopen((const char *)json_fname, "w");
+    if (json_out == 0) {
+      printf("unable to create file named \"%s\"\n", json_fname);
       exit(1);
     }
-    fprintf(w_out, "import numpy as np\n");
-    fprintf(w_out, "E = np.array([");
+    const int one = 1;
+    fprintf(json_out, "{\"version\": \"%s\",\n", version_identifier());
+    fprintf(json_out, " \"byteorder\": \"%s\",\n", *(const char *)&one ? "little" : "big");
+    fprintf(json_out, " \"N\": %d,\n", param.N);
+    fprintf(json_out, " \"energy_levels\": %ld,\n", ising.energy_levels);
+    fprintf(json_out, " \"E\": [");
     for (int i=0;i<ising.energy_levels; i++) {
-      fprintf(w_out, "%d, ", ising.energy_from_index(i).value);
+      fprintf(json_out, "%s%d", i ? ", " : "", ising.energy_from_index(i).value);
+    }
+    fprintf(json_out, "]}\n");
+    fclose(json_out);
+    delete[] json_fname;
+
+    FILE *w_out = fopen((const char *)w_fname, "wb"); // no frames yet
+    if (w_out == 0) {
+      printf("unable to create file named \"%s\"\n", w_fname);
+      exit(1);
     }
-    fprintf(w_out, "])\n");
-    fprintf(w_out, "lndos = np.zeros(%ld)\n", ising.energy_levels);
-    fprintf(w_out, "histogram = np.zeros(%ld)\n", ising.energy_levels);
-    fprintf(w_out, "t = np.array([])\n");
     fclose(w_out);
   }
 
@@ -783,27 +798,21 @@ int main(int argc, const char *argv[]) {
       if (ising.moves == next_output) {
         // Save energy histogram
 
-        FILE *w_out = fopen((const char *)w_fname, "a");
+        FILE *w_out = fopen((const char *)w_fname, "ab");
         if (w_out == 0) {
           printf("unable to create file named \"%s\"\n", w_fname);
           exit(1);
         }
-
-        fprintf(w_out, "lndos = np.vstack((lndos, np.array([");
-        for (int i = 0; i < ising.energy_levels; i++) {
-          fprintf(w_out,"%.17g,", ising.ln_dos[i]);
-        }
-        fprintf(w_out, "])))\n");
-
-        fprintf(w_out, "histogram = np.vstack((histogram, np.array([");
+        // Each frame is the moves, the lndos and the histogram.
+        const int64_t t = ising.moves;
+        fwrite(&t, sizeof(int64_t), 1, w_out);
+        fwrite(ising.ln_dos, sizeof(double), ising.energy_levels, w_out);
         for (int i = 0; i < ising.energy_levels; i++) {
-          fprintf(w_out,"%ld,", ising.energy_histogram[i]);
+          const int64_t h = ising.energy_histogram[i];
+          fwrite(&h, sizeof(int64_t), 1, w_out);
         }
-        fprintf(w_out, "])))\n");
-
-        fprintf(w_out, "t = np.append(t, %ld)\n", ising.moves);
         fclose(w_out);
-        
+
         if (param.use_sad || param.sa_t0 || param.use_wl) {
           ising.set_max_entropy_energy();
           ising.compute_ln_dos(weights_dos);
@@ -0,0 +1,170 @@
+#!/usr/bin/env python2
+
+# Readers for the output of ising.exe.  Its movie of lndos and
+# histogram used to be a python module (NAME-lnw.py) that appended a
+# whole vstack per frame, so that loading it took time (and memory)
+# quadratic in the number of frames and meant executing the file.  It
+# is now a JSON header (NAME-lnw.json) and a binary file of fixed-size
+# frames (NAME-lnw.bin), each holding
+#
+#    t          the number of moves, as an int64
+#    lndos      energy_levels doubles
+#    histogram  energy_levels int64s
+#
+# which ising.exe just appends to.  We memory-map the frames, so
+# reading one frame only touches that frame.  Old NAME-lnw.py and
+# NAME.py files are parsed as text, without executing them.
+
+from __future__ import division, print_function
+import os, re, json
+import numpy as np
+
+def frame_dtype(energy_levels, byteorder='little'):
+    o = '<' if byteorder == 'little' else '>'
+    return np.dtype([('t', o+'i8'),
+                     ('lndos', o+'f8', (energy_levels,)),
+                     ('histogram', o+'i8', (energy_levels,))])
+
+class Movie(object):
+    """The frames of an ising.exe movie.  Has E, t, lndos and histogram
+    like the old -lnw.py modules, with lndos[i] and histogram[i]
+    belonging to the moment t[i]."""
+    def __init__(self, base):
+        if base.endswith('.json') or base.endswith('.bin') or base.endswith('.py'):
+            base = base.rsplit('.', 1)[0]
+        self.filename = os.path.basename(base)
+        if os.path.exists(base + '.json'):
+            with open(base + '.json') as f:
+                self.header = json.load(f)
+            self.E = np.array(self.header['E'])
+            dtype = frame_dtype(self.header['energy_levels'], self.header['byteorder'])
+            # Only whole frames count: ising.exe may be writing the
+            # last one right now.
+            frames = os.path.getsize(base + '.bin') // dtype.itemsize
+            if frames > 0:
+                self.frames = np.memmap(base + '.bin', dtype=dtype, mode='r',
+                                        shape=(frames,))
+            else:
+                self.frames = np.zeros(0, dtype=dtype)
+            self.t = self.frames['t']
+            self.lndos = self.frames['lndos']
+            self.histogram = self.frames['histogram']
+        elif os.path.exists(base + '.py'):
+            old = read_py(base + '.py')
+            self.header = {}
+            self.E = old['E']
+            # np.vstack put the np.zeros we started with in front of
+            # the first frame, which we don't want.
+            self.t = old['t']
+            self.lndos = np.atleast_2d(old['lndos'])[1:]
+            self.histogram = np.atleast_2d(old['histogram'])[1:]
+        else:
+            raise IOError('no ising movie %s.json or %s.py' % (base, base))
+
+    def __len__(self):
+        return len(self.t)
+
+    def __iter__(self):
+        """Yield (t, lndos, histogram) one frame at a time."""
+        for i in range(len(self)):
+            yield self.t[i], self.lndos[i], self.histogram[i]
+
+def write_movie(base, E, t, lndos, histogram, **header):
+    """Write a movie as ising.exe does, e.g. to convert an old -lnw.py
+    file."""
+    E = np.asarray(E)
+    header.update(byteorder='little', energy_levels=len(E), E=[int(e) for e in E])
+    with open(base + '.json', 'w') as f:
+        json.dump(header, f)
+    frames = np.zeros(len(t), dtype=frame_dtype(len(E)))
+    frames['t'] = t
+    frames['lndos'] = lndos
+    frames['histogram'] = histogram
+    frames.tofile(base + '.bin')
+
+# The lines of the old python files we know how to read.
+_array = re.compile(r'^(\w+) = np\.array\(\[(.*)\]\)$')
+_stack = re.compile(r'^(\w+) = np\.vstack\(\(\1, np\.array\(\[(.*)\]\)\)\)$')
+_append = re.compile(r'^(\w+) = np\.append\(\1, (.*)\)$')
+_zeros = re.compile(r'^(\w+) = np\.zeros\((\d+)\)$')
+_scalar = re.compile(r'^(\w+) = (.*)$')
+
+def _numbers(text):
+    values = [v for v in text.replace('\n', ' ').replace('\t', ' ').split(',') if v.strip()]
+    if len(values) == 0:
+        return np.array([])
+    if ']' in text:
+        # a 2D array, written one row per "[...],"
+        rows = [r for r in re.split(r'\]\s*,?', text) if r.strip()]
+        return np.array([_numbers(r.replace('[', '')) for r in rows])
+    try:
+        return np.array([int(v) for v in values])
+    except ValueError:
+        return np.array([float(v) for v in values])
+
+def _scalar_value(text):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    if len(text) > 1 and text[0] == text[-1] and text[0] in '\'"':
+        return text[1:-1]
+    return text # e.g. the unquoted version
+
+def read_py(fname):
+    """Read one of the python files that ising.exe used to write (or
+    still writes as its resume file), returning a dict of its
+    variables, without executing it."""
+    d = {}
+    stacks = {} # rows from np.vstack
+    appends = {} # values from np.append
+    with open(fname) as f:
+        lines = iter(f.read().splitlines())
+    for line in lines:
+        line = line.strip()
+        if line == '' or line.startswith('#') or line.startswith('import '):
+            continue
+        if line.endswith('np.array(['):
+            # an array written one element per line, ending with "])"
+            body = []
+            for more in lines:
+                if more.strip() == '])':
+                    break
+                body.append(more)
+            d[line.split(' =')[0]] = _numbers('\n'.join(body))
+            continue
+        m = _stack.match(line)
+        if m:
+            stacks.setdefault(m.group(1), [d[m.group(1)]]).append(_numbers(m.group(2)))
+            continue
+        m = _append.match(line)
+        if m:
+            appends.setdefault(m.group(1), [d[m.group(1)]]).append(
+                np.atleast_1d(_scalar_value(m.group(2).strip())))
+            continue
+        m = _array.match(line)
+        if m:
+            d[m.group(1)] = _numbers(m.group(2))
+            continue
+        m = _zeros.match(line)
+        if m:
+            d[m.group(1)] = np.zeros(int(m.group(2)))
+            continue
+        m = _scalar.match(line)
+        if m:
+            d[m.group(1)] = _scalar_value(m.group(2).strip())
+    for name, parts in stacks.items():
+        d[name] = np.vstack(parts)
+    for name, parts in appends.items():
+        d[name] = np.concatenate(parts)
+    return d
+
+if __name__ == '__main__':
+    import sys
+    # convert old -lnw.py movies to the binary format
+    for fname in sys.argv[1:]:
+        m = Movie(fname)
+        base = fname.rsplit('.', 1)[0]
+        write_movie(base, m.E, m.t, m.lndos, m.histogram)
+        print('wrote', base + '.json', 'and', base + '.bin')
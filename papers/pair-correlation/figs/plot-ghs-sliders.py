@@ -135,8 +135,9 @@ def evalg_nosquare(xnew, eta, r):
 def dist(x):
   # function with x[i] as constants to be determined
   g = zeros_like(etaconcatenated)
-  for i in range(len(g)):
-    g[i] = evalg(x, etaconcatenated[i], rconcatenated[i])
+  # evalg takes an array of r, so we only need a call per filling fraction
+  for i in range(len(eta)):
+    g[i*len(r):(i+1)*len(r)] = evalg(x, eta[i], r)
   return g
 
 def dist2(x):
@@ -191,9 +192,8 @@ def update(val):
   ax.collections=[]
   for i in range(len(x)):
     x[i] = sliders[i].val
-  chi2 = sum(dist2(x)**2)
-
   g = dist(x)
+  chi2 = sum((g - ghsconcatenated)**2)
   for i in range(len(ff)):
     plots[i].set_data(r_mc, g[i*len(r):(i+1)*len(r)])
     #ax.plot(r_mc, g[i*len(r):(i+1)*len(r)], colors[i]+'--',label='g at filling fraction %.2f'%ff[i])
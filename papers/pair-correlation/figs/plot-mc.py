@@ -5,10 +5,11 @@
 from __future__ import division
 import matplotlib
 #matplotlib.use('Agg')
-import pylab, numpy, sys, scipy.ndimage
+import pylab, numpy, sys
 import os.path
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.widgets import Slider, RadioButtons
+import walldata
 #from mpl_toolkits.axes_grid1 import make_axes_locatab
 
 at_wall = True
@@ -30,29 +31,11 @@ ff = 0.3
 
 def plot1d():
   global g2, ax
-  zvals = len(g2[0][0,:])
-  rvals = len(g2[0][:, 0])
-  if theta < numpy.arctan(1/2):
-    z1 = zmax
-    r1 = (z1-z0)*numpy.tan(theta)
-  elif theta < numpy.pi - numpy.arctan(1/2):
-    r1 = rmax
-    z1 = r1/numpy.tan(theta) + z0
-  else:
-    z1 = -zmax
-    r1 = (z1-z0)*numpy.tan(theta)
-  rlen = numpy.sqrt((z1-z0)**2 + r1**2)
-  z0coord = zvals*(z0-0.05)/zmax
-  z1coord = zvals*(z1)/zmax
-  r0coord = 0
-  r1coord = rvals*(r1)//rmax
-  y, x = numpy.linspace(z0coord, z1coord, num), numpy.linspace(r0coord, r1coord, num)
-
   i = 0
   while i < numplots:
-    zi = scipy.ndimage.map_coordinates(g2[i], numpy.vstack((x, y)), order = 1)
+    z1, r1, distance, zi = walldata.line(g2[i], z0, theta, dx, num)
     angline[i].set_data([z0, z1], [0, r1])
-    gslice[i].set_data(numpy.linspace(0, rlen, num), zi)
+    gslice[i].set_data(distance, zi)
     i += 1
 
 def plot():
@@ -78,20 +61,18 @@ def plot():
     i += 1
   plot1d()
   pylab.draw()
+  walls.prefetch(ff, z0, plots)
 
 def read_walls(ff, z0, fun):
-  if fun == 'mc':
-    filename = "figs/mc/wallsMC-pair-%1.1f-%1.2f.dat" % (ff, z0)
-  elif fun == 'sphere-dft':
-    filename = "figs/wallsWB-with-sphere-%04.2f.dat" % ff
-  else:
-    filename = "figs/walls/wallsWB-%s-pair-%1.2f-%1.2f.dat" %(fun, ff, z0)
+  filename = walldata.filename(ff, z0, fun)
   print('Using', filename)
   if (os.path.isfile(filename) == False):
     print("File does not exist:", filename)
     sys.exit(1)
-  data = numpy.loadtxt(filename)
-  return data
+  return walls.get(ff, z0, fun)
+
+# the grids we have read, and those we expect to want next
+walls = walldata.Walls()
 
 gmax = 4
 xlo = 0.85/gmax
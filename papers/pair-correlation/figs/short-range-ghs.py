@@ -6,13 +6,14 @@ import matplotlib, sys, os.path
 if len(sys.argv) < 2 or sys.argv[1] != "show":
   matplotlib.use('Agg')
 import sympy
-from scipy.optimize import leastsq
 from sympy import pi, exp
 import pylab, numpy
 
 from matplotlib import rc
 
 import styles
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/../..')
+import symfit
 
 rc('text', usetex=True)
 
@@ -96,17 +97,12 @@ ghs_s = expr[0]()
 
 # now that we have ghs defined, we want to do a best fit to find the kappas
 print('I see g(r) = ', ghs_s.subs(sympy.symbols('h_sigma'), sympy.symbols('g_sigma') - 1))
-lam = sympy.utilities.lambdify(('kappa_11', 'kappa_12', 'kappa_13', 'kappa_14',
-                                'kappa_21', 'kappa_22', 'kappa_23', 'kappa_24',
-                                'kappa_31', 'kappa_32', 'kappa_33', 'kappa_34',
-                                'kappa_41', 'kappa_42', 'kappa_43', 'kappa_44',
-                                'alpha', 'g_sigma', 'r'),
-                               ghs_s.subs(sympy.symbols('h_sigma'), sympy.symbols('g_sigma') - 1), 'numpy')
+# the model (and its derivatives) as numpy functions of the kappas,
+# alpha, h_sigma and r
+model = symfit.Model(ghs_s, positive_variables, ['h_sigma', 'r'])
 
 def evalg(x, g_sigma, r):
-  return lam(x[0], x[1], x[2], x[3], x[4], x[5], x[6], x[7], x[8], x[9], x[10], x[11], x[12],
-             x[13], x[14], x[15], x[16],
-             g_sigma, r)
+  return model(x, g_sigma - 1, r)
 
 fit_rcutoff = styles.short_range
 def read_ghs(base, ff):
@@ -170,33 +166,16 @@ def dist2(x):
   return gfit - pylab.reshape([g[r<fit_rcutoff] for g in ghs],
                               len(gsigmas)*len(r[r<fit_rcutoff]))
 
-ghsconcatenated = ghs[0]
-for i in range(1, len(ff)):
-  ghsconcatenated = pylab.concatenate((ghsconcatenated, ghs[i]))
-
-etaconcatenated = [0]*len(r)*len(eta)
-j = 0
-while (j < len(eta)):
-  i = 0
-  while (i < len(r)):
-    etaconcatenated[i + j*len(r)] = eta[j]
-    i += 1
-  j += 1
-
-rconcatenated = [0]*len(r)*len(eta)
-j = 0
-while (j < len(eta)):
-  i = 0
-  while (i < len(r)):
-    rconcatenated[i + j*len(r)] = r[i]
-    i += 1
-  j += 1
-
-vals = pylab.zeros_like(x)
+# the eta and r of each point of the fit, in the order of dist2
+R, ETA = pylab.meshgrid(r[r<fit_rcutoff], eta)
+etaconcatenated = ETA.ravel()
+rconcatenated = R.ravel()
+R, GSIGMAS = pylab.meshgrid(r[r<fit_rcutoff], gsigmas)
+ghsfit = [g[r<fit_rcutoff] for g in ghs]
 
 chi2 = sum(dist2(x)**2)
 print("beginning least squares fit, chi^2 initial: ", chi2)
-vals, mesg = leastsq(dist2, x)
+vals, mesg = model.fit(x, ghsfit, GSIGMAS - 1, R)
 # round fitted numbers
 digits = 3
 vals = pylab.around(vals, digits)
@@ -212,12 +191,8 @@ gdifference = dist2(vals)
 
 chisq = (gdifference**2).sum()
 maxerr = abs(gdifference).max()
-etamaxerr = 0
-rmaxerr = 0
-for i in range(len(gdifference)):
-  if abs(gdifference[i]) == maxerr:
-    etamaxerr = etaconcatenated[i]
-    rmaxerr = rconcatenated[i]
+etamaxerr = etaconcatenated[abs(gdifference).argmax()]
+rmaxerr = rconcatenated[abs(gdifference).argmax()]
 K11 = vals[0]
 K12 = vals[1]
 K13 = vals[2]
@@ -334,7 +309,7 @@ inline double short_range_radial_distribution(double g_sigma, double r) {
       digits, K31, digits, K32, digits, K33, digits, K34,
       digits, K41, digits, K42, digits, K43, digits, K44,
       digits, alpha,
-      fix_pows(sympy.ccode(v['h_sigma'])), v['sigma'], fix_pows(sympy.ccode(ghs_s)))
+      fix_pows(sympy.ccode(v['h_sigma'])), v['sigma'], fix_pows(model.ccode))
 
 latex_code += r"""
 \begin{dmath}
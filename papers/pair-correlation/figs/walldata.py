@@ -0,0 +1,131 @@
+#!/usr/bin/python
+# Serves the g^(2)(z0, z1, x1) wall grids to the interactive plots
+# (plot-mc.py), so that moving a slider doesn't mean parsing four big
+# text files again.  Each grid is parsed once and saved as a .npy file
+# next to the text file, which later runs memory-map.  The grids we
+# have read are kept in memory, up to maxsize of them, dropping the
+# least recently used, and a background thread reads the grids at the
+# neighboring z0 and filling fractions while we look at the plot.
+
+from __future__ import division, print_function
+import os, threading, collections
+import numpy, scipy.ndimage
+try:
+  import queue
+except ImportError:
+  import Queue as queue # python 2
+
+def filename(ff, z0, fun):
+  if fun == 'mc':
+    return "figs/mc/wallsMC-pair-%1.1f-%1.2f.dat" % (ff, z0)
+  elif fun == 'sphere-dft':
+    return "figs/wallsWB-with-sphere-%04.2f.dat" % ff
+  return "figs/walls/wallsWB-%s-pair-%1.2f-%1.2f.dat" % (fun, ff, z0)
+
+def load(fname):
+  """The grid in the text file fname, memory-mapped from the .npy
+  copy we save next to it (again, whenever the text file is newer)."""
+  npy = fname + '.npy'
+  try:
+    if os.path.getmtime(npy) >= os.path.getmtime(fname):
+      return numpy.load(npy, mmap_mode='r')
+  except (IOError, OSError, ValueError):
+    pass
+  data = numpy.loadtxt(fname)
+  try:
+    # write a temporary file and rename it, so a reader never sees a
+    # half-written copy.
+    with open(npy + '.tmp', 'wb') as f:
+      numpy.save(f, data)
+    os.rename(npy + '.tmp', npy)
+  except (IOError, OSError):
+    pass # e.g. a read-only directory, so we'll parse it next time too
+  return data
+
+class Walls(object):
+  """The grids of each (ff, z0, fun), at most maxsize in memory."""
+  def __init__(self, maxsize=64):
+    self.maxsize = maxsize
+    self._grids = collections.OrderedDict() # least recently used first
+    self._lock = threading.Lock() # for _grids
+    self._reading = threading.Lock() # one load at a time
+    self._todo = queue.Queue()
+    worker = threading.Thread(target=self._prefetcher)
+    worker.daemon = True
+    worker.start()
+
+  def _cached(self, fname):
+    with self._lock:
+      if fname in self._grids:
+        self._grids[fname] = self._grids.pop(fname) # now the most recent
+        return self._grids[fname]
+    return None
+
+  def _read(self, fname):
+    with self._reading:
+      grid = self._cached(fname) # the prefetcher may have beaten us
+      if grid is None:
+        grid = load(fname)
+        with self._lock:
+          self._grids[fname] = grid
+          while len(self._grids) > self.maxsize:
+            self._grids.popitem(last=False)
+    return grid
+
+  def get(self, ff, z0, fun):
+    fname = filename(ff, z0, fun)
+    grid = self._cached(fname)
+    if grid is None:
+      grid = self._read(fname)
+    return grid
+
+  def prefetch(self, ff, z0, funs, dz=0.1, reach=2):
+    """Read in the background the grids within reach steps of dz in
+    z0, and those at the neighboring filling fractions, nearest first."""
+    todo = [(ff, z0 + k*dz) for j in range(1, reach+1) for k in (j, -j)]
+    todo += [(ff + dff, z0) for dff in (0.1, -0.1)]
+    # forget the neighbors of where we were before
+    while True:
+      try:
+        self._todo.get_nowait()
+      except queue.Empty:
+        break
+    for ff, z0 in todo:
+      if 0 < z0 < 10 and 0 < ff < 0.55:
+        for fun in funs:
+          self._todo.put(filename(ff, z0, fun))
+
+  def _prefetcher(self):
+    while True:
+      fname = self._todo.get()
+      if self._cached(fname) is None and os.path.isfile(fname):
+        try:
+          self._read(fname)
+        except Exception:
+          pass # we'll find out what's wrong when we ask for it
+
+def line(g2, z0, theta, dx=0.1, num=1000):
+  """g2 (interpolated linearly) along the line from (z0, 0) at angle
+  theta to the z axis to the edge of the grid.  Returns the end (z1,
+  r1) of the line, the distances along it and g2 at them."""
+  zvals = len(g2[0,:])
+  rvals = len(g2[:, 0])
+  zmax = zvals*dx
+  rmax = rvals*dx
+  if theta < numpy.arctan(1/2):
+    z1 = zmax
+    r1 = (z1-z0)*numpy.tan(theta)
+  elif theta < numpy.pi - numpy.arctan(1/2):
+    r1 = rmax
+    z1 = r1/numpy.tan(theta) + z0
+  else:
+    z1 = -zmax
+    r1 = (z1-z0)*numpy.tan(theta)
+  rlen = numpy.sqrt((z1-z0)**2 + r1**2)
+  z0coord = zvals*(z0-0.05)/zmax
+  z1coord = zvals*(z1)/zmax
+  r0coord = 0
+  r1coord = rvals*(r1)//rmax
+  y, x = numpy.linspace(z0coord, z1coord, num), numpy.linspace(r0coord, r1coord, num)
+  gline = scipy.ndimage.map_coordinates(g2, numpy.vstack((x, y)), order = 1)
+  return z1, r1, numpy.linspace(0, rlen, num), gline
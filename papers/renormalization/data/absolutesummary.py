@@ -0,0 +1,145 @@
+#!/usr/bin/python2
+from __future__ import division, print_function
+import os, re, json, multiprocessing
+import numpy as np
+
+# Summaries of the absolute free energy runs of each N.  Each step
+# absolute/NNNNN.dat of such a run ends with counts of how often its
+# configurations fit in the smaller cell of the next step, and the
+# hard-sphere excess entropy is the sum of the log of those ratios.
+# Rather than reading every step of every N each time we want the
+# entropy, we read them once (in parallel) and keep the per-step
+# counts, ratios and errors in absolute/summary.json, next to the
+# data.  A step is only read again if its file changes, so when new
+# steps land we only read those.
+#
+# The error we give for each ratio p is that of a binomial with
+# "total checks of small cell" trials, so that ln p has a variance of
+# (1-p)/(p*total).  The checks are correlated, so this underestimates
+# the real error, but it tells us which steps need more statistics.
+
+summary_name = 'summary.json'
+
+def read_step(fname):
+    """The (total, valid) small-cell checks of one step, and its N."""
+    total = 0
+    valid = 0
+    N = None
+    with open(fname) as f:
+        for line in f:
+            if line.startswith('# N:'):
+                N = int(line.split()[-1])
+            if 'total checks of small cell:' in line:
+                total = int(line.split()[-1])
+            if 'valid small checks:' in line:
+                valid = int(line.split()[-1])
+    return total, valid, N
+
+def _stamp(fname):
+    st = os.stat(fname)
+    return [st.st_mtime, st.st_size]
+
+def _steps(absdir):
+    """The NNNNN.dat files of absdir that we can use, which are the
+    ones numbered consecutively from 00000."""
+    names = set(name for name in os.listdir(absdir) if re.match(r'^\d{5}\.dat$', name))
+    steps = []
+    while '%05d.dat' % len(steps) in names:
+        steps.append('%05d.dat' % len(steps))
+    return steps
+
+def _load(absdir):
+    try:
+        with open(os.path.join(absdir, summary_name)) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+def _to_read(absdir, old):
+    """The steps of absdir with their stamps, and those we need to (re)read."""
+    known = {}
+    if old is not None:
+        known = dict((step['name'], step) for step in old['steps'])
+    steps = [(name, _stamp(os.path.join(absdir, name))) for name in _steps(absdir)]
+    stale = [name for name, stamp in steps
+             if name not in known or known[name]['stamp'] != stamp]
+    return steps, known, stale
+
+def _read(fname):
+    return fname, read_step(fname)
+
+def _summarize(absdir, steps, known, counts):
+    summary = {'steps': [], 'N': None}
+    for name, stamp in steps:
+        if name in counts:
+            total, valid, N = counts[name]
+        else:
+            total, valid, N = [known[name][k] for k in ('total', 'valid', 'N')]
+        summary['N'] = summary['N'] or N
+        step = {'name': name, 'stamp': stamp, 'total': total, 'valid': valid, 'N': N,
+                'ratio': None, 'error': None}
+        if total > 0:
+            p = valid/total
+            step['ratio'] = p
+            step['error'] = float(np.sqrt((1-p)/(p*total))) if valid > 0 else float('inf')
+        summary['steps'].append(step)
+    summary['outs'] = len([n for n in os.listdir(absdir) if n.endswith('.out')])
+    if all(step['ratio'] is not None for step in summary['steps']):
+        with np.errstate(divide='ignore'):
+            summary['S'] = float(sum(np.log(step['ratio']) for step in summary['steps']))
+        summary['dS'] = float(np.sqrt(sum(step['error']**2 for step in summary['steps'])))
+    else:
+        summary['S'] = None # some step has no small-cell checks yet
+        summary['dS'] = None
+    return summary
+
+def summaries(absdirs, processes=None):
+    """The summary of each of the absolute/ directories absdirs,
+    reading the steps that are new or have changed in parallel, and
+    saving the summaries that changed."""
+    plans = []
+    stale = []
+    for absdir in absdirs:
+        old = _load(absdir)
+        steps, known, names = _to_read(absdir, old)
+        plans.append((absdir, old, steps, known))
+        stale.extend(os.path.join(absdir, name) for name in names)
+    if len(stale) > 1 and processes != 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            counts = dict(pool.map(_read, stale, chunksize=max(1, len(stale)//64)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        counts = dict(_read(fname) for fname in stale)
+    results = []
+    for absdir, old, steps, known in plans:
+        summary = _summarize(absdir, steps, known,
+                             dict((name, counts[os.path.join(absdir, name)])
+                                  for name, stamp in steps
+                                  if os.path.join(absdir, name) in counts))
+        if summary != old:
+            try:
+                with open(os.path.join(absdir, summary_name + '.tmp'), 'w') as f:
+                    json.dump(summary, f, sort_keys=True)
+                os.rename(os.path.join(absdir, summary_name + '.tmp'),
+                          os.path.join(absdir, summary_name))
+            except (IOError, OSError):
+                pass # we can still use the summary without saving it
+        results.append(summary)
+    return results
+
+def summary(absdir, processes=None):
+    return summaries([absdir], processes)[0]
+
+def finished(summary):
+    """True if every step has its .dat and we could use them all."""
+    return (len(summary['steps']) > 0 and len(summary['steps']) == summary['outs']
+            and summary['S'] is not None)
+
+if __name__ == '__main__':
+    import sys
+    # e.g. absolutesummary.py scrunched-ww1.30-L2.84/i1/N*/absolute
+    for absdir, s in zip(sys.argv[1:], summaries(sys.argv[1:])):
+        print('%s: %d steps, S = %s +/- %s' % (absdir, len(s['steps']), s['S'], s['dS']))
@@ -4,6 +4,7 @@ import os, sys, re
 import os
 import shutil
 import numpy as np
+import runcatalog
 
 #sorts the data files by:
 
@@ -12,39 +13,23 @@ def check(fbase=None):
 	if fbase==None: return
 	if len(fbase)>0 and fbase[-1]!='/': fbase=fbase+'/'
 	if len(fbase)>0 and fbase[0]!='/': base='/'+fbase
-	outFiles=[]
-	dosFiles=[]#does files is to verify a dos file was created
-	L=None
-	ww=None
-	if False==os.path.isfile(fbase+'lv-data.out'): return False
-	with open(fbase+'lv-data.out','r') as file:
-		for line in file:
-			if '--L' in line: L=float(line.split('--L ')[1])
-			if '--w' in line: ww=float(line.split('--ww ')[1])
+	#what lv-data.out and the absolute/*.out files say comes from
+	#the run catalog, which only rereads the files that changed
+	run=runcatalog.run(fbase)
+	if run==None or 'lv-data.out' not in run['files']: return False
+	L=run['L']
 	if L==None: print "checkAbsolute did not find L"; return False
-	dirname = fbase+'absolute/'
-	if not os.path.isdir(dirname): return False
+	if run['absolute']==None: return False
+	steps=run['absolute']['steps']
 	i=-1
 	Ls=[]
 	while True:
-		Lnow=None
-		Lscalar=None
 		i+=1
-		fname=dirname+'%.5d.out'%i
-		if not os.path.isfile(fname): break
-		read=open(fname,'r')
-		lines=read.readlines()
-		read.close()
-		maxPercentDone=0.0
-		for line in lines:
-			if 'complete' in line:
-				nextPercentDone=float(line.split('(')[1].split('%')[0])
-				maxPercentDone=max(maxPercentDone,nextPercentDone)
-			if 'cell dimensions' in line:
-				Lnow=float(line.split('(')[1].split(',')[0])
-			if 'scaling factor' in line:
-				Lscalar=float(line.split('Using scaling factor of ')[1])
-		if maxPercentDone<100.0:
+		step=steps.get('%.5d.out'%i)
+		if step==None: break
+		Lnow=step['L']
+		Lscalar=step['scale']
+		if step['complete']<100.0:
 			break
 		if Lnow==None:
 			print "could not find current box size"
@@ -4,6 +4,7 @@ import os, sys, re
 import os
 import shutil
 import numpy as np
+import runcatalog
 
 #sorts the data files by:
 
@@ -12,16 +13,8 @@ def check(fbase=None):
 	if fbase==None: return
 	if len(fbase)>0 and fbase[-1]!='/': fbase=fbase+'/'
 	if len(fbase)>0 and fbase[0]!='/': base='/'+fbase
-	outFiles=[]
-	dosFiles=[]#does files is to verify a dos file was created
-	L=None
-	ww=None
-	maxPercentDone=0.0
-	with open(fbase+'lv-data.out','r') as file:
-		for line in file:
-			if "done" in line:
-				nextPercentDone=float(line.split('% done')[0].split('(')[1])
-				maxPercentDone=max(maxPercentDone,nextPercentDone)
-	if maxPercentDone<100.0: return False
-	return True
-
+	#the run catalog only rereads lv-data.out if it changed since
+	#the last time we looked
+	run=runcatalog.run(fbase)
+	if run==None or 'lv-data.out' not in run['files']: raise IOError('no lv-data.out in '+fbase)
+	return runcatalog.liquid_vapor_finished(run)
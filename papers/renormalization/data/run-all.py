@@ -2,6 +2,10 @@
 
 import sys, os
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/../..')
+import sweep
+import runjobs
+
 if len(sys.argv) < 4:
     print "usage: %s RECURSION-LEVEL WELL-WIDTH LENGTH" % (sys.argv[0])
     exit(1)
@@ -27,31 +31,31 @@ if len(sys.argv) >= 5 and sys.argv[4][0] == '[': # Hokey!!!
 else:
     Ns = range(2,4*(8**i)+1)
 
-have_srun = os.system('squeue') == 0
+have_srun = sweep.have_command('squeue')
 
-if '-O' in sys.argv:  # Check for overwrite flag in arguments
-    cmd_mc = "python run-monte-carlo.py %d %g %g '%s' -O" %(i,ww,L,Ns)
-    if have_srun:
-        cmd_mc += ' --srun'
-    print(cmd_mc)
-    os.system(cmd_mc)
+Overwrite = '-O' in sys.argv  # Check for overwrite flag in arguments
+with_abs = Overwrite or '--no-abs' not in sys.argv
 
-    cmd_fe = 'python run-absolute.py %d %g %g "%s" -O' % (i,ww,L,Ns)
-    if have_srun:
-        cmd_fe += ' --srun'
-    print(cmd_fe)
-    os.system(cmd_fe)
-else:
-    if '--no-abs' not in sys.argv:
-        cmd_fe = 'python run-absolute.py %d %g %g "%s"' % (i,ww,L,Ns)
-        if have_srun:
-            cmd_fe += ' --srun'
-        print(cmd_fe)
-        os.system(cmd_fe)
-
-    cmd_mc = "python run-monte-carlo.py %d %g %g '%s'" %(i,ww,L,Ns)
-    if have_srun:
-        cmd_mc += ' --srun'
-    print(cmd_mc)
-    os.system(cmd_mc)
+# All the jobs go in one sweep, so that the liquid-vapor run of each N
+# can come after the steps of its absolute free energy, and that sweep
+# runs one job per core when we don't have srun.  If this is
+# interrupted, just run it again: finished jobs are skipped.
+
+if with_abs:
+    runjobs.build_absolute()
+runjobs.build_liquid_vapor()
+
+jobs = sweep.Sweep(ledger='scrunched-ww%4.2f-L%04.2f/i%01d/sweep.json' % (ww,L,i),
+                   backend='srun' if have_srun else 'local',
+                   overwrite=Overwrite)
+
+for N in Ns:
+    if Overwrite:
+        os.system('rm -rf ' + runjobs.run_dir(i, ww, L, N))
+    last_step = None
+    if with_abs:
+        last_step = runjobs.add_absolute(jobs, i, ww, L, N)
+    runjobs.add_liquid_vapor(jobs, i, ww, L, N,
+                             after=[last_step] if last_step else [])
 
+jobs.run()
@@ -0,0 +1,220 @@
+#!/usr/bin/python2
+from __future__ import division, print_function
+import os, re, json
+
+# A catalog of our renormalization runs, so that the analysis scripts
+# don't have to probe the filesystem for every N from 2 to 6000 (and
+# glob the absolute/ directory twice for each) to find out which runs
+# exist.  We walk
+#
+#    scrunched-ww*-L*/i*/N*/
+#
+# once with scandir and record, for every N directory, its files,
+# whether it has a density of states, how far along lv-data.out says
+# the Monte Carlo is ("% done"), and what each step of the absolute
+# free energy calculation (absolute/NNNNN.out) has done.  The catalog
+# of each i* directory is kept in its run-catalog.json.  When we scan
+# again we only relist directories whose mtime changed, and only
+# reread output files of runs that had not yet finished, so a rescan
+# of finished runs costs a couple of stat calls per N.
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir # python2 has it as a package
+    except ImportError:
+        scandir = None
+
+catalog_name = 'run-catalog.json'
+
+_levels = {} # maps i* directory to its runs, once scanned
+
+def _entries(path):
+    """(name, is_dir, stat) for each entry of path."""
+    if scandir is not None:
+        return [(e.name, e.is_dir(), e.stat()) for e in scandir(path)]
+    entries = []
+    for name in os.listdir(path):
+        st = os.stat(os.path.join(path, name))
+        entries.append((name, os.path.isdir(os.path.join(path, name)), st))
+    return entries
+
+def _stamp(st):
+    return [st.st_mtime, st.st_size]
+
+def _read_out(fname, size):
+    """Parse the log of a Monte Carlo run (lv-data.out), reading just
+    its beginning (for the command line) and its end (for "% done")."""
+    info = {'percent_done': 0.0, 'L': None, 'ww': None}
+    with open(fname) as f:
+        head = f.read(8192)
+        if size > 65536:
+            f.seek(size - 65536)
+        tail = f.read()
+    for line in head.splitlines():
+        if '--L' in line:
+            info['L'] = float(line.split('--L ')[1].split()[0])
+        if '--ww' in line:
+            info['ww'] = float(line.split('--ww ')[1].split()[0])
+    for line in (head + tail).splitlines():
+        if '% done' in line and '(' in line:
+            try:
+                done = float(line.split('% done')[0].split('(')[1])
+            except ValueError:
+                continue # a line cut in half by the seek
+            info['percent_done'] = max(info['percent_done'], done)
+    return info
+
+def _read_step(fname):
+    """Parse the log of one step of an absolute free energy run."""
+    step = {'complete': 0.0, 'L': None, 'scale': None}
+    with open(fname) as f:
+        for line in f:
+            if 'complete' in line:
+                step['complete'] = max(step['complete'],
+                                       float(line.split('(')[1].split('%')[0]))
+            if 'cell dimensions' in line:
+                step['L'] = float(line.split('(')[1].split(',')[0])
+            if 'scaling factor' in line:
+                step['scale'] = float(line.split('Using scaling factor of ')[1])
+    return step
+
+def _scan_absolute(path, old, st):
+    if old is not None and old['mtime'] == st.st_mtime and all(
+            s['complete'] >= 100 for s in old['steps'].values()):
+        return old # nothing here has changed
+    entries = _entries(path)
+    names = sorted(name for name, is_dir, s in entries)
+    stats = dict((name, s) for name, is_dir, s in entries)
+    steps = {}
+    for name in names:
+        if re.match(r'^\d{5}\.out$', name):
+            previous = old['steps'].get(name) if old is not None else None
+            if previous is not None and previous['stamp'] == _stamp(stats[name]):
+                steps[name] = previous
+            else:
+                steps[name] = _read_step(os.path.join(path, name))
+                steps[name]['stamp'] = _stamp(stats[name])
+    return {'mtime': st.st_mtime,
+            'dat': len([n for n in names if n.endswith('.dat')]),
+            'out': len([n for n in names if n.endswith('.out')]),
+            'first': '00000.dat' in names,
+            'Sexc': 'Sexc.dat' in names,
+            'steps': steps}
+
+def _scan_run(path, old, st):
+    finished = old is not None and (old['percent_done'] or 0) >= 100
+    if old is not None and old['mtime'] == st.st_mtime:
+        names = old['files']
+        if finished:
+            entries = None
+        else:
+            entries = [(name, None, os.stat(os.path.join(path, name)))
+                       for name in ('lv-data.out', 'lv-data-dos.dat') if name in names]
+            if 'absolute' in names:
+                entries.append(('absolute', True, os.stat(os.path.join(path, 'absolute'))))
+    else:
+        entries = _entries(path)
+        names = sorted(name for name, is_dir, s in entries)
+    run = dict(old) if old is not None else {'percent_done': None, 'L': None, 'ww': None,
+                                             'out': None, 'dos': False, 'absolute': None}
+    run['mtime'] = st.st_mtime
+    run['files'] = names
+    if entries is None:
+        stats = {}
+        if 'absolute' in names:
+            stats['absolute'] = os.stat(os.path.join(path, 'absolute'))
+    else:
+        stats = dict((name, s) for name, is_dir, s in entries)
+    if 'lv-data.out' in stats and run['out'] != _stamp(stats['lv-data.out']):
+        run.update(_read_out(os.path.join(path, 'lv-data.out'), stats['lv-data.out'].st_size))
+        run['out'] = _stamp(stats['lv-data.out'])
+    if 'lv-data-dos.dat' in stats:
+        run['dos'] = stats['lv-data-dos.dat'].st_size > 0
+    elif 'lv-data-dos.dat' not in names:
+        run['dos'] = False
+    if 'absolute' in stats:
+        run['absolute'] = _scan_absolute(os.path.join(path, 'absolute'),
+                                         run['absolute'], stats['absolute'])
+    elif 'absolute' not in names:
+        run['absolute'] = None
+    return run
+
+def runs(idir, rescan=False):
+    """The runs of the recursion level idir (e.g.
+    data/scrunched-ww1.30-L2.84/i1), as a dict mapping N to what we
+    know about the run.  We scan the directory the first time we are
+    asked about it (or when rescan is True)."""
+    idir = os.path.normpath(idir)
+    if idir in _levels and not rescan:
+        return _levels[idir]
+    catalog_file = os.path.join(idir, catalog_name)
+    old = {}
+    if os.path.exists(catalog_file):
+        try:
+            with open(catalog_file) as f:
+                old = dict((int(N), run) for N, run in json.load(f).items())
+        except ValueError:
+            old = {} # a corrupt catalog just means starting over
+    found = {}
+    if os.path.isdir(idir):
+        for name, is_dir, st in _entries(idir):
+            if is_dir and re.match(r'^N\d+$', name):
+                N = int(name[1:])
+                found[N] = _scan_run(os.path.join(idir, name), old.get(N), st)
+        if found != old:
+            try:
+                with open(catalog_file + '.tmp', 'w') as f:
+                    json.dump(dict((str(N), run) for N, run in found.items()), f,
+                              sort_keys=True)
+                os.rename(catalog_file + '.tmp', catalog_file)
+            except (IOError, OSError):
+                pass # we can still use the catalog without saving it
+    _levels[idir] = found
+    return found
+
+def run(fbase, rescan=False):
+    """What we know about the run in the directory fbase (e.g.
+    .../i1/N024/), or None if there is no such run."""
+    fbase = os.path.normpath(fbase)
+    name = os.path.basename(fbase)
+    if not re.match(r'^N\d+$', name):
+        return None
+    return runs(os.path.dirname(fbase), rescan).get(int(name[1:]))
+
+def scan(root, rescan=False):
+    """Walk every scrunched-ww*-L*/i* directory under root, returning a
+    sorted list of (ww, L, i, idir, runs) for its recursion levels."""
+    levels = []
+    for name, is_dir, st in _entries(root):
+        m = re.match(r'^scrunched-ww([0-9.]+)-L([0-9.]+)$', name)
+        if not (is_dir and m):
+            continue
+        for iname, i_is_dir, ist in _entries(os.path.join(root, name)):
+            if i_is_dir and re.match(r'^i\d+$', iname):
+                idir = os.path.join(root, name, iname)
+                levels.append((float(m.group(1)), float(m.group(2)), int(iname[1:]),
+                               idir, runs(idir, rescan)))
+    return sorted(levels, key=lambda level: level[:3])
+
+def has_dos(run):
+    return run is not None and run['dos']
+
+def absolute_finished(run):
+    """True if we have a hard-sphere entropy for this run, or all of
+    its absolute steps have written their .dat files."""
+    a = run is not None and run['absolute']
+    return bool(a) and (a['Sexc'] or (a['dat'] == a['out'] and a['first']))
+
+def liquid_vapor_finished(run):
+    return run is not None and (run['percent_done'] or 0) >= 100
+
+if __name__ == '__main__':
+    import sys
+    root = sys.argv[1] if len(sys.argv) > 1 else '.'
+    for ww, L, i, idir, level in scan(root, rescan=True):
+        print('ww %g L %g i %d: %d runs, %d with a dos, %d with absolute done, %d finished'
+              % (ww, L, i, len(level), len([N for N in level if has_dos(level[N])]),
+                 len([N for N in level if absolute_finished(level[N])]),
+                 len([N for N in level if liquid_vapor_finished(level[N])])))
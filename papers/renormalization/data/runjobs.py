@@ -0,0 +1,136 @@
+#!/usr/bin/python2
+from __future__ import division, print_function
+import os, numpy as np
+
+# The Monte Carlo jobs of a renormalization run, which run-absolute.py,
+# run-monte-carlo.py and run-all.py add to their sweep.  For each N
+#
+#  * the absolute free energy is found in steps of increasing filling
+#    fraction (absolute/NNNNN.dat), each step coming after the one
+#    before it, and
+#  * the liquid-vapor run (lv-data-dos.dat) may be asked to come after
+#    the last of those steps.  run-all.py does so, so that each N is
+#    finished as a whole, rather than all the absolute steps and then
+#    all the liquid-vapor runs.
+#
+# Each function returns the name of its (last) job, for use in after.
+
+R = 1
+
+def build_absolute():
+    assert(not os.system("fac ../../../free-energy-monte-carlo ../../../free-energy-monte-carlo-infinite-case"))
+
+def build_liquid_vapor():
+    assert(not os.system("fac ../../../liquid-vapor-monte-carlo"))
+
+def free_energy_over_kT_to_ff(free_energy): # Find an ff that corresponds to given free energy
+    # bisection
+    n = 0
+    low,high = 0,1
+    resolution = 1E-8
+    while n < 500: #better value?
+        ff_guess = (low+high)/2
+        free_energy_next =  (4*ff_guess - 3*ff_guess**2)/(1-ff_guess)**2
+        if abs(free_energy_next - free_energy) < resolution:
+            return ff_guess
+        elif free_energy_next > free_energy:
+            high = (high+low)/2
+        else:
+            low = (high +low)/2
+        n+=1
+    return ff_guess
+
+def run_dir(i, ww, L, N):
+    return 'scrunched-ww%4.2f-L%04.2f/i%01d/N%03d' % (ww,L,i,N)
+
+def add_absolute(jobs, i, ww, L, N, clean=False):
+    """Add the steps of the absolute free energy of N to jobs, removing
+    any old ones first if clean."""
+    L_i = L*(2**i)
+    # The maximum free energy is near the point where
+    # Carnahan-Starling predict a filling fraction of 0.7, which is
+    # not reasonable to simulate.
+    approximate_free_energies = np.arange(np.log(2), 3000*N, np.log(2))/N
+    ffs = np.zeros_like(approximate_free_energies)
+    for k in xrange(len(ffs)):
+        ffs[k] = free_energy_over_kT_to_ff(approximate_free_energies[k])
+
+    dirname = run_dir(i, ww, L, N) + '/absolute'
+    if clean:
+        os.system('rm -rf '+dirname)
+    print('mkdir -p '+dirname)
+    os.system('mkdir -p '+dirname)
+
+    sim_runs = 1000000
+    sc_period = int(max(10, 1*N*N/10))
+
+    ff_goal = (4*np.pi/3*R**3)*N/(L_i)**3 # this is the density
+
+    prev = None
+    for j in xrange(len(ffs)-2):
+        filename = '%05d' % (j)
+        ff = ffs[j]
+        ff_next = ffs[j+1]
+        if ffs[j+2] > ff_goal:
+            ff_next = ff_goal
+
+        output_file_path = dirname+'/'+filename+'.dat'
+        if j==0:
+            cmd = '../../../free-energy-monte-carlo-infinite-case'
+            cmd += ' --ff_small %g' % ff_next
+            # do infinite case for first step always
+            cmd += ' --counts %d' % sim_runs
+        else:
+            cmd = '../../../free-energy-monte-carlo'
+            cmd += ' --ff_small %g' % ff_next
+            cmd += ' --ff %g' % ff
+            cmd += ' --sc_period %d' % sc_period
+            cmd += ' --runs %d' % sim_runs
+        cmd += ' --N %d' % N
+        cmd += ' --filename %s' % filename
+        cmd += ' --data_dir %s' % dirname
+        # The absolute free energy is the sum over all the steps up to
+        # this one, so we take them in order: then an interrupted sweep
+        # leaves N with the steps we can already add up, rather than
+        # with scattered ones that are no use until the gaps are filled.
+        prev = jobs.add('L%04.2f/i%01d/N%03d/abs/%s' % (L,i,N, filename), cmd,
+                        outputs=[output_file_path],
+                        after=[prev] if prev else [],
+                        log='%s/%s.out' % (dirname, filename))
+
+        if ffs[j+2] > ff_goal:
+            # We are all done now!
+            # This automagically handles when ff > ff_goal!
+            break
+    return prev
+
+def add_liquid_vapor(jobs, i, ww, L, N, clean=False, after=()):
+    """Add the liquid-vapor run of N to jobs, removing the whole N
+    directory first if clean."""
+    L_i = L*(2**i)
+    dirname = run_dir(i, ww, L, N)
+    if clean:
+        os.system('rm -rf ' + dirname)
+    print('mkdir -p ' + dirname)
+    os.system('mkdir -p '+ dirname)
+    #filename = 'ww%4.2f-L%04.2f-N%03d' % ( ww, L, N)
+    filename = 'lv-data'
+    iterations = 1000000
+
+    output_file_path = dirname+'/'+filename+'-dos.dat'
+    cmd = '../../../liquid-vapor-monte-carlo'
+    cmd += ' --filename %s' % filename
+    cmd += ' --N %d' % N
+    cmd += ' --min-T 0.5'
+    cmd += ' --dir %s' % dirname
+    cmd += ' --min-samples 10000'
+    cmd += ' --tmi'
+    cmd += ' --ww %g' % ww
+    cmd += ' --iterations %d' %iterations
+    cmd += ' --lenx %g --leny %g --lenz %g' % (L_i,L_i,L_i)
+    # cmd = ("../../../liquid-vapor-monte-carlo --filename %s --N %d --min_T 0.1 --min_samples 10000 --golden --ww %g --iterations %d --lenx %g --leny %g --lenz %g --data_dir .  > %s.out 2>&1 &" %
+    #        (filename, N, ww, iterations, L, L, L, filename))
+    return jobs.add('lv-ww%4.2f-L%04.2f/i%01d/N%03d' % (ww,L,i,N), cmd,
+                    outputs=[output_file_path],
+                    after=after,
+                    log='%s/%s.out' % (dirname, filename))
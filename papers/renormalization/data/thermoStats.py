@@ -20,32 +20,35 @@ class ThermoStats:
         else:
 			if os.path.isfile(fbase+"absolute/Sexc.dat")==False: return
 			self.SatInfinity=float(np.loadtxt(fbase+"absolute/Sexc.dat"))
-        dataList=np.loadtxt(fbase+'lv-data-dos.dat')
+        # read the header and the data in one pass over the file
+        header=[]
+        rows=[]
+        with open(fbase+'lv-data-dos.dat','r') as file:
+            for line in file:
+                if line.startswith('#'): header.append(line)
+                elif line.strip(): rows.append(line)
+        dataList=np.loadtxt(rows,ndmin=2)
         dos=dataList[:,1]
         energy=dataList[:,0]
         #print fbase
+        # drop a run of repeated values at either end of the dos
+        keep=np.ones(len(dos),dtype=bool)
         if len(dos)>1 and dos[0]==dos[1]:
-	        while len(dos)>1 and dos[0]==dos[1]:
-	            dos=np.delete(dos,0,axis=0)
-	            energy=np.delete(energy,0,axis=0)
-	        dos=np.delete(dos,0,axis=0)
-	        energy=np.delete(energy,0,axis=0)
-        if len(dos)>1 and dos[-1]==dos[-2]:
-	        while len(dos)>1 and dos[-1]==dos[-2]:
-	            dos=np.delete(dos,-1,axis=0)
-	            energy=np.delete(energy,-1,axis=0)
-	        dos=np.delete(dos,-1,axis=0)
-	        energy=np.delete(energy,-1,axis=0)
-        self.dos=dos
-        self.energy=energy
+            differs=np.flatnonzero(dos!=dos[0])
+            keep[:differs[0] if len(differs) else len(dos)]=False
+        kept=np.flatnonzero(keep)
+        if len(kept)>1 and dos[kept[-1]]==dos[kept[-2]]:
+            differs=kept[dos[kept]!=dos[kept[-1]]]
+            keep[differs[-1]+1 if len(differs) else 0:]=False
+        self.dos=dos[keep]
+        self.energy=energy[keep]
         ww=None
         L=None
         N=None
-        with open(fbase+'lv-data-dos.dat','r') as file:
-            for line in file:
-                if 'N:' in line: N=int(line.split()[-1])
-                if 'cell dimensions' in line: L=float(line.split()[-1].split(")")[0])
-                if 'well_width' in line: ww=float(line.split()[-1])
+        for line in header:
+            if 'N:' in line: N=int(line.split()[-1])
+            if 'cell dimensions' in line: L=float(line.split()[-1].split(")")[0])
+            if 'well_width' in line: ww=float(line.split()[-1])
         if L==None: L=-1.0; print "did not find L"
         if ww==None: ww=-1.0; print "did not find ww"
         if N==None: N=-1.0; print "did not find N"
@@ -53,49 +56,54 @@ class ThermoStats:
         self.ff=4/3.0*np.pi*N/(L**3.0)
         self.L=L
         self.N=N
+        if len(self.dos)>0:
+            dosMax=np.max(self.dos)
+            self.zInfinity=np.log(np.sum(np.exp(self.dos-dosMax)))+dosMax
+        self.cache={}
         return
+
+    def thermo(self,T):
+        """ returns (lnZ,Uexc,Fexc) for each temperature in T, computing
+            them for all of the temperatures at once, and remembering
+            them for next time. """
+        T=np.asarray(T,dtype=float)
+        key=(T.shape,T.tobytes())
+        if key in self.cache: return self.cache[key]
+        z=self.dos+self.energy/T[...,np.newaxis]
+        zMax=np.max(z,axis=-1)
+        weights=np.exp(z-zMax[...,np.newaxis])
+        Z=np.sum(weights,axis=-1)
+        lnZ=np.log(Z)+zMax
+        Uexc=-np.sum(weights*self.energy,axis=-1)/Z/(self.L**3.0)
+        Fexc=(-T*(lnZ-self.zInfinity)-T*self.SatInfinity)/(self.L**3.0)
+        if len(self.cache)>10000: self.cache.clear()
+        self.cache[key]=(lnZ,Uexc,Fexc)
+        return self.cache[key]
+
     def findSexc(self,T):
         """ returns Uexc(n,T)/volume/T - (Fexc(n,T)/volume/T - Fexc(n,T=infinity)/volume/(T=infinity))
                     = Uexc(n,T)/volume/T - Fexc(n,T)/volume/T - Sexc(n,T=infinity)/volume
                     = Sexc(n,T)/volume - Sexc(n,T=infinity)/volume
                     = Sdisp(n,T)/volume - Sdisp(n,T=infinity)/volume """
-        return (self.findUexc(T)-self.findFexc(T))/T
+        lnZ,Uexc,Fexc=self.thermo(T)
+        return (Uexc-Fexc)/T
     
     def findUexc(self,T):
         """ return the excess internal energy (for each temperature
             in T), per unit volume, in
             units where the radius of the sphere is 1. """
-        energy=self.energy
-        dos=self.dos
-        z=dos+energy/T
-        energyWeights=np.log(energy)+dos+energy/T
-        zMax=np.max(z)
-        weightMax=np.max(energyWeights)
-        energyWeights=np.sum(exp(energyWeights-weightMax))
-        z=np.sum(np.exp(z-zMax))
-        return -np.exp(weightMax-zMax)*energyWeights/z/(self.L**3.0)
+        return self.thermo(T)[1]
     
     def findFexc(self,T):
         """ returns Fexc(n,T)/volume - T*Fexc(n,T=infinity)/volume/(T=infinity)
                     = Fexc(n,T)/volume + T*Sexc(n,T=infinity)/volume """
-        energy=self.energy
-        dos=self.dos
-        z=dos+energy/T
-        zMax=z.max()
-        dosMax=np.max(dos)
-        zInfinity=np.log(np.sum(np.exp(dos-dosMax)))+dosMax
-        return (-T*(log(np.sum(exp(z-zMax)))+zMax-zInfinity)-T*self.SatInfinity)/(self.L**3.0)
+        return self.thermo(T)[2]
         
     def generateData(self,T):
-        Uexc=np.zeros(len(T))
-        Sexc=np.zeros(len(T))
-        Fexc=np.zeros(len(T))
-        for i in range(0,len(T)):
-            Uexc[i]=self.findUexc(T[i])
-            Sexc[i]=self.findSexc(T[i])
-            Fexc[i]=self.findFexc(T[i])
+        T=np.asarray(T,dtype=float)
+        lnZ,Uexc,Fexc=self.thermo(T)
         self.Uexc=Uexc
-        self.Sexc=Sexc
+        self.Sexc=(Uexc-Fexc)/T
         self.Fexc=Fexc
         return
 
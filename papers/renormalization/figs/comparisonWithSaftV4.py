@@ -65,12 +65,12 @@ def FcostFixedFF(stats):
 		nMid=ffs[i]*(stats[0].L**3.0)/(4/3.0*np.pi) #what we want
 		nLeft=int(ffs[i]*(stats[0].L**3.0)/(4/3.0*np.pi))#assumes R=1.0
 		density=nMid/stats[0].L**3.0
-		for T in Ts:
-			Fleft=stats[nPairs[i][0]].findFexc(T)
-			Fright=stats[nPairs[i][1]].findFexc(T)
-			Fmid=Fleft+(Fright-Fleft)/(1.0)*(nMid-nLeft) #F0+(rise/run)*dn
-			diffSquared+=(Fmid-SW_Fexc(T, density))**2.0/density**2.0
-			weightTotal+=1
+		#all of the temperatures at once
+		Fleft=stats[nPairs[i][0]].findFexc(Ts)
+		Fright=stats[nPairs[i][1]].findFexc(Ts)
+		Fmid=Fleft+(Fright-Fleft)/(1.0)*(nMid-nLeft) #F0+(rise/run)*dn
+		diffSquared+=np.sum((Fmid-SW_Fexc(Ts, density))**2.0)/density**2.0
+		weightTotal+=len(Ts)
 	return (diffSquared/weightTotal)**0.5
 
 		
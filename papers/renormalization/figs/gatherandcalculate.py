@@ -3,15 +3,19 @@ from __future__ import division
 import numpy as np
 import math
 import string
-import os, glob
+import os, sys, glob
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/../data')
+import runcatalog, absolutesummary
 
 def lndos_energy_Ns(dbase):
     ln_dos = {}
     energy = {}
     Ns = []
-    for N in range(2, 6000): #maybe require N as an argument?
+    runs = runcatalog.runs(dbase)
+    for N in sorted(runs):
         fname = '%s/N%03d/lv-data-dos.dat' % (dbase, N)
-        if os.path.isfile(fname):
+        if runcatalog.has_dos(runs[N]):
             try:
                 ln_dos_hist = np.loadtxt(fname, ndmin=2)
                 ln_dos[N] = ln_dos_hist[:, 1]
@@ -25,79 +29,101 @@ def lndos_energy_Ns(dbase):
             pass
     return ln_dos, energy, np.array(Ns)
 
-def Sexc_hardsphere_Ns(dbase):
+def Sexc_hardsphere_Ns(dbase, errors=False):
     Ns = []
     S = []
-    for N in range(2, 6000): # maybe go higher?
-        fbase = '%s/N%03d/absolute/' % (dbase, N)
-        # we only try to add this N value if we have one .dat file,
-        # and our number of .dat files is the same as our number of
-        # .out files.  If the latter is not true, we probably have not
-        # finished running the absolute simulations.
-        if os.path.isfile(fbase+'Sexc.dat') or (len(glob.glob(fbase+'*.dat')) == len(glob.glob(fbase+'*.out')) and os.path.isfile(fbase+'00000.dat')):
-            try:
-                thisS = Sexc_hardsphere(dbase, N)
-                S.append(thisS)
-                Ns.append(N)
-            except:
-                print('no data for N =', N)
+    dS = []
+    runs = runcatalog.runs(dbase)
+    # we only try to add this N value if we have one .dat file,
+    # and our number of .dat files is the same as our number of
+    # .out files.  If the latter is not true, we probably have not
+    # finished running the absolute simulations.
+    finished = [N for N in sorted(runs) if runcatalog.absolute_finished(runs[N])]
+    # read the new steps of every N at once, in parallel
+    unsaved = [N for N in finished
+               if not os.path.isfile('%s/N%03d/absolute/Sexc.dat' % (dbase, N))]
+    summaries = dict(zip(unsaved, absolutesummary.summaries(
+        ['%s/N%03d/absolute' % (dbase, N) for N in unsaved])))
+    for N in finished:
+        try:
+            thisS, thisdS = Sexc_hardsphere_error(dbase, N, summaries.get(N))
+            S.append(thisS)
+            dS.append(thisdS)
+            Ns.append(N)
+        except:
+            print('no data for N =', N)
+    if errors:
+        return np.array(S), np.array(dS), np.array(Ns)
     return np.array(S), np.array(Ns)
 
 def Sexc_hardsphere(dbase, N):
+    return Sexc_hardsphere_error(dbase, N)[0]
+
+def Sexc_hardsphere_error(dbase, N, summary=None):
+    """The hard-sphere excess entropy of N spheres and its statistical
+    error, which is nan for a Sexc.dat someone wrote by hand."""
     fbase = '%s/N%03d/absolute/' % (dbase, N)
     if os.path.isfile(fbase+'Sexc.dat'):
-        return np.loadtxt(fbase+'Sexc.dat')
-    S = 0
-    # loop over files in the ./absolute/ directory
-    j = 0
+        return np.loadtxt(fbase+'Sexc.dat'), np.nan
+    if summary is None:
+        summary = absolutesummary.summary(fbase)
     # the following causes this function to fail if we have not
     # finished the necessary simulations.
-    assert(len(glob.glob(fbase+'*.dat')) == len(glob.glob(fbase+'*.out')))
-    while True:
-        valid = 0
-        total = 0
-        ratio = 0
-        fname = fbase + '%05d.dat' % (j)
-        # if file exists, load the text from the file
-        if os.path.isfile(fname):
-            #open file and read in total valid and failed checks of small cell
-            with open(fname) as file:
-                for line in file:
-                    if 'valid small checks:' in line:
-                        valid = int(line.split()[-1])
-                    if 'total checks of small cell:' in line:
-                        total = int(line.split()[-1])
-            # compute absolute S using read in data.
-            ratio = valid / total
-            S += np.log(ratio)
-        else:
-            # we have found the last data file and can stop now
-            break
-        j += 1
-    if S == 0:
+    assert(len(summary['steps']) == summary['outs'])
+    if summary['S'] is None:
+        raise ValueError('a step in %s has no checks of the small cell' % fbase)
+    if summary['S'] == 0:
         # only add the Stirling correction if we have actually found
         # the hard-sphere entropy.
-        return 0
+        return 0, 0
     # We need to correct for error of Stirling's approximation in
     # F_id.
-    return S - Stirling_correction(N)
+    return summary['S'] - Stirling_correction(N), summary['dS']
 
-def Uexc(ln_dos, energy, Ts):
-    Ns = sorted(list(ln_dos.keys()))
-    U = np.zeros((len(Ts), len(Ns)))
-    for j in range(len(Ns)):
-        N = Ns[j]
-        for k in range(len(Ts)):
-            T = Ts[k]
-            ln_dos_boltz = ln_dos[N] - energy[N]/T
+class StackedDOS(object):
+    """The ln_dos of every N padded into a single (N, E) array, so that
+    we can find thermodynamic quantities for every (T, N) at once."""
+    def __init__(self, ln_dos, energy):
+        self.Ns = np.array(sorted(ln_dos.keys()))
+        width = max(len(ln_dos[N]) for N in self.Ns)
+        # entries past the end of a given N's data have an ln_dos of
+        # -inf, so that they have no weight.
+        self.ln_dos = np.empty((len(self.Ns), width))
+        self.ln_dos[:] = -np.inf
+        self.energy = np.zeros((len(self.Ns), width))
+        for j in range(len(self.Ns)):
+            N = self.Ns[j]
+            self.ln_dos[j, :len(ln_dos[N])] = ln_dos[N]
+            self.energy[j, :len(energy[N])] = energy[N]
+        # The T = infinity partition function and energy, which we
+        # only need to find once.
+        top = self.ln_dos.max(axis=1)
+        dos = np.exp(self.ln_dos - top[:, np.newaxis])
+        self.lnZinf = np.log(dos.sum(axis=1)) + top
+        self.Uinf = (self.energy*dos).sum(axis=1)/dos.sum(axis=1)
+
+    def lnZ_U(self, Ts):
+        """ln Z and U (excess) indexed by [T, N]."""
+        Ts = np.asarray(Ts, dtype=float)
+        lnZ = np.zeros((len(Ts), len(self.Ns)))
+        U = np.zeros_like(lnZ)
+        # work on a few temperatures at a time, to limit our memory use
+        chunk = max(1, 2**22 // self.ln_dos.size)
+        for k in range(0, len(Ts), chunk):
+            T = Ts[k:k+chunk, np.newaxis, np.newaxis]
+            ln_dos_boltz = self.ln_dos - self.energy/T
             # Subtract of ln_dos_boltz.max() to keep dos_boltz reasonable
-            dos_boltz = np.exp(ln_dos_boltz - ln_dos_boltz.max())
-            U[k, j] = sum(energy[N]*dos_boltz)/sum(dos_boltz)
-    return U
+            offset = ln_dos_boltz.max(axis=2)
+            dos_boltz = np.exp(ln_dos_boltz - offset[:, :, np.newaxis])
+            Z = dos_boltz.sum(axis=2)
+            lnZ[k:k+chunk] = np.log(Z) + offset
+            U[k:k+chunk] = (self.energy*dos_boltz).sum(axis=2)/Z
+        return lnZ, U
 
-def Fexc(dbase, ln_dos, energy, volume, Ts):
-    Ns = sorted(list(ln_dos.keys()))
-    F = np.zeros((len(Ts), len(Ns)))
+def hardsphere_entropies(dbase, Ns, volume):
+    """The excess entropy of hard spheres for each N, from our Monte
+    Carlo if we have it and Carnahan-Starling if we do not."""
+    S = np.zeros(len(Ns))
     for j in range(len(Ns)):
         N = Ns[j]
         eta = N*4*np.pi/3/volume
@@ -114,53 +140,51 @@ def Fexc(dbase, ln_dos, energy, volume, Ts):
             # fall back on assuming Carnahan-Starling excess entropy
             # when we do not have a direct Monte Carlo result.
             Sexc_HS = Sexc_CS
-        for k in range(len(Ts)):
-            T = Ts[k]
-            ln_dos_boltz = ln_dos[N] - energy[N]/T
-            # Subtract of ln_dos_boltz.max() to keep dos_boltz reasonable
-            offset = ln_dos_boltz.max()
-            dos_boltz = np.exp(ln_dos_boltz - offset)
-            Z = sum(dos_boltz)
-            Zinf = sum(np.exp(ln_dos[N] - offset))
-            Uinf = sum(energy[N]*np.exp(ln_dos[N]-ln_dos[N].max()))/sum(np.exp(ln_dos[N]-ln_dos[N].max()))
-            if Zinf == 0:
-                # # Here we handle the case where our offset was *so*
-                # # huge that it made Zinf underflow to zero.  We
-                # # handle this (which so far works) by not using the
-                # # offset in these cases.
-                Z = sum(dos_boltz + offset)
-                Zinf = sum(np.exp(ln_dos[N]))
-                # print 'fixed: Z is', Z, 'and Zinf is', Zinf
-            F[k, j] = Uinf -T*Sexc_HS - T*np.log(Z/Zinf)
-    return F
+        S[j] = Sexc_HS
+    return S
+
+def Uexc(ln_dos, energy, Ts):
+    return StackedDOS(ln_dos, energy).lnZ_U(Ts)[1]
 
+def _Fexc(stacked, lnZ, Sexc_HS, Ts):
+    T = np.asarray(Ts, dtype=float)[:, np.newaxis]
+    return stacked.Uinf - T*Sexc_HS - T*(lnZ - stacked.lnZinf)
+
+def Fexc(dbase, ln_dos, energy, volume, Ts):
+    stacked = StackedDOS(ln_dos, energy)
+    lnZ, U = stacked.lnZ_U(Ts)
+    return _Fexc(stacked, lnZ, hardsphere_entropies(dbase, stacked.Ns, volume), Ts)
 
 def Sexc(Uexc, Fexc, Ts):
-    S = np.zeros_like(Uexc)
-    for k in range(len(Ts)):
-        T = Ts[k]
-        S[k,:] = (Uexc[k,:] - Fexc[k,:])/T
-    return S
+    return (Uexc - Fexc)/np.asarray(Ts)[:, np.newaxis]
 
-# dirty Fabs function
-def Fabs(Fex, Ts, Ns, V):
+def Fid(Ts, Ns, V):
     m=1e6 # mass for thermal wavelength
     hbar, kb = 1, 1 # constants always ought to be one
-    F = np.zeros_like(Fex)
-    Fid = np.zeros_like(Fex)
-    for l in range(len(Ts)):
-        for j in range(len(Ns)):
-            Lambda = hbar*np.sqrt(2*np.pi/(m*kb*Ts[l]))
-            Fid[l, j]  = -Ns[j]*kb*Ts[l]*np.log(V/Lambda**3) + Ns[j]*kb*Ts[l]*(np.log(Ns[j]) - 1)
-    F = Fex + Fid
-    return F
+    Ts = np.asarray(Ts, dtype=float)[:, np.newaxis]
+    Ns = np.asarray(Ns)
+    Lambda = hbar*np.sqrt(2*np.pi/(m*kb*Ts))
+    return -Ns*kb*Ts*np.log(V/Lambda**3) + Ns*kb*Ts*(np.log(Ns) - 1)
+
+# dirty Fabs function
+def Fabs(Fex, Ts, Ns, V):
+    return Fex + Fid(Ts, Ns, V)
 
 # dirty grand free (almost want to call it the Landau free energy..)
 def Phiabs(Fabs, mu, Ns):
-    Phiabs = np.zeros_like(Fabs)
-    for q in range(len(Ns)):
-        Phiabs[:, q] = Fabs[:, q] - mu*Ns[q]
-    return Phiabs
+    return Fabs - mu*np.asarray(Ns)
+
+def grand_free_energies(dbase, volume, Ts, mu):
+    """Read the ln_dos for every N in dbase, and return Ns and the
+    Uexc, Fexc, Sexc, Fabs and Phiabs for every (T, N)."""
+    ln_dos, energy, Ns = lndos_energy_Ns(dbase)
+    stacked = StackedDOS(ln_dos, energy)
+    Ts = np.asarray(Ts, dtype=float)
+    lnZ, U = stacked.lnZ_U(Ts)
+    F = _Fexc(stacked, lnZ, hardsphere_entropies(dbase, stacked.Ns, volume), Ts)
+    S = Sexc(U, F, Ts)
+    Fa = Fabs(F, Ts, stacked.Ns, volume)
+    return stacked.Ns, U, F, S, Fa, Fa - mu*stacked.Ns
 
 def Stirling_correction(N):
     guess = N*np.log(N) - N
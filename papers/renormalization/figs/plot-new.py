@@ -62,17 +62,10 @@ next_phi_color = 0
 for i in i_values:
     print('working on iteration', i)
     dbase = 'data/scrunched-ww%04.2f-L%04.2f/i%01d' % (ww, L,  i)
-    lndos, energy, Ns = gatherandcalculate.lndos_energy_Ns(dbase)
-
     V = (L*2**i)**3
+    Ns, Uexc, Fexc, Sexc, Fabs, Phiabs = gatherandcalculate.grand_free_energies(dbase, V, Ts, mu)
     etas = Ns*4*np.pi/3*R**3/V
 
-    Uexc = gatherandcalculate.Uexc(lndos, energy, Ts)
-    Fexc = gatherandcalculate.Fexc(dbase, lndos, energy, V, Ts)
-    Sexc = gatherandcalculate.Sexc(Uexc, Fexc, Ts)
-    Fabs = gatherandcalculate.Fabs(Fexc, Ts, Ns, V)
-    Phiabs = gatherandcalculate.Phiabs(Fabs, mu, Ns)
-
     plt.figure('Fexc-T')
     for j in range(len(Ns)):
         modulo = 2*8**(i-1)
@@ -1,15 +1,19 @@
 #!/usr/bin/python2
+import sys, os
 import numpy as np
 import math
 import string
 import glob
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/../../histogram/figs/')
+import thermodynamics
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/../data')
+import runcatalog, absolutesummary
+
 def T_u_F_cv_s_minT(fbase, max_T):
-    T_bins = 1e3
-    dT = max_T/T_bins
     m = .25   # Need an appropriate scale for this - look at size of epsilon and sigma
 
-    T_range = np.arange(dT,max_T,dT)
+    T_range = thermodynamics.T_range(max_T=max_T, T_bins=1e3)
     min_T = minT(fbase)
     # energy histogram file; indexed by [-energy,counts]
     e_hist = np.loadtxt(fbase+"-E.dat", ndmin=2)
@@ -23,33 +27,14 @@ def T_u_F_cv_s_minT(fbase, max_T):
     lnw = lnw_hist[e_hist[:,0].astype(int),1] # look up the lnw for each actual energy
     ln_dos = np.log(e_hist[:,1]) - lnw
 
-    Z = np.zeros(len(T_range)) # partition function
-    U = np.zeros(len(T_range)) # internal energy
-    CV = np.zeros(len(T_range)) # heat capacity
-    S = np.zeros(len(T_range)) # entropy
-    F = np.zeros(len(T_range)) # Free energy
-
-    Z_inf = sum(np.exp(ln_dos - ln_dos.max()))
-    S_inf = sum(-np.exp(ln_dos - ln_dos.max())*(-ln_dos.max() - np.log(Z_inf))) / Z_inf
-    f_shift = relative_f_shift(fbase, -T_range[-1]*)  # THIS IS REALLY WRONG
-    
-    for i in range(len(T_range)):
-        ln_dos_boltz = ln_dos - energy/T_range[i]
-        dos_boltz = np.exp(ln_dos_boltz - ln_dos_boltz.max())
-        Z[i] = sum(dos_boltz)
-        U[i] = sum(energy*dos_boltz)/Z[i]
-
-        F[i] = -T_range[i]*np.log(Z[i]) - 
-        # S = \sum_i^{microstates} P_i \log P_i
-        # S = \sum_E D(E) e^{-\beta E} \log\left(\frac{e^{-\beta E}}{\sum_{E'} D(E') e^{-\beta E'}}\right)
-        S[i] = sum(-dos_boltz*(-energy/T_range[i] - ln_dos_boltz.max() \
-                                       - np.log(Z[i])))/Z[i] \
-                                       + np.log((V/N)*(m*T_range[i]/(2*np.pi))**(.5)) + 5/2.0
-        # Actually compute S(T) - S(T=\infty) to deal with the fact
-        # that we don't know the actual number of eigenstates:
-        S[i] -= S_inf
-        CV[i] = sum((energy/T_range[i])**2*dos_boltz)/Z[i] - \
-                         (sum(energy/T_range[i]*dos_boltz)/Z[i])**2
+    # S is actually S(T) - S(T=\infty) to deal with the fact that we
+    # don't know the actual number of eigenstates.
+    lnZ, U, CV, S = thermodynamics.lnZ_U_CV_S(energy, ln_dos, T_range)
+    S += np.log((V/N)*(m*T_range/(2*np.pi))**(.5)) + 5/2.0
+    # FIXME: this is only the free energy relative to the unknown
+    # number of eigenstates; we still need to shift it using
+    # absolute_f to make it absolute.
+    F = -T_range*lnZ
     return T_range, U, F, CV, S, min_T
 
 
@@ -97,7 +82,7 @@ def eta_u_F_cv_s_minT(dbase, T, max_T):
     s = []
     eta = []
     minT = 1e100
-    for N in range(2,500):
+    for N in sorted(N for N in runcatalog.runs(dbase+'/i1') if N < 500):
         fbase = '%s/i1/N%03d/data' % (dbase, N) # Still an issue here when crossing recursion levels
         try:
             U0, F0, cv0, s0, minT0 = u_F_cv_s_minT(fbase, T)
@@ -122,37 +107,11 @@ def relative_F_shift(fbase,F):
 
 def absolute_f(fbase):
     # find the partition function yielding the absolute free energy  using 'absolute/' data
-    fbase = fbase[:-4]+ '/absolute/'
-    num_files = len(glob.glob(fbase+'*.dat')) # figure out how many files there are
-    successes = 0
-    total = 0
-    ratios = np.zeros(num_files)
-    absolute_f = 0
-   
-    print("Num_files is: %s" % num_files)
-    for j in xrange(0,num_files):
-        filename = fbase + '%05d' % (j)
-        print 'filename is "%s" and j is %d' % (filename, j)
-        with open(filename+".dat") as file:
-            for line in file:
-                if ("N: " in line):
-                    N = int(line.split()[-1])
-                if("ff_small: " in line):
-                    ff = float(line.split()[-1])
-                if("failed small checks: " in line):
-                    successes = float(line.split()[-1])
-                if("valid small checks: " in line):
-                    total = float(line.split()[-1])
-                    break
-        ratios[j] = successes/total
-        absolute_f += -np.log(ratios[j])/N
-
-    print("Ratios array is: %s" % ratios)
-    print("Calculated absolute_f is: %g" % absolute_f)
-    #print("Compare with: %g" % ((4*ff - 3*ff**2)/(1-ff)**2))
+    summary = absolutesummary.summary(fbase[:-4]+ '/absolute/')
+    absolute_f = -summary['S']/summary['N']
+    print("Calculated absolute_f is: %g +/- %g" % (absolute_f, summary['dS']/summary['N']))
     return absolute_f
 
-	
 def minT(fbase):
     min_T = 0
     with open(fbase+"-E.dat") as file:
@@ -9,9 +9,11 @@ import numpy, time, os, glob, colors
 matplotlib.rc('text', usetex=True)
 
 import readandcompute
+import moviemaker
 
+opts = moviemaker.options(sys.argv)
 if len(sys.argv) < 4:
-	print(("usage: python %s s000 periodic-whatever toe-golden [toe tmi]?" % (sys.argv[0])))
+	print(("usage: python %s s000 periodic-whatever toe-golden [toe tmi]? [--skip=N --jobs=J --only-new --video --all-frames]" % (sys.argv[0])))
 subdirname = sys.argv[1]
 filename = sys.argv[2]
 suffixes = sys.argv[3:]
@@ -22,37 +24,25 @@ if subdirname[:len('data/')] == 'data/':
 	print('cutting redundant "data/" from first argument:', subdirname)
 
 moviedir = 'figs/movies/%s/%s-dos' % (subdirname, filename)
-os.system('rm -rf ' + moviedir)
+if not opts['only_new']:
+    os.system('rm -rf ' + moviedir)
 assert not os.system('mkdir -p ' + moviedir)
 
-fig, ax = plt.subplots()
-
 mine = 1e100
 maxe = -1e100
-numframes = 0
 
 dataformat = 'data/%s/%s-%%s-movie/%%06d' % (subdirname, filename)
 
-lastframe = -1
-alldone = False
-for frame in range(100000):
-    if alldone:
-        break
-    for suffix in suffixes:
-        basename = dataformat % (suffix, frame)
-        try:
-            e, lndos = readandcompute.e_lndos(basename)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except:
-            alldone = True
-            break
-        numframes = frame+1
-        mine = min(mine, e[lndos == lndos[-1]].max() - 20)
-        maxe = max(maxe, e[lndos == lndos[0]].min())
-    if numframes % 25 == 0 and frame != lastframe:
-        print('counting %dth frame' % numframes)
-        lastframe = frame
+# read each frame once (or not at all, if we have seen it before) to
+# find the energy range
+numframes = 100000
+for suffix in suffixes:
+    summaries = moviemaker.index('data/%s/%s-%s-movie' % (subdirname, filename, suffix),
+                                 'lndos', readandcompute.e_lndos)
+    numframes = min(numframes, len(summaries))
+    for s in summaries:
+        mine = min(mine, s['e_last_max'] - 20)
+        maxe = max(maxe, s['e_first_min'])
 
 bestframe = sorted(glob.glob('data/%s/%s-%s-movie/*-lndos.dat'
                              % (subdirname, filename, suffixes[0])))[-1]
@@ -67,61 +57,68 @@ print('maxe', maxe)
 print('minlndos', minlndos)
 print('maxlndos', maxlndos)
 
-skipby = 1
-maxframes = 200
-if numframes > maxframes:
-    skipby = numframes // maxframes
-    numframes = numframes // skipby
-    print('only showing 1/%d of the frames' % skipby)
+frames = moviemaker.choose_frames(0, numframes-1, skipby=opts['skip'], all_frames=opts['all_frames'])
+numframes = len(frames)
 print('numframes', numframes)
 
-for frame in range(numframes):
-    if frame % 25 == 0:
-        print('working on frame %d/%d' % (frame, numframes))
-    plt.cla()
+def setup():
+    fig, ax = plt.subplots()
     ax.plot(best_e, best_lndos, ':', color='0.5')
+    state = {'fig': fig, 'lines': {}, 'vlines': {}}
+    for suffix in suffixes:
+        state['lines'][suffix] = colors.plot([], [], method=suffix, axes=ax)[0]
+        if suffix[:2] != 'sa':
+            state['lines'][suffix+'-tm'] = colors.plot([], [], method=suffix+'-tm', axes=ax)[0]
+        state['vlines'][suffix] = [ax.axvline(0, color='r', linestyle=':'),
+                                   ax.axvline(0, color='b', linestyle=':')]
+    ax.set_xlabel(r'$E$')
+    ax.set_ylim(1.1*minlndos, maxlndos+5)
+    # ax.set_xlim(-5, -0.3)
+    ax.set_xlim(mine, maxe)
+    ax.set_ylabel(r'$\ln DOS$')
+    # ax.legend(loc='best').get_frame().set_alpha(0.25)
+    state['title'] = ax.set_title('')
+    plt.legend(loc='lower right')
+    return fig, state
 
-    for suffix_index in range(len(suffixes)):
-        suffix = suffixes[suffix_index]
-        basename = dataformat % (suffix, frame*skipby)
+def update(state, frame):
+    for line in state['lines'].values():
+        line.set_data([], [])
+    for suffix in suffixes:
+        basename = dataformat % (suffix, frame)
+        max_entropy_line, min_important_line = state['vlines'][suffix]
+        max_entropy_line.set_visible(False)
+        min_important_line.set_visible(False)
 
         try:
             e, lndos, lndostm = readandcompute.e_lndos_lndostm(basename)
-            colors.plot(e, lndos, method=suffix)
+            state['lines'][suffix].set_data(e, lndos)
             if lndostm is not None and suffix[:2] != 'sa':
-                colors.plot(e, lndostm, method=suffix+'-tm')
+                state['lines'][suffix+'-tm'].set_data(e, lndostm)
             datname = basename+'-lndos.dat'
             min_T = readandcompute.minT(datname)
-            ax.axvline(-readandcompute.max_entropy_state(datname), color='r', linestyle=':')
+            max_entropy_line.set_xdata([-readandcompute.max_entropy_state(datname)]*2)
+            max_entropy_line.set_visible(True)
             min_important_energy = int(readandcompute.min_important_energy(datname))
-            ax.axvline(-min_important_energy, color='b', linestyle=':')
-            # Uncomment the following to plot a line at the
-            # min_important_energy with slope determined by min_T
-            # ax.plot(e, (e+min_important_energy)/min_T + lndos[min_important_energy], colors[suffix_index]+'--')
-            # ax.axvline(-readandcompute.converged_state(datname), color=colors.color(suffix), linestyle=':')
+            min_important_line.set_xdata([-min_important_energy]*2)
+            min_important_line.set_visible(True)
+            state['title'].set_text(r'lv movie from %s ($T_{min} = %g$)' % (filename, min_T))
             # Uncomment the following to plot the lnw along with the lndos
             # e, lnw = readandcompute.e_lnw(basename)
-            # ax.plot(e, -lnw, colors[suffix_index]+':')
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception as e:
             print(e)
             pass
 
-    ax.set_xlabel(r'$E$')
-    ax.set_ylim(1.1*minlndos, maxlndos+5)
-    # ax.set_xlim(-5, -0.3)
-    ax.set_xlim(mine, maxe)
-    ax.set_ylabel(r'$\ln DOS$')
-    # ax.legend(loc='best').get_frame().set_alpha(0.25)
-    plt.title(r'lv movie from %s ($T_{min} = %g$)' % (filename, min_T))
-    plt.legend(loc='lower right')
-
-    fname = '%s/frame%06d.png' % (moviedir, frame)
-    plt.savefig(fname)
-
 duration = 10.0 # seconds
 
-avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
-os.system(avconv) # make the movie
-print(avconv)
+moviemaker.render(frames, setup, update, moviedir=moviedir,
+                  video=moviedir+'/movie.mp4' if opts['video'] else None,
+                  fps=numframes/duration, processes=opts['jobs'], only_new=opts['only_new'],
+                  limits=[mine, maxe, minlndos, maxlndos])
+
+if not opts['video']:
+    avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
+    os.system(avconv) # make the movie
+    print(avconv)
@@ -9,9 +9,11 @@ import numpy, time, os, colors
 matplotlib.rc('text', usetex=True)
 
 import readandcompute
+import moviemaker
 
+opts = moviemaker.options(sys.argv)
 if len(sys.argv) < 4:
-    print(("Usage: python {} lv ww1.30-ff0.22-100x10 tmi toe ...".format(sys.argv[0])))
+    print(("Usage: python {} lv ww1.30-ff0.22-100x10 tmi toe ... [--skip=N --jobs=J --only-new --video --all-frames]".format(sys.argv[0])))
     exit(1)
 
 subdirname = sys.argv[1]
@@ -21,70 +23,64 @@ suffixes = sys.argv[3:]
 print(sys.argv)
 
 moviedir = 'figs/movies/%s/%s-hist' % (subdirname, filename)
-os.system('rm -rf ' + moviedir)
+if not opts['only_new']:
+    os.system('rm -rf ' + moviedir)
 assert not os.system('mkdir -p ' + moviedir)
 
-fig, ax = plt.subplots()
-
 mine = 1e100
 maxe = -1e100
 maxhist = 0
-numframes = 0
 
 dataformat = 'data/%s/%s-%%s-movie/%%06d' % (subdirname, filename)
 
-lastframe = -1
-alldone = False
-for frame in range(100000):
-    if alldone:
-        break
-    for suffix in suffixes:
-        basename = dataformat % (suffix, frame)
-        try:
-            e, hist = readandcompute.e_and_total_init_histogram(basename)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except:
-            alldone = True
-            break
-        numframes = frame+1
-        maxhist = max(maxhist, hist.max())
-        mine = min(mine, e.min() - 20)
-        maxe = max(maxe, e.max())
-    if numframes % 25 == 0 and frame != lastframe:
-        print('counting %dth frame' % numframes)
-        lastframe = frame
+# read each frame once (or not at all, if we have seen it before) to
+# find the ranges
+numframes = 100000
+for suffix in suffixes:
+    summaries = moviemaker.index('data/%s/%s-%s-movie' % (subdirname, filename, suffix),
+                                 'transitions', readandcompute.e_and_total_init_histogram)
+    numframes = min(numframes, len(summaries))
+    for s in summaries:
+        maxhist = max(maxhist, s['y_max'])
+        mine = min(mine, s['e_min'] - 20)
+        maxe = max(maxe, s['e_max'])
 
 print('counted %d frames' % numframes)
 print('mine', mine)
 print('maxe', maxe)
 print('maxhist', maxhist)
 
-skipby = 1
-if numframes > 200:
-    skipby = numframes // 200
-    numframes = numframes // skipby
-    print('only showing 1/%d of the frames' % skipby)
-
+frames = moviemaker.choose_frames(0, numframes-1, skipby=opts['skip'], all_frames=opts['all_frames'])
+numframes = len(frames)
 print('numframes', numframes)
 
-for frame in range(numframes):
-    if frame % 25 == 0:
-        print('working on frame %d/%d' % (frame, numframes))
-    plt.cla()
+def setup():
+    fig, ax = plt.subplots()
+    state = {'fig': fig, 'lines': {}}
+    for suffix in suffixes:
+        state['lines'][suffix] = colors.plot([], [], method=suffix, axes=ax)[0]
+    ax.set_xlabel(r'$E$')
+    ax.set_ylim(0, maxhist)
+    # ax.set_xlim(-5, -0.3)
+    ax.set_xlim(mine, maxe)
+    ax.set_ylabel(r'histogram')
+    # ax.legend(loc='best').get_frame().set_alpha(0.25)
+    state['title'] = ax.set_title('')
+    plt.legend(loc='best')
+    return fig, state
 
-    for suffix_index in range(len(suffixes)):
-        suffix = suffixes[suffix_index]
-        basename = dataformat % (suffix, frame*skipby)
+def update(state, frame):
+    for suffix in suffixes:
+        basename = dataformat % (suffix, frame)
+        state['lines'][suffix].set_data([], [])
 
         try:
             e, hist = readandcompute.e_and_total_init_histogram(basename)
-            colors.plot(e, hist, method=suffix)
+            state['lines'][suffix].set_data(e, hist)
             datname = basename+'-transitions.dat'
             min_T = readandcompute.minT(datname)
-            # ax.axvline(-readandcompute.max_entropy_state(basename), color='r', linestyle=':')
+            state['title'].set_text(r'lv movie from %s ($T_{min} = %g$)' % (filename, min_T))
             # min_important_energy = readandcompute.min_important_energy(basename)
-            # ax.axvline(-min_important_energy, color='b', linestyle=':')
             # ax.axvline(-readandcompute.converged_state(datname), color=colors[suffix_index], linestyle=':')
         except (KeyboardInterrupt, SystemExit):
             raise
@@ -92,20 +88,14 @@ for frame in range(numframes):
             print(e)
             pass
 
-    ax.set_xlabel(r'$E$')
-    ax.set_ylim(0, maxhist)
-    # ax.set_xlim(-5, -0.3)
-    ax.set_xlim(mine, maxe)
-    ax.set_ylabel(r'histogram')
-    # ax.legend(loc='best').get_frame().set_alpha(0.25)
-    plt.title(r'lv movie from %s ($T_{min} = %g$)' % (filename, min_T))
-    plt.legend(loc='best')
-
-    fname = '%s/frame%06d.png' % (moviedir, frame)
-    plt.savefig(fname)
-
 duration = 10.0 # seconds
 
-avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
-os.system(avconv) # make the movie
-print(avconv)
+moviemaker.render(frames, setup, update, moviedir=moviedir,
+                  video=moviedir+'/movie.mp4' if opts['video'] else None,
+                  fps=numframes/duration, processes=opts['jobs'], only_new=opts['only_new'],
+                  limits=[mine, maxe, maxhist])
+
+if not opts['video']:
+    avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
+    os.system(avconv) # make the movie
+    print(avconv)
@@ -8,7 +8,9 @@ import numpy, time, os
 matplotlib.rc('text', usetex=True)
 
 import readandcompute
+import moviemaker
 
+opts = moviemaker.options(sys.argv)
 ww = float(sys.argv[1])
 #arg ww = [1.3]
 ff = float(sys.argv[2])
@@ -27,16 +29,14 @@ elif 'toe' in sys.argv:
 else:
     moviedir = 'figs/movies/lv/ww%.2f-ff%.2f-%gx%g' % (ww, ff, lenx, lenyz)
 
-os.system('rm -rf ' + moviedir)
+if not opts['only_new']:
+    os.system('rm -rf ' + moviedir)
 assert not os.system('mkdir -p ' + moviedir)
 
-fig, ax = plt.subplots()
-
 mine = 1e100
 maxe = -1e100
 minhist = 1e100
 maxhist = -1e100
-numframes = 0
 
 dataformat = 'data/lv/ww%.2f-ff%.2f-%gx%g-movie/%%06d' % (ww, ff, lenx, lenyz)
 if 'tmi' in sys.argv:
@@ -44,17 +44,16 @@ if 'tmi' in sys.argv:
 if 'toe' in sys.argv:
     dataformat = 'data/lv/ww%.2f-ff%.2f-%gx%g-toe-movie/%%06d' % (ww, ff, lenx, lenyz)
 
-for frame in range(100000):
-    basename = dataformat % frame
-    try:
-        e, hist = readandcompute.e_and_total_init_histogram(basename)
-    except:
-        break
-    numframes = frame+1
-    mine = min(mine, e.min() - 20)
-    maxe = max(maxe, e.max())
-    minhist = min(minhist, hist.min())
-    maxhist = max(maxhist, hist.max())
+# read each frame once (or not at all, if we have seen it before) to
+# find the ranges
+summaries = moviemaker.index(os.path.dirname(dataformat), 'transitions',
+                             readandcompute.e_and_total_init_histogram)
+numframes = len(summaries)
+for s in summaries:
+    mine = min(mine, s['e_min'] - 20)
+    maxe = max(maxe, s['e_max'])
+    minhist = min(minhist, s['y_min'])
+    maxhist = max(maxhist, s['y_max'])
 
 print('mine', mine)
 print('maxe', maxe)
@@ -62,33 +61,64 @@ print('minhist', minhist)
 print('maxhist', maxhist)
 print('numframes', numframes)
 
+# We show the additional iterations since min_T last changed, so we
+# find the frame we compare each frame with before we draw any.
+baseline_frame = []
 min_T = None
-
 for frame in range(numframes):
-    if frame % 10 == 0:
-        print('working on frame %d/%d' % (frame, numframes))
-    plt.cla()
+    old_min_T = min_T
+    min_T = readandcompute.minT_from_transitions(dataformat % frame)
+    if min_T != old_min_T:
+        print('min_T goes from', old_min_T, 'to', min_T)
+        baseline_frame.append(frame)
+    else:
+        baseline_frame.append(baseline_frame[-1])
+
+frames = moviemaker.choose_frames(0, numframes-1, skipby=opts['skip'] or 1)
+
+def setup():
+    fig, ax = plt.subplots()
+    state = {'fig': fig}
+    state['vlines'] = [ax.axvline(0, color='r', linestyle=':'),
+                       ax.axvline(0, color='b', linestyle=':'),
+                       ax.axvline(0, color='c', linestyle=':')]
+    state['init'], = ax.plot([], [], 'b-', label=' ')
+    state['new'], = ax.plot([], [], 'k-', label=' ')
+    ax.set_xlabel(r'$E$')
+    ax.set_ylim(0, maxhist)
+    ax.set_xlim(mine, maxe)
+    ax.set_ylabel(r'histogram')
+    state['legend'] = ax.legend(loc='best')
+    state['legend'].get_frame().set_alpha(0.25)
+    if 'tmi' in sys.argv:
+        plt.title(r'lv movie with $\lambda = %g$, $\eta = %g$, $%g\times %g$ tmi' % (ww, ff, lenx, lenyz))
+    elif 'toe' in sys.argv:
+        plt.title(r'lv movie with $\lambda = %g$, $\eta = %g$, $%g\times %g$ toe' % (ww, ff, lenx, lenyz))
+    else:
+        plt.title(r'lv movie with $\lambda = %g$, $\eta = %g$, $%g\times %g$' % (ww, ff, lenx, lenyz))
+    return fig, state
 
+def update(state, frame):
     basename = dataformat % frame
-    old_min_T = min_T
-    min_T = readandcompute.minT_from_transitions(basename)
     # e, diff = readandcompute.e_diffusion_estimate(basename)
 
+    for vline in state['vlines']:
+        vline.set_visible(False)
     try:
         N = readandcompute.read_N(basename)
-        ax.axvline(-readandcompute.max_entropy_state(basename), color='r', linestyle=':')
-        ax.axvline(-readandcompute.min_important_energy(basename), color='b', linestyle=':')
-        ax.axvline(-readandcompute.converged_state(basename+'-lndos.dat'), color='c', linestyle=':')
+        for vline, x in zip(state['vlines'],
+                            [readandcompute.max_entropy_state(basename),
+                             readandcompute.min_important_energy(basename),
+                             readandcompute.converged_state(basename+'-lndos.dat')]):
+            vline.set_xdata([-x]*2)
+            vline.set_visible(True)
     except:
         pass
 
     e, init_hist = readandcompute.e_and_total_init_histogram(basename)
-    if min_T != old_min_T:
-        print('min_T goes from', old_min_T, 'to', min_T)
-        baseline_init_hist = init_hist
-        baseline_e = e
-    ax.plot(e, init_hist, 'b-',
-            label=r'%e initialization iterations' % (sum(init_hist)/float(N)))
+    baseline_e, baseline_init_hist = \
+        readandcompute.e_and_total_init_histogram(dataformat % baseline_frame[frame])
+    state['init'].set_data(e, init_hist)
     # newstuff below is init_hist - baseline_init_hist, but takes into
     # account the fact that these arrays might not be the same size.
     # So we look up the element with the corresponding energy.
@@ -100,26 +130,20 @@ for frame in range(numframes):
                 newstuff[i] -= baseline_init_hist[theindex[0]]
     else:
         newstuff = init_hist - baseline_init_hist
-    ax.plot(e, newstuff, 'k-',
-            label=r'%e additional iterations' % ((sum(init_hist) - sum(baseline_init_hist))/float(N)))
-
-    ax.set_xlabel(r'$E$')
-    ax.set_ylim(0, maxhist)
-    ax.set_xlim(mine, maxe)
-    ax.set_ylabel(r'histogram')
-    ax.legend(loc='best').get_frame().set_alpha(0.25)
-    if 'tmi' in sys.argv:
-        plt.title(r'lv movie with $\lambda = %g$, $\eta = %g$, $%g\times %g$ tmi' % (ww, ff, lenx, lenyz))
-    elif 'toe' in sys.argv:
-        plt.title(r'lv movie with $\lambda = %g$, $\eta = %g$, $%g\times %g$ toe' % (ww, ff, lenx, lenyz))
-    else:
-        plt.title(r'lv movie with $\lambda = %g$, $\eta = %g$, $%g\times %g$' % (ww, ff, lenx, lenyz))
-
-    fname = '%s/frame%06d.png' % (moviedir, frame)
-    plt.savefig(fname)
+    state['new'].set_data(e, newstuff)
+    texts = state['legend'].get_texts()
+    texts[0].set_text(r'%e initialization iterations' % (sum(init_hist)/float(N)))
+    texts[1].set_text(r'%e additional iterations'
+                      % ((sum(init_hist) - sum(baseline_init_hist))/float(N)))
 
 duration = 10.0 # seconds
 
-avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (numframes/duration, moviedir, moviedir)
-os.system(avconv) # make the movie
-print(avconv)
+moviemaker.render(frames, setup, update, moviedir=moviedir,
+                  video=moviedir+'/movie.mp4' if opts['video'] else None,
+                  fps=len(frames)/duration, processes=opts['jobs'], only_new=opts['only_new'],
+                  limits=[mine, maxe, maxhist])
+
+if not opts['video']:
+    avconv = "avconv -y -r %g -i %s/frame%%06d.png -b 1000k %s/movie.mp4" % (len(frames)/duration, moviedir, moviedir)
+    os.system(avconv) # make the movie
+    print(avconv)
@@ -1,7 +1,13 @@
 #!/usr/bin/python2
 from __future__ import division
+import sys, os
 import numpy
 
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/../../histogram/figs/')
+import thermodynamics
+import mcheader
+import transitions
+
 def e_hist(fbase):
     # energy histogram file; indexed by [-energy,counts]
     e_hist = numpy.loadtxt(fbase+"-E.dat", ndmin=2, dtype=numpy.float)
@@ -42,10 +48,7 @@ def e_lnw(fbase):
     return energy, lnw
 
 def T_u_cv_s_minT(fbase):
-    max_T = 20.0
-    T_bins = 1e3
-    dT = max_T/T_bins
-    T_range = numpy.arange(dT, max_T, dT)
+    T_range = thermodynamics.T_range(max_T=20.0, T_bins=1e3)
     min_T = minT(fbase)
     # energy histogram file; indexed by [-energy,counts]
     e_hist = numpy.loadtxt(fbase+"-E.dat", ndmin=2)
@@ -56,42 +59,15 @@ def T_u_cv_s_minT(fbase):
     lnw = lnw_hist[e_hist[:, 0].astype(int), 1] # look up the lnw for each actual energy
     ln_dos = numpy.log(e_hist[:, 1]) - lnw
 
-    Z = numpy.zeros(len(T_range)) # partition function
-    U = numpy.zeros(len(T_range)) # internal energy
-    CV = numpy.zeros(len(T_range)) # heat capacity
-    S = numpy.zeros(len(T_range)) # entropy
-
-    Z_inf = sum(numpy.exp(ln_dos - ln_dos.max()))
-    S_inf = sum(-numpy.exp(ln_dos - ln_dos.max())*(-ln_dos.max() - numpy.log(Z_inf))) / Z_inf
-
-    for i in range(len(T_range)):
-        ln_dos_boltz = ln_dos - energy/T_range[i]
-        dos_boltz = numpy.exp(ln_dos_boltz - ln_dos_boltz.max())
-        Z[i] = sum(dos_boltz)
-        U[i] = sum(energy*dos_boltz)/Z[i]
-        # S = \sum_i^{microstates} P_i \log P_i
-        # S = \sum_E D(E) e^{-\beta E} \log\left(\frac{e^{-\beta E}}{\sum_{E'} D(E') e^{-\beta E'}}\right)
-        S[i] = sum(-dos_boltz*(-energy/T_range[i] - ln_dos_boltz.max() \
-                                       - numpy.log(Z[i])))/Z[i]
-        # Actually compute S(T) - S(T=\infty) to deal with the fact
-        # that we don't know the actual number of eigenstates:
-        S[i] -= S_inf
-        CV[i] = sum((energy/T_range[i])**2*dos_boltz)/Z[i] - \
-                         (sum(energy/T_range[i]*dos_boltz)/Z[i])**2
+    # S is actually S(T) - S(T=\infty) to deal with the fact that we
+    # don't know the actual number of eigenstates.
+    U, CV, S = thermodynamics.U_CV_S(energy, ln_dos, T_range)
     return T_range, U, CV, S, min_T
 
 def minT(f):
     if not '.dat' in f:
         f = f+"-E.dat"
-    min_T = 0
-    with open(f) as file:
-        for line in file:
-            if("min_T" in line):
-                this_min_T = float(line.split()[-1])
-                if this_min_T > min_T:
-                    min_T = this_min_T
-                break
-    return min_T
+    return mcheader.read(f).min_T
 
 def minT_from_transitions(fbase):
     return minT(fbase+"-transitions.dat")
@@ -99,70 +75,46 @@ def minT_from_transitions(fbase):
 def convergedT(f):
     if not '.dat' in f:
         f = f+"-E.dat"
-    with open(f) as file:
-        for line in file:
-            if "converged temperature:" in line:
-                return float(line.split()[-1])
-    return 0
+    return mcheader.read(f).converged_T
 
 def converged_state(f):
     if not '.dat' in f:
         f = f+"-E.dat"
-    with open(f) as file:
-        for line in file:
-            if "converged state:" in line:
-                return int(line.split()[-1])
-    print('ERROR FINDING converged_state in', f)
+    state = mcheader.read(f).converged_state
+    if state is None:
+        print('ERROR FINDING converged_state in', f)
+    return state
 
 def iterations(fbase):
-    with open(fbase+"-E.dat") as file:
-        for line in file:
-            if "iterations:" in line:
-                return int(line.split()[-1])
+    return mcheader.read(fbase+"-E.dat").iterations
 
 def dr_g(fbase):
-    with open(fbase+"-E.dat") as file:
-        for line in file:
-            if "de_g" in line:
-                return float(line.split()[-1])
+    return mcheader.read(fbase+"-E.dat").de_g
 
 def dimensions(f):
     if not '.dat' in f:
         f = f+"-E.dat"
-    with open(f) as file:
-        for line in file:
-            if "# cell dimensions: " in line:
-                return eval(line.split(': ')[-1])
+    return mcheader.read(f).dimensions
 
 def read_N(f):
     if not '.dat' in f:
         f = f+"-transitions.dat"
-    with open(f) as file:
-        for line in file:
-            if "N" in line:
-                return int(line.split(': ')[-1])
+    return mcheader.read(f).N
 
 def read_ff(fbase):
-    with open(fbase+"-E.dat") as file:
-        for line in file:
-            if "ff" in line:
-                return float(line.split(': ')[-1])
+    return mcheader.read(fbase+"-E.dat").ff
 
 def min_important_energy(f):
     if not '.dat' in f:
         f = f+"-transitions.dat"
-    with open(f) as file:
-        for line in file:
-            if("min_important_energy" in line):
-                return float(line.split()[-1])
+    return mcheader.read(f).min_important_energy
 
 def max_entropy_state(f):
     if not '.dat' in f:
         f = f+"-transitions.dat"
-    with open(f) as file:
-        for line in file:
-            if("max_entropy_state" in line):
-                return float(line.split()[-1])
+    state = mcheader.read(f).max_entropy_state
+    if state is not None:
+        return float(state)
 
 def g_r(fbase, T):
     data = numpy.loadtxt(fbase+"-g.dat", ndmin=2)
@@ -254,41 +206,32 @@ def density_x(fbase, T):
     return density, x_1d
 
 def e_de_transitions(basename):
-    trans = numpy.loadtxt(basename+"-transitions.dat", dtype=numpy.float)
-    with open(basename+"-transitions.dat") as f:
-        for line in f:
-            if '# energy\t' in line:
-                de = numpy.array([ -float(val) for val in line.split()[2:] ])
-                break
-    N = read_N(basename)
-    e = -trans[:, 0]/N
-    de /= -N
-    trans = trans[:, 1:]
-    for i in range(len(e)):
-        trans[i,:] /= sum(trans[i,:])
+    t = transitions.load(basename)
+    N = t.N
+    e = -t.energy/N
+    de = t.de/N
+    trans = t.counts.toarray()
+    trans = trans/trans.sum(axis=1)[:, numpy.newaxis]
     e, de = numpy.meshgrid(e, de)
     return e, de, trans
 
 def total_init_iterations(basename):
-    trans = numpy.loadtxt(basename+"-transitions.dat", dtype=numpy.float)
-    trans = trans[:, 1:]
-    return numpy.sum(trans)/read_N(basename)
+    t = transitions.load(basename)
+    return t.total()/t.N
 
 def e_and_total_init_histogram(basename):
-    trans = numpy.loadtxt(basename+"-transitions.dat", dtype=numpy.float)
-    N = read_N(basename)
-    e = -trans[:, 0]
-    trans = trans[:, 1:]
-    return e, numpy.sum(trans, axis=1)
+    t = transitions.load(basename)
+    return -t.energy, t.histogram()
 
 def e_diffusion_estimate(basename):
-    e, de, trans = e_de_transitions(basename)
-    e = e[0,:]
-    de = de[:, 0]
-    diffusion = numpy.zeros_like(e)
-    for i in range(len(e)):
-        meane = sum(de*trans[i,:])/len(de)
-        meane2 = sum(de**2*trans[i,:])/len(de)
-        norm = sum(trans[i,:])
-        diffusion[i] = numpy.sqrt(meane2 - meane**2)
+    t = transitions.load(basename)
+    e = -t.energy/t.N
+    de = t.de/t.N
+    # the sums of de and de**2 over each row of the normalized
+    # counts, each divided by the number of de as we always have
+    p = t.normalized()
+    meane = p.dot(de)/len(de)
+    meane2 = p.dot(de**2)/len(de)
+    diffusion = numpy.sqrt(meane2 - meane**2)
+    diffusion[t.histogram() == 0] = numpy.nan
     return e, diffusion
@@ -0,0 +1,213 @@
+#!/usr/bin/python2
+from __future__ import division, print_function
+import os, sys, time, json, subprocess, threading, multiprocessing
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # python2
+
+# A small executor for our parameter sweeps.  Instead of firing off
+# os.system('... &') for every point (and either fork-bombing the
+# workstation or giving up after a handful of jobs), a driver script
+# adds its jobs to a Sweep and calls run().  The sweep then
+#
+#  * runs at most max_jobs commands at a time (one per core by default),
+#  * only starts a job once the jobs it comes after have finished,
+#  * skips any job whose outputs already exist,
+#  * retries jobs that fail,
+#  * and records what it has done (and how long each job took) in a
+#    JSON ledger, so an interrupted sweep picks up where it left off.
+#
+# How each command is actually run is up to the backend: 'local' runs
+# it here, 'srun' runs it through slurm (waiting for it to finish) and
+# 'rq' just submits it to rq.  A backend is a function that turns a
+# Job into the shell command to execute, so you can also pass your own.
+
+def have_command(name):
+    """Return True if name is an executable in our PATH."""
+    for d in os.environ.get('PATH', '').split(os.pathsep):
+        if os.access(os.path.join(d, name), os.X_OK):
+            return True
+    return False
+
+def default_backend():
+    """srun if we have slurm, rq if we have rq, else the local pool."""
+    if have_command('srun') and have_command('squeue'):
+        return 'srun'
+    if have_command('rq'):
+        return 'rq'
+    return 'local'
+
+def local(job):
+    return 'nice -19 ' + job.cmd # don't hog the CPU
+
+def srun(job):
+    return 'srun %s-J %s nice -19 %s' % (job.srun_args, job.name, job.cmd)
+
+def rq(job):
+    return 'rq run -J %s %s' % (job.name, job.cmd)
+
+backends = {'local': local, 'srun': srun, 'rq': rq}
+
+# backends that only submit a job, so that a zero exit status does not
+# mean the job is actually done.
+submit_only = set(['rq'])
+
+# When a scheduler decides where jobs run, we can keep many more of
+# them in flight than we have cores here.
+max_scheduled_jobs = 200
+
+class Job(object):
+    def __init__(self, name, cmd, outputs=(), after=(), log=None, srun_args=''):
+        self.name = name
+        self.cmd = cmd
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.log = log
+        self.srun_args = srun_args + ' ' if srun_args else ''
+
+    def outputs_exist(self):
+        return len(self.outputs) > 0 and all(os.path.exists(f) for f in self.outputs)
+
+class Sweep(object):
+    def __init__(self, ledger=None, backend=None, max_jobs=None, retries=1,
+                 overwrite=False, verbose=True):
+        if backend is None:
+            backend = default_backend()
+        if max_jobs is None and backend == 'local':
+            max_jobs = multiprocessing.cpu_count()
+        elif max_jobs is None:
+            max_jobs = max_scheduled_jobs
+        self.backend_name = backend if backend in backends else getattr(backend, '__name__', 'custom')
+        self.backend = backends[backend] if backend in backends else backend
+        self.ledger_file = ledger
+        self.max_jobs = max_jobs
+        self.retries = retries
+        self.overwrite = overwrite
+        self.verbose = verbose
+        self.jobs = []
+        self.ledger = {}
+        if ledger is not None and os.path.exists(ledger) and not overwrite:
+            with open(ledger) as f:
+                self.ledger = json.load(f)
+
+    def add(self, name, cmd, outputs=(), after=(), log=None, srun_args=''):
+        """Add a job to the sweep, returning its name (for use in after)."""
+        self.jobs.append(Job(name, cmd, outputs, after, log, srun_args))
+        return name
+
+    def _say(self, msg):
+        if self.verbose:
+            print(msg)
+            sys.stdout.flush()
+
+    def _record(self, job, status, **extra):
+        entry = self.ledger.get(job.name, {'attempts': 0})
+        entry['status'] = status
+        entry['cmd'] = job.cmd
+        entry.update(extra)
+        self.ledger[job.name] = entry
+        if self.ledger_file is None:
+            return
+        d = os.path.dirname(self.ledger_file)
+        if d and not os.path.isdir(d):
+            os.makedirs(d)
+        with open(self.ledger_file + '.tmp', 'w') as f:
+            json.dump(self.ledger, f, indent=1, sort_keys=True)
+        os.rename(self.ledger_file + '.tmp', self.ledger_file)
+
+    def _already_done(self, job):
+        if self.overwrite:
+            return False
+        if job.outputs_exist():
+            return True
+        # without outputs to check, we trust the ledger
+        return (len(job.outputs) == 0
+                and self.ledger.get(job.name, {}).get('status') == 'done')
+
+    def _execute(self, job, finished):
+        cmd = self.backend(job)
+        start = time.time()
+        try:
+            if job.log is not None:
+                with open(job.log, 'w') as log:
+                    status = subprocess.call(cmd, shell=True, stdout=log,
+                                             stderr=subprocess.STDOUT)
+            else:
+                status = subprocess.call(cmd, shell=True)
+        except (IOError, OSError) as e:
+            print('error running', job.name, e)
+            status = -1
+        finished.put((job, status, time.time() - start))
+
+    def run(self):
+        """Run every job, returning a dict mapping status to job count."""
+        names = set(job.name for job in self.jobs)
+        done = set()
+        failed = set()
+        waiting = []
+        for job in self.jobs:
+            if self._already_done(job):
+                done.add(job.name)
+                if self.ledger.get(job.name, {}).get('status') != 'done':
+                    self._record(job, 'done')
+            else:
+                waiting.append(job)
+        self._say('%d of %d jobs are already done.' % (len(done), len(self.jobs)))
+
+        finished = queue.Queue()
+        running = 0
+        attempts = {}
+        submitted = set()
+        while waiting or running:
+            # Jobs whose prerequisites failed (or will never finish in
+            # this pass) can't run.
+            for job in list(waiting):
+                blocked = [a for a in job.after
+                           if a in failed or a in submitted or (a not in names and a not in done)]
+                if blocked:
+                    waiting.remove(job)
+                    failed.add(job.name)
+                    self._record(job, 'blocked', blocked_by=blocked)
+                    self._say('not running %s, which needs %s' % (job.name, ', '.join(blocked)))
+            for job in list(waiting):
+                if running >= self.max_jobs:
+                    break
+                if all(a in done for a in job.after):
+                    waiting.remove(job)
+                    attempts[job.name] = attempts.get(job.name, 0) + 1
+                    self._record(job, 'running',
+                                 attempts=self.ledger.get(job.name, {}).get('attempts', 0) + 1)
+                    self._say('running %s' % job.name)
+                    t = threading.Thread(target=self._execute, args=(job, finished))
+                    t.daemon = True
+                    t.start()
+                    running += 1
+            if running == 0:
+                break
+            job, status, seconds = finished.get()
+            seconds = round(seconds, 1)
+            running -= 1
+            if status == 0:
+                if self.backend_name in submit_only:
+                    submitted.add(job.name)
+                    self._record(job, 'submitted', returncode=status, seconds=seconds)
+                else:
+                    done.add(job.name)
+                    self._record(job, 'done', returncode=status, seconds=seconds)
+            elif attempts[job.name] <= self.retries:
+                self._say('%s failed with status %d, retrying' % (job.name, status))
+                self._record(job, 'retrying', returncode=status, seconds=seconds)
+                waiting.append(job)
+            else:
+                self._say('%s failed with status %d' % (job.name, status))
+                failed.add(job.name)
+                self._record(job, 'failed', returncode=status, seconds=seconds)
+
+        summary = {}
+        for job in self.jobs:
+            status = 'done' if job.name in done else self.ledger.get(job.name, {}).get('status', 'waiting')
+            summary[status] = summary.get(status, 0) + 1
+        self._say('sweep finished: ' + ', '.join('%d %s' % (summary[s], s) for s in sorted(summary)))
+        return summary
@@ -0,0 +1,92 @@
+#!/usr/bin/python2
+from __future__ import division
+import os, json, hashlib
+import numpy, sympy
+from sympy.printing.lambdarepr import NumPyPrinter
+from scipy.optimize import leastsq
+
+# Least squares fits of a sympy expression to data, for the
+# short-range-ghs.py of pair-correlation and square-well-fluid.  We differentiate the expression with respect to
+# each of its parameters once, so that leastsq gets the exact jacobian
+# rather than estimating it with a finite difference for every
+# parameter at every step.  The python source of the expression and
+# its derivatives, and its C code, are saved in cachedir under a hash
+# of the expression, so a later run with the same expression skips
+# sympy and just compiles them.
+
+cachedir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'symfit-cache')
+
+def _key(expr, args):
+  text = repr((sympy.srepr(expr), args, sympy.__version__, 'numpy'))
+  return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _load(key):
+  try:
+    with open(os.path.join(cachedir, key + '.json')) as f:
+      return json.load(f)
+  except (IOError, OSError, ValueError):
+    return None
+
+def _save(key, entry):
+  fname = os.path.join(cachedir, key + '.json')
+  try:
+    if not os.path.isdir(cachedir):
+      os.makedirs(cachedir)
+    # write a temporary file and rename it, so a reader never sees a
+    # half-written entry.
+    with open(fname + '.tmp', 'w') as f:
+      json.dump(entry, f)
+    os.rename(fname + '.tmp', fname)
+  except (IOError, OSError):
+    pass # we can live without a cache
+
+def _source(args, expr):
+  # sympy's numpy printer writes exp, pi, E etc. as numpy.exp,
+  # numpy.pi, numpy.e, so they can't clash with our own symbols.
+  return 'lambda %s: %s' % (', '.join(args), NumPyPrinter().doprint(expr))
+
+def _compile(source):
+  return eval(source, {'numpy': numpy})
+
+class Model(object):
+  """The expression expr as a function of the list of params and
+  then the variables (names of its symbols), evaluated with numpy."""
+  def __init__(self, expr, params, variables):
+    self.params = [str(p) for p in params]
+    self.variables = [str(v) for v in variables]
+    args = self.params + self.variables
+    key = _key(expr, args)
+    entry = _load(key)
+    if entry is None:
+      symbols = dict((str(s), s) for s in expr.free_symbols)
+      entry = {
+        'value': _source(args, expr),
+        'jacobian': [_source(args, sympy.diff(expr, symbols[p])) if p in symbols
+                     else _source(args, 0) for p in self.params],
+        'ccode': sympy.ccode(expr),
+      }
+      _save(key, entry)
+    self._value = _compile(entry['value'])
+    self._jacobian = [_compile(s) for s in entry['jacobian']]
+    self.ccode = entry['ccode']
+
+  def __call__(self, x, *variables):
+    return self._value(*(tuple(x) + variables))
+
+  def jacobian(self, x, *variables):
+    """The derivatives with respect to each parameter, along the
+    first axis."""
+    args = tuple(x) + variables
+    ones = numpy.ones(numpy.broadcast(*variables).shape)
+    return numpy.array([d(*args)*ones for d in self._jacobian])
+
+  def fit(self, x, data, *variables):
+    """The parameters (starting from x) that best fit data, which
+    has the shape of the variables, and leastsq's message."""
+    data = numpy.ravel(data)
+    def residuals(x):
+      return numpy.ravel(self(x, *variables)) - data
+    def jacobian(x):
+      return self.jacobian(x, *variables).reshape(len(x), -1)
+    vals, mesg = leastsq(residuals, x, Dfun=jacobian, col_deriv=True)
+    return vals, mesg
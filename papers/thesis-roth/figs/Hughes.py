@@ -43,22 +43,21 @@ kap_a = 1.06673*angstrom**3 # value has dimensions of length^3
 # energy of interaction if spheres hydrogen-bond
 eps_a = 1400*k_B # (kelvin x Boltzmann)
 
-# Ideal Gas
-def fid(T, n):
-    # constants
-    hbar = 1.05*10**(-27) # cm^2 g s^-1
-
-    me = 9.109e-28 # electron mass in g
-    time_atomic = 2.418e-17 # hbar/E_hartree in s
+# constants for the thermal wavelength
+hbar = 1.05*10**(-27) # cm^2 g s^-1
+me = 9.109e-28 # electron mass in g
+time_atomic = 2.418e-17 # hbar/E_hartree in s
+hbar_atomic = hbar/bohr**2/me*time_atomic # hbar in atomic units
+m_atomic = m/me/N_A # m in atomic units
 
-    hbar_atomic = hbar/bohr**2/me*time_atomic # hbar in atomic units
-    m_atomic = m/me/N_A # m in atomic units
-
-    # thermal wavelength
-    Lambd = ((2*np.pi*hbar_atomic**2)/(m_atomic*k_B*T))**0.5
+# thermal wavelength
+def Lambd(T):
+    return ((2*np.pi*hbar_atomic**2)/(m_atomic*k_B*T))**0.5
 
+# Ideal Gas
+def fid(T, n):
     # free energy
-    return k_B*T*n*(np.log(n*Lambd**3)-1)
+    return k_B*T*n*(np.log(n*Lambd(T)**3)-1)
 
 # Fundamental measure densities
 def n0(n):
@@ -194,11 +193,93 @@ def fassoc(T, n):
 def f(T, n):
     return fid(T, n)+fhs(T, n)+fdisp(T, n)+fassoc(T, n)
 
-# Derivative wrt number at const temp
+# Derivatives wrt number at const temp.  Apart from the ideal gas and
+# n0, the free energy depends on n only through eta, which is
+# proportional to n, so we differentiate wrt eta and multiply by deta_dn.
+deta_dn = R**3*(4/3)*np.pi
+
+def dfid_dn(T, n):
+    return k_B*T*np.log(n*Lambd(T)**3)
+
+def dfhs_dn(T, n):
+    e = n3(n)
+    # Phi 3 is n2^3 times a function of eta, g = h/D
+    h = e + (1-e)**2*np.log(1-e)
+    dh = e - 2*(1-e)*np.log(1-e)
+    D = 36*np.pi*e**2*(1-e)**2
+    dD = 72*np.pi*e*(1-e)*(1-2*e)
+    dPhi1 = -np.log(1-e) + n0(n)*deta_dn/(1-e)
+    dPhi2 = 2*n1(n)*n2(n)/n/(1-e) + n1(n)*n2(n)*deta_dn/(1-e)**2
+    dPhi3 = 3*n2(n)**3/n*h/D + n2(n)**3*(dh*D - h*dD)/D**2*deta_dn
+    return k_B*T*(dPhi1 + dPhi2 + dPhi3)
+
+# second derivative of eta_eff wrt eta
+def d2eta_eff_deta2(n):
+    return 2*c2 + 6*c3*eta(n)
+
+# derivative of deta_eff_dlambd wrt eta
+def d2eta_eff_dlambd_deta(n):
+    return dc1 + 2*dc2*eta(n) + 3*dc3*eta(n)**2
+
+# second derivative of gHS_eff wrt eta_eff
+def d2gHS_eff_deta_eff2(n):
+    return -3/(1-eta_eff(n))**4 + 12*(1-0.5*eta_eff(n))/(1-eta_eff(n))**5
+
+# second derivative of a1SW wrt eta
+def d2a1SW_deta2(n):
+    return (2*da1VDW_deta*dgHS_eff_deta(n)
+            + a1VDW(n)*(d2gHS_eff_deta_eff2(n)*deta_eff_deta(n)**2
+                        + dgHS_eff_deta_eff(n)*d2eta_eff_deta2(n)))
+
+# derivative of K wrt eta
+def dK_deta(n):
+    return -4*(1-eta(n))**3*(2+eta(n))/(1+2*eta(n))**3
+
+# derivative of a2 wrt eta
+def da2_deta(n):
+    return 0.5*eps*(dK_deta(n)*eta(n)*da1SW_deta(n) + K(n)*da1SW_deta(n)
+                    + K(n)*eta(n)*d2a1SW_deta2(n))
+
+def dfdisp_dn(T, n):
+    return (a1SW(n) + 1/(k_B*T)*a2(n)
+            + eta(n)*(da1SW_deta(n) + 1/(k_B*T)*da2_deta(n)))
+
+# derivative of gHS wrt eta (n2 is 3 eta/R)
+def dgHS_deta(n):
+    e = eta(n)
+    return 2.5/(1-e)**2 + 4*e/(1-e)**3 + 1.5*e**2/(1-e)**4
+
+# derivative of da1SW_dlambd/eta wrt eta (a1VDW/eta is da1VDW_deta)
+def d_da1SW_dlambd_over_eta_deta(n):
+    return (-12*eps*lambd**2*dgHS_eff_deta(n)
+            + da1VDW_deta*(d2gHS_eff_deta_eff2(n)*deta_eff_deta(n)*deta_eff_dlambd(n)
+                           + dgHS_eff_deta_eff(n)*d2eta_eff_dlambd_deta(n)))
+
+def dgSW_deta(T, n):
+    return dgHS_deta(n) + 1/(4*k_B*T)*(d2a1SW_deta2(n) - lambd/3*d_da1SW_dlambd_over_eta_deta(n))
+
+def dDelta_dn(T, n):
+    return kap_a*dgSW_deta(T, n)*deta_dn*(np.exp(eps_a/(k_B*T)) - 1)
+
+# X solves 2 n Delta X^2 + X - 1 = 0
+def dX_dn(T, n):
+    x = X(T, n)
+    d = Delta(T, n)
+    return -2*x**2*(d + n*dDelta_dn(T, n))/(1 + 4*n*d*x)
+
+def dfassoc_dn(T, n):
+    x = X(T, n)
+    return 4*k_B*T*((np.log(x) - x/2 + 0.5) + n*(1/x - 0.5)*dX_dn(T, n))
+
+# chemical potential
 def df_dn(T, n):
-    # step size
-    dn = 1e-8*n
-    return (f(T, n + dn/2) - f(T, n - dn/2))/dn
+    return dfid_dn(T, n) + dfhs_dn(T, n) + dfdisp_dn(T, n) + dfassoc_dn(T, n)
+
+# Derivative of the chemical potential, which we only need for Newton's
+# method, so a finite difference is good enough
+def d2f_dn2(T, n):
+    dn = 1e-6*n
+    return (df_dn(T, n + dn/2) - df_dn(T, n - dn/2))/dn
 
 # Pressure
 def p(T, n):
@@ -227,3 +308,73 @@ nparticular = 0.0022182
 # GFE alternate
 def Phi_alt(T, n, nparticular):
     return f(T, n) - n*df_dn(T, nparticular)
+
+############################################
+# Coexistence, found directly rather than by hand-tuning nparticular
+
+def _coexist(T, x, tol=1e-10, maxiter=50):
+    '''Newton's method for the logs x of the vapor and liquid densities
+    that have equal chemical potential and pressure at temperature T.
+    Returns None if it doesn't converge, or converges to one phase.'''
+    for i in range(maxiter):
+        n = np.exp(x)
+        mu = df_dn(T, n)
+        P = n*mu - f(T, n)
+        dmu = n*d2f_dn2(T, n) # wrt ln n, and dp/dln n is n times this
+        F = np.array([mu[1] - mu[0], P[1] - P[0]])
+        J = np.array([[-dmu[0], dmu[1]],
+                      [-n[0]*dmu[0], n[1]*dmu[1]]])
+        try:
+            step = np.linalg.solve(J, -F)
+        except np.linalg.LinAlgError:
+            return None
+        if not np.all(np.isfinite(step)):
+            return None
+        biggest = np.max(np.abs(step))
+        if biggest > 0.5:
+            step *= 0.5/biggest # don't go too far at once
+        # keep the liquid from packing tighter than is possible
+        while eta(np.exp(x[1] + step[1])) >= 0.9:
+            step /= 2
+        x = x + step
+        if np.max(np.abs(step)) < tol:
+            if x[1] - x[0] < 1e-3:
+                return None # both phases are the same
+            return x
+    return None
+
+def saturation(T, nvapor=None, nliquid=nw, tol=1e-10):
+    '''The vapor and liquid densities (atoms/bohr^3) at coexistence at
+    each of the temperatures T, which should go up from a temperature
+    well below the critical point.  Each temperature starts from the
+    densities extrapolated from the previous two.  nvapor and nliquid
+    are guesses at the lowest temperature; with no nvapor, we take the
+    liquid at zero pressure and the ideal gas in equilibrium with it.
+    Both are nan from the first temperature that fails to converge
+    (e.g. near the critical point) on.'''
+    T = np.asarray(T, dtype=float)
+    nv = np.nan*np.ones(len(T))
+    nl = np.nan*np.ones(len(T))
+    if nvapor is None:
+        for i in range(50):
+            dn = p(T[0], nliquid)/(nliquid*d2f_dn2(T[0], nliquid))
+            nliquid -= dn
+            if abs(dn) < tol*nliquid:
+                break
+        nvapor = np.exp(df_dn(T[0], nliquid)/(k_B*T[0]))/Lambd(T[0])**3
+    xs = []
+    for i in range(len(T)):
+        if len(xs) >= 2:
+            x = xs[-1] + (xs[-1] - xs[-2])*(T[i] - T[i-1])/(T[i-1] - T[i-2])
+        elif xs:
+            x = xs[-1]
+        else:
+            x = np.log([nvapor, nliquid])
+        x = _coexist(T[i], x, tol)
+        if x is None and len(xs) >= 2:
+            x = _coexist(T[i], xs[-1], tol) # extrapolated too far?
+        if x is None:
+            break
+        xs.append(x)
+        nv[i], nl[i] = np.exp(x)
+    return nv, nl
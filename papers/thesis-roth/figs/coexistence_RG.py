@@ -30,7 +30,7 @@ import matplotlib.pyplot as plt
 # |__                                                                                        #
 ##############################################################################################
 
-N = 20 # For publication plots, make this bigger (100? 500? 100000? You decide!)
+N = 20 # For publication plots, make this bigger (100? 500? 1000? You decide!)
 
 # input iteration depth as a parameter
 def npart(iterations):
@@ -39,19 +39,21 @@ def npart(iterations):
     T = 0.5
     mu = -5.751 # I found this by plotting. It is good for T=0.5; i=0
     nmid = 0.0439651327587 # I found this from running the code with the above mu
-    mu = -RG.df_dn(T, nmid, iterations)
 
     Tc = 1.3295 # Rough estimate based on previous plots
     Tlow = T
 
+    # Temp points get closer as we near the critical point
+    j = np.arange(N+1)
+    T = (Tc - Tlow)*(1 - ((N-j)/N)**4) + Tlow
+
     # Bounds of minimization.
     # Use range that works for many temperatures
     # Outside bounds
     a_vap = 1e-10/(RG.sigma**3*np.pi/6)
     c_liq = 0.75/(RG.sigma**3*np.pi/6)
     # Use the central max as the inside bound
-    nmid = 0.2/(RG.sigma**3*np.pi/6) # ad-hoc for now
-    # nmid = minmax_RG.maximize(RG.phi,T,a_vap,c_liq,mu,iterations)
+    nmid = 0.2/(RG.sigma**3*np.pi/6)*np.ones_like(T) # ad-hoc for now
 
     ###############################
 
@@ -62,95 +64,63 @@ def npart(iterations):
     fout.write('#T     nvapor    nmid     nliquid       phi(nvap)       phi(nmid)         phi(nliq)         mu\n')
     sys.stdout.flush()
 
-    # Do first temperature before the loop
-    nvapor, phi_vapor = minmax_RG.minimize(RG.phi, T, a_vap, nmid, mu, iterations)
-    nliquid, phi_liquid = minmax_RG.minimize(RG.phi, T, nmid, c_liq, mu, iterations)
-    print('  initial nvap,phi_vap', nvapor, phi_vapor)
-    print('  initial nmid,phi_mid', nmid, RG.phi(T, nmid, mu, iterations))
-    print('  initial nliq,phi_liq', nliquid, phi_liquid)
-    print('  initial mu', mu)
-
-    #while T < 1.4:
-    for j in range(0, N+1):
-        # Temp points get closer as we near the critical point
-        T = (Tc - Tlow)*(1 - ((N-j)/N)**4) + Tlow
-        print('  T =', T)
-
-        fout.flush()
-
-        # I'm looking at the minima of RG.phi
-        # Use the local max between vapor and liquid to set the boundary for each minimization
-        #nmid = minmax_RG.maximize(RG.phi,T,nvapor, nliquid, mu,iterations)
-        mu = -RG.df_dn(T, nmid, iterations)
-        #a_vap = max(nmid - 2.0*(nmid - nvapor), a_vap)
-        #c_liq = nmid + 2.0*(nliquid - nmid)
-
-        nvapor, phi_vapor = minmax_RG.minimize(RG.phi, T, a_vap, nmid, mu, iterations)
-        nliquid, phi_liquid = minmax_RG.minimize(RG.phi, T, nmid, c_liq, mu, iterations)
-        phi_mid = RG.phi(T, nmid, mu, iterations)
+    # We find the coexistence at a block of temperatures at once, with
+    # minmax_RG searching for the minima at all of them together, and
+    # adjusting mu only at the temperatures where the two minima still
+    # differ.  Each block starts from the densities we found at the end
+    # of the block before, which keeps nmid between the vapor and liquid
+    # as they approach one another near Tc.
+    block = 8
+    nvapor, nliquid, phi_vapor, phi_mid, phi_liquid, mu = [np.zeros_like(T) for k in range(6)]
+    guess_vapor = guess_liquid = None
+    for first in range(0, N+1, block):
+        here = slice(first, first + block)
+        t = T[here]
+        nmid[here] = nmid[first-1] if first else nmid[0]
+        mu[here] = -RG.df_dn(t, nmid[here], iterations)
+        nvapor[here], phi_vapor[here] = minmax_RG.minimize(RG.phi, t, a_vap, nmid[here], mu[here], iterations, b=guess_vapor)
+        nliquid[here], phi_liquid[here] = minmax_RG.minimize(RG.phi, t, nmid[here], c_liq, mu[here], iterations, b=guess_liquid)
+        phi_mid[here] = RG.phi(t, nmid[here], mu[here], iterations)
+        if first == 0:
+            print('  initial nvap,phi_vap', nvapor[0], phi_vapor[0])
+            print('  initial nmid,phi_mid', nmid[0], phi_mid[0])
+            print('  initial nliq,phi_liq', nliquid[0], phi_liquid[0])
+            print('  initial mu', mu[0])
 
         tol = 1e-9
 
         # Compare the two minima in RG.phi
-        # print '    entering while loop'
-        while np.fabs(phi_vapor - phi_liquid)/np.fabs(phi_mid) > tol: # np.fabs casts output as float
-            # print '    whilecond =',np.fabs(phi_vapor - phi_liquid)/np.fabs(phi_mid)
+        todo = np.arange(N+1)[here]
+        todo = todo[np.fabs(phi_vapor[todo] - phi_liquid[todo])/np.fabs(phi_mid[todo]) > tol]
+        while len(todo):
+            t = T[todo]
 
-            delta_mu = (phi_liquid - phi_vapor)/(nliquid - nvapor)
-            # print '      delta_mu=',delta_mu
+            delta_mu = (phi_liquid[todo] - phi_vapor[todo])/(nliquid[todo] - nvapor[todo])
 
             # Change mu
-            mu += delta_mu
-
-            # find new values for nvap, nmid, nliq and phi_vap, phi_mid, phi_liq
-            nmid, phi_mid = minmax_RG.maximize(RG.phi, T, nvapor, nliquid, mu, iterations), RG.phi(T, nmid, mu, iterations)
-            nvapor, phi_vapor = minmax_RG.minimize(RG.phi, T, a_vap, nmid, mu, iterations)
-            nliquid, phi_liquid = minmax_RG.minimize(RG.phi, T, nmid, c_liq, mu, iterations)
-            # print '      nvap,phi(nvap)',nvapor,phi_vapor
-            # print '        etavap',nvapor*RG.sigma**3*np.pi/6
-            # print '      nmid,phi(nmid)',nmid,phi_mid
-            # print '        etamid',nmid*RG.sigma**3*np.pi/6
-            # print '      nliq,phi(nliq)',nliquid,phi_liquid
-            # print '        etaliq',nliquid*RG.sigma**3*np.pi/6
-            # print '\n'
-
-        # if j > N - 20:
-        #   plt.figure()
-        #   delta_n = nliquid - nvapor
-        #   nvals = np.arange(max(nvapor - delta_n, a_vap), min(nliquid + delta_n, c_liq), 0.01*delta_n)
-        #   phivals = np.zeros_like(nvals)
-        #   for i in range(len(nvals)):
-        #     phivals[i] = RG.phi(T,nvals[i],mu,iterations)
-        #   plt.plot(nvals*np.pi*RG.sigma**3/6, phivals, 'b-')
-        #   plt.plot(nliquid*np.pi*RG.sigma**3/6, RG.phi(T,nliquid,mu,iterations), 'o')
-        #   plt.plot(nvapor*np.pi*RG.sigma**3/6, RG.phi(T,nvapor,mu,iterations), 'o')
-        #   plt.plot(nmid*np.pi*RG.sigma**3/6, RG.phi(T,nmid,mu,iterations), '+')
-        #   plt.title('T = %.14g' % T)
-
-        if nmid == nvapor or nmid == nliquid:
-          print('I have achieved silliness!')
-          print('This occurred at T =', T)
-          #break
-        # print '    left while loop'
-        fout.write(str(T))
-        fout.write('  ')
-        fout.write(str(nvapor))
-        fout.write('  ')
-        fout.write(str(nmid))
-        fout.write('  ')
-        fout.write(str(nliquid))
-        fout.write('  ')
-        fout.write(str(phi_vapor))
-        fout.write('  ')
-        fout.write(str(phi_mid))
-        fout.write('  ')
-        fout.write(str(phi_liquid))
-        fout.write('  ')
-        fout.write(str(mu))
-        fout.write('\n')
-        sys.stdout.flush();
-        # print '   T, etaVap, etaLiq, mu',T,nvapor/(RG.sigma**3*np.pi/6),nliquid/(RG.sigma**3*np.pi/6),mu
-        # print '\n'
+            mu[todo] += delta_mu
+            m = mu[todo]
+
+            # find new values for nvap, nmid, nliq and phi_vap, phi_mid, phi_liq,
+            # starting from where they were
+            nmid[todo] = minmax_RG.maximize(RG.phi, t, nvapor[todo], nliquid[todo], m, iterations, b=nmid[todo])
+            phi_mid[todo] = RG.phi(t, nmid[todo], m, iterations)
+            nvapor[todo], phi_vapor[todo] = minmax_RG.minimize(RG.phi, t, a_vap, nmid[todo], m, iterations, b=nvapor[todo])
+            nliquid[todo], phi_liquid[todo] = minmax_RG.minimize(RG.phi, t, nmid[todo], c_liq, m, iterations, b=nliquid[todo])
+
+            todo = todo[np.fabs(phi_vapor[todo] - phi_liquid[todo])/np.fabs(phi_mid[todo]) > tol]
+        guess_vapor, guess_liquid = nvapor[here][-1], nliquid[here][-1]
+        print('  T =', T[here][-1])
+
+        # write out this block now, so an interrupted run keeps it
+        for j in np.arange(N+1)[here]:
+            if nmid[j] == nvapor[j] or nmid[j] == nliquid[j]:
+              print('I have achieved silliness!')
+              print('This occurred at T =', T[j])
+            fout.write('  '.join(str(v) for v in (T[j], nvapor[j], nmid[j], nliquid[j],
+                                                  phi_vapor[j], phi_mid[j], phi_liquid[j], mu[j])))
+            fout.write('\n')
+        fout.flush()
     fout.close()
 
 if __name__ == '__main__':
@@ -6,7 +6,121 @@ import numpy as np
 # E-mail: Daniel.Edward.Roth@gmail.com
 # Date: Nov 2013
 
-def minimize(func,T,a,c,prefac, tol=1e-14):
+# golden() does the work for minimize and maximize here and in
+# minmax_RG.py and minmax_RG_v2.py.  It finds the minima of many
+# functions at once (e.g. the grand free energy at each of many
+# temperatures or trial values of mu), doing the golden section search
+# on all of them with one call of the function for each step.  Each
+# call only asks for the searches that haven't converged yet, so that
+# their extra arguments (temperatures, mu...) are passed in as arrays
+# holding just those.
+
+def _scan(f, lo, hi, args, points, depth=3):
+    """The lowest of points evenly spaced densities in each range
+    [lo,hi], and the neighboring densities, which bracket it.  Where
+    the lowest is next to an end (as when a minimum hugs the end of
+    the range), we scan between it and the end again, up to depth
+    times, to find minima the coarse scan steps over."""
+    left, right = lo.copy(), hi.copy()
+    b = np.empty_like(lo)
+    fb = np.full_like(lo, np.inf)
+    todo = np.arange(len(lo))
+    t = np.arange(1, points)/points
+    t = t.reshape((-1,) + (1,)*lo.ndim)
+    for level in range(depth):
+        l, r = left[todo], right[todo]
+        grid = l + (r - l)*t
+        fgrid = f(grid, *[arg[todo] for arg in args])*np.ones_like(grid)
+        k = np.argmin(np.where(np.isnan(fgrid), np.inf, fgrid), axis=0)[np.newaxis]
+        fk = np.take_along_axis(fgrid, k, axis=0)[0]
+        better = fk < fb[todo]
+        todo, k, l, r, fk = [v[..., better] for v in (todo, k, l, r, fk)]
+        grid = grid[:, better]
+        b[todo] = np.take_along_axis(grid, k, axis=0)[0]
+        fb[todo] = fk
+        k = k[0]
+        left[todo] = np.where(k == 0, l, np.take_along_axis(grid, np.maximum(k-1, 0)[np.newaxis], axis=0)[0])
+        right[todo] = np.where(k == points-2, r, np.take_along_axis(grid, np.minimum(k+1, points-2)[np.newaxis], axis=0)[0])
+        todo = todo[(k == 0) | (k == points-2)]
+        if not len(todo):
+            break
+    return left, b, fb, right
+
+def golden(f, a, c, args=(), b=None, tol=1e-14, points=1000):
+
+    """Find the minima of f in the ranges [a,c]; return a tuple (abscissae, ordinates).
+
+    f is a function of an array of densities n and args, f(n, *args)
+    a and c are the ends of each range (arrays, or numbers for just one)
+    args are arrays with a value for each range (e.g. T and mu)
+    b are guesses at the minima (e.g. those at the previous temperature),
+      which saves scanning points densities in each range to find
+      where to start, where f(b) is below f at the ends of the range
+
+    """
+
+    every = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (a, c, a if b is None else b)]
+                                + [np.asarray(arg) for arg in args])
+    a, c, b0 = every[:3]
+    shape = a.shape
+    a, c = a.ravel(), c.ravel()
+    lo, hi = np.minimum(a, c), np.maximum(a, c)
+    args = [np.array(arg).ravel() for arg in every[3:]]
+    fa = f(a, *args)*np.ones_like(a)
+    fc = f(c, *args)*np.ones_like(c)
+
+    # an interior point that is lower than the ends, to start from
+    b = b0.ravel().copy()
+    fb = np.full_like(lo, np.inf)
+    inside = (b > lo) & (b < hi)
+    if inside.any():
+        fb[inside] = f(b[inside], *[arg[inside] for arg in args])
+    start_lo, start_hi = lo.copy(), hi.copy()
+    scan = ~((fb <= fa) & (fb <= fc)) & (lo < hi)
+    if scan.any():
+        (start_lo[scan], b[scan], fb[scan],
+         start_hi[scan]) = _scan(f, lo[scan], hi[scan], [arg[scan] for arg in args], points)
+
+    # where the lowest point is at an end, we are done already
+    nmin = np.where(fb > fa, a, c)
+    fmin = np.where(fb > fa, fa, fc)
+    todo = np.flatnonzero(~(fb > fa) & ~(fb > fc))
+
+    # golden section search
+    n0 = start_lo[todo]
+    n3 = start_hi[todo]
+    b = b[todo]
+    right = np.abs(n3 - b) > np.abs(b - n0)
+    n1 = np.where(right, b, b - 0.4*(b - n0))
+    n2 = np.where(right, b + 0.4*(n3 - b), b)
+    args = [arg[todo] for arg in args]
+    f1 = f(n1, *args)*np.ones_like(n1)
+    f2 = f(n2, *args)*np.ones_like(n2)
+
+    while len(todo):
+        done = np.abs(n3 - n0) <= tol*(np.abs(n1) + np.abs(n2))
+        if done.any():
+            lower = f1 < f2
+            nmin[todo[done]] = np.where(lower, n1, n2)[done]
+            fmin[todo[done]] = np.where(lower, f1, f2)[done]
+            going = ~done
+            todo, n0, n1, n2, n3, f1, f2 = [v[going] for v in (todo, n0, n1, n2, n3, f1, f2)]
+            args = [arg[going] for arg in args]
+            if not len(todo):
+                break
+        shift = f2 < f1
+        # Shift everything over one way where f2 < f1, the other way elsewhere
+        new = np.where(shift, 0.4*n3 + 0.6*n2, 0.4*n0 + 0.6*n1)
+        fnew = f(new, *args)*np.ones_like(new)
+        n0, n1, n2, n3 = (np.where(shift, n1, n0), np.where(shift, n2, new),
+                          np.where(shift, new, n1), np.where(shift, n3, n2))
+        f1, f2 = np.where(shift, f2, fnew), np.where(shift, fnew, f1)
+
+    if shape == ():
+        return nmin[0], fmin[0]
+    return nmin.reshape(shape), fmin.reshape(shape)
+
+def minimize(func, T, a, c, prefac, tol=1e-14, b=None):
 
     """Find the minimum of a function in the range [a,c]; return a tuple (abscissa, ordinate).
 
@@ -14,72 +128,15 @@ def minimize(func,T,a,c,prefac, tol=1e-14):
     T is the temp in Kelvin
     a and c are the initial guesses of density (make sure to put into atomic units!)
     prefac is the term that determines chemical potential
+    T, a, c and prefac may be arrays, to find many minima at once
+    b, if given, is a guess at the minimum (see golden)
 
     """
 
-    fa = func(T, a, prefac)
-    fc = func(T, c, prefac)
-
-    b = 0.6*a + 0.4*c
-    b_old = a
-    fb = func(T, b, prefac)
-    dx = (c - a)/100000
-
-    if a == c:
-        return a, fa
-    possible_bs = np.arange(a+dx, c-dx, dx)
-    f_possible_bs = func(T, possible_bs, prefac)
-    for i in range(1, len(possible_bs)):
-        if f_possible_bs[i] < fb:
-            b = possible_bs[i]
-            fb = f_possible_bs[i]
-    if fb > fa:
-        return a, fa
-    if fb > fc:
-        return c, fc
+    return golden(lambda n, T, prefac: func(T, n, prefac), a, c, (T, prefac), b=b, tol=tol)
 
-    # golden section search
-    n0 = a
-    n3 = c
-    if abs(c - b) > abs(b - a):
-        n1 = b
-        n2 = b + 0.4*(c - b)
-    else:
-        n1 = b - 0.4*(b - a)
-        n2 = b
-
-    f1 = func(T, n1, prefac)
-    f2 = func(T, n2, prefac)
-
-    while abs(n3-n0) > tol*(abs(n1)+abs(n2)):
-        if f2 < f1: # Shift everything over one way
-            n0 = n1
-            n1 = n2
-            n2 = 0.4*n3 + 0.6*n2
-
-            # re-define f_i to be accurate to new n_i
-            f1 = f2
-            f2 = func(T, n2, prefac)
-        else: # Shift everything over the other way
-            n3 = n2
-            n2 = n1
-            n1 = 0.4*n0 + 0.6*n1
-
-            # re-define f_i to be accurate to the new n_i
-            f2 = f1
-            f1 = func(T, n1, prefac)
-
-    if f1 < f2:
-        nmin = n1
-        fmin = f1
-    else:
-        nmin = n2
-        fmin = f2
-
-    return nmin, fmin
-
-def maximize(func,T,a,c,prefac, tol=1e-14):
+def maximize(func, T, a, c, prefac, tol=1e-14, b=None):
     def negfunc(T, n, x):
         return -func(T, n, x)
-    n, phi = minimize(negfunc, T, a, c, prefac, tol)
+    n, phi = minimize(negfunc, T, a, c, prefac, tol, b)
     return n
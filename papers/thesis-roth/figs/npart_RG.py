@@ -1,6 +1,6 @@
 from __future__ import division
-import RG
-import minmax_RG
+import RG_v2 as RG
+import minmax_RG_v2 as minmax_RG
 import numpy as np
 import time
 import matplotlib, sys
@@ -29,6 +29,11 @@ import forte
 
 ###############################
 
+# RG_v2 takes the chemical potential itself, while this scheme works
+# with the density nparticular whose chemical potential we use.
+def phi(T, n, nparticular, i):
+    return RG.phi(T, n, RG.df_dn(T, nparticular, i), i)
+
 # input iteration depth as a parameter
 
 def npart(iterations):
@@ -63,9 +68,9 @@ def npart(iterations):
     sys.stdout.flush()
 
     # Do first temperature before the loop
-    nvapor, phi_vapor = minmax_RG.minimize(RG.phi, T, a_vap, c_vap, nparticular, iterations)
+    nvapor, phi_vapor = minmax_RG.minimize(phi, T, a_vap, c_vap, nparticular, iterations)
     print('initial nvap,phi_vap', nvapor, phi_vapor)
-    nliquid, phi_liquid = minmax_RG.minimize(RG.phi, T, a_liq, c_liq, nparticular, iterations)
+    nliquid, phi_liquid = minmax_RG.minimize(phi, T, a_liq, c_liq, nparticular, iterations)
     print('initial nliq,phi_liq', nliquid, phi_liquid)
     print('initial npart', nparticular*(RG.sigma**3*np.pi/6))
 
@@ -75,17 +80,17 @@ def npart(iterations):
 
         fout.flush()
         # Starting point for new nparticular is abscissa of max RG.phi with old nparticular
-        nparticular = minmax_RG.maximize(RG.phi, T, nvapor, nliquid, nparticular, iterations)
+        nparticular = minmax_RG.maximize(phi, T, nvapor, nliquid, nparticular, iterations)
 
         # I'm looking at the minima of RG.phi
         c_vap = nparticular
         a_liq = nparticular
 
-        nvapor, phi_vapor = minmax_RG.minimize(RG.phi, T, c_vap, a_vap, nparticular, iterations)
-        nliquid, phi_liquid = minmax_RG.minimize(RG.phi, T, a_liq, c_liq, nparticular, iterations)
+        nvapor, phi_vapor = minmax_RG.minimize(phi, T, c_vap, a_vap, nparticular, iterations)
+        nliquid, phi_liquid = minmax_RG.minimize(phi, T, a_liq, c_liq, nparticular, iterations)
 
         tol = 1e-5
-        fnpart = RG.phi(T, nparticular, nparticular, iterations)
+        fnpart = phi(T, nparticular, nparticular, iterations)
 
         # Compare the two minima in RG.phi
         while np.fabs(phi_vapor - phi_liquid)/np.fabs(fnpart) > tol:
@@ -93,14 +98,14 @@ def npart(iterations):
             delta_mu = (phi_liquid - phi_vapor)/(nliquid - nvapor)
 
             def newphi(T, n, npart, i):
-                return RG.phi(T, n, npart, i) - delta_mu*n
+                return phi(T, n, npart, i) - delta_mu*n
 
             nparticular = minmax_RG.maximize(newphi, T, nvapor, nliquid, nparticular, iterations)
 
-            fnpart = RG.phi(T, nparticular, nparticular, iterations)
+            fnpart = phi(T, nparticular, nparticular, iterations)
 
-            nvapor, phi_vapor = minmax_RG.minimize(RG.phi, T, a_vap, c_vap, nparticular, iterations)
-            nliquid, phi_liquid = minmax_RG.minimize(RG.phi, T, a_liq, c_liq, nparticular, iterations)
+            nvapor, phi_vapor = minmax_RG.minimize(phi, T, a_vap, c_vap, nparticular, iterations, b=nvapor)
+            nliquid, phi_liquid = minmax_RG.minimize(phi, T, a_liq, c_liq, nparticular, iterations, b=nliquid)
 
         fout.write(str(T))
         fout.write('  ')
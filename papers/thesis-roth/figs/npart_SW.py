@@ -84,8 +84,8 @@ for i in range(0, N+1):
         nparticular = minmax.maximize(newphi, T, nvapor, nliquid, nparticular)
         fnpart = SW.phi(T, nparticular, nparticular)
 
-        nvapor, phi_vapor = minmax.minimize(SW.phi, T, a_vap, c_vap, nparticular)
-        nliquid, phi_liquid = minmax.minimize(SW.phi, T, a_liq, c_liq, nparticular)
+        nvapor, phi_vapor = minmax.minimize(SW.phi, T, a_vap, c_vap, nparticular, b=nvapor)
+        nliquid, phi_liquid = minmax.minimize(SW.phi, T, a_liq, c_liq, nparticular, b=nliquid)
         if abs(T - 0.8) < 0.05:
             print("\nT =", T)
             print('npart', nparticular)
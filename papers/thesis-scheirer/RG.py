@@ -1,5 +1,7 @@
 from __future__ import division
 import numpy as np
+from scipy.interpolate import interp1d
+import collections
 import integrate
 
 # Author: Dan Roth
@@ -42,13 +44,67 @@ def fiterative(T,n,i):
     f = fnaught
     # eqn (5) from Forte 2011:
     for j in range(1,i+1): # The function range(y) only goes up to y-1; range(y+1) will include y
-        IDvalue = ID(integrand_ID,T,n,j)
-        ID_refvalue = ID_ref(integrand_ID_ref,T,n,j)
-        dfi = -k_B*T*np.log(IDvalue/ID_refvalue)/VD(j) # eqn (7), Forte 2011
-        f += dfi
+        f = f + dfi(T,n,j)
 
     return f
 
+# Evaluating the recursion directly costs roughly (3*points)**i
+# evaluations of fnaught, since every integrand point of level i needs
+# level i-1 at three densities.  Instead we compute each level's
+# correction dfi once on a shared grid of densities (using the
+# interpolated lower levels), and interpolate from that grid.  The
+# grids are cached per (T, i), keeping the most recently used ones.
+# The integral over x uses the 15 point Gauss-Kronrod rule on
+# kronrod_panels equal panels, doubling them until the 7 point Gauss
+# rule embedded in it agrees on dfi to within dfi_tol everywhere.
+grid_points = 1000 # number of densities in the shared grid
+kronrod_panels = 8 # panels in the integral over x, to start with
+max_kronrod_panels = 64
+dfi_tol = 3e-5 # estimated error in dfi we accept
+max_cached_levels = 64
+_dfi_cache = collections.OrderedDict()
+
+def dfi(T,n,i):
+    return _dfi_interpolant(T,i)(n)
+
+def clear_cache():
+    _dfi_cache.clear()
+
+def _logsumexp(a):
+    amax = a.max(axis=-1)
+    return amax + np.log(np.sum(np.exp(a - amax[...,np.newaxis]), axis=-1))
+
+def _dfi_interpolant(T,i):
+    key = (T,i)
+    if key in _dfi_cache:
+        _dfi_cache[key] = _dfi_cache.pop(key) # mark it as recently used
+        return _dfi_cache[key]
+    maxn = 1/(sigma**3*np.pi/6)
+    ngrid = maxn*(np.arange(grid_points) + 0.5)/grid_points
+    n = ngrid[:,np.newaxis]
+    maxx = np.minimum(1,maxn/n-1)
+    # eqn (7), Forte 2011, with ID and ID_ref summed in log space; the
+    # maxx and n prefactors cancel in the ratio.
+    panels = kronrod_panels
+    while True:
+        t,wk,wg = integrate.kronrod_rule(panels)
+        x = maxx*t
+        fbar = fbarD(T,n,x,i)
+        lnI = -VD(i)/k_B/T*(fbar + ubarD(T,n,x,i))
+        lnI_ref = -VD(i)/k_B/T*fbar
+        with np.errstate(divide='ignore'):
+            lnwk,lnwg = np.log(wk),np.log(wg) # wg is zero at the Kronrod points
+        df = -k_B*T*(_logsumexp(lnI + lnwk) - _logsumexp(lnI_ref + lnwk))/VD(i)
+        df_gauss = -k_B*T*(_logsumexp(lnI + lnwg) - _logsumexp(lnI_ref + lnwg))/VD(i)
+        if not np.any(np.abs(df - df_gauss) > dfi_tol) or panels >= max_kronrod_panels:
+            break
+        panels *= 2
+    interp = interp1d(ngrid, df, kind='cubic', bounds_error=False, fill_value=(df[0],df[-1]))
+    _dfi_cache[key] = interp
+    while len(_dfi_cache) > max_cached_levels:
+        _dfi_cache.popitem(last=False)
+    return interp
+
 # Integral over amplitudes (x) of wave-packet of length lambda_D
 # similar to sum over density fluctuations n_D
 # eqn(8), Forte 2011
@@ -72,7 +128,7 @@ def ID(integrand,T,n,i):
     # if maxx*n > maxn:
     #     maxx = maxn/n
     maxx = np.minimum(np.ones_like(n),maxn/(n+1e-100)-1)
-    return integrate.midpoint(lambda x: integrand_ID(T,n,x,i),0,maxx,1000)*n
+    return integrate.gauss_kronrod(lambda x: integrand_ID(T,n,x,i),0,maxx)[0]*n
 
 # Reference for ID
 # Evaluated at small enough wavelengths that UbarD should be negligible
@@ -87,7 +143,7 @@ def ID_ref(integrand,T,n,i):
     maxx = np.minimum(np.ones_like(n),maxn/(n+1e-100)-1)
     # if maxx*n > maxn:
     #     maxx = maxn/n
-    return integrate.midpoint(lambda x: integrand_ID_ref(T,n,x,i),0,maxx,1000)*n
+    return integrate.gauss_kronrod(lambda x: integrand_ID_ref(T,n,x,i),0,maxx)[0]*n
 
 # Average within the considered subdomain, based on x
 # eqn (10), Forte 2011
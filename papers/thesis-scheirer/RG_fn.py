@@ -301,9 +301,18 @@ def ubarD(T,n,x,i):
         
 
 def f01_ext(numdensity):
-        if numdensity > 0.0008 and numdensity < max_fillingfraction_handled/sphere_volume:
-                return f01interp(numdensity)
-        return RG.fiterative(temp,numdensity,0)
+        if np.ndim(numdensity) == 0:
+                if numdensity > 0.0008 and numdensity < max_fillingfraction_handled/sphere_volume:
+                        return f01interp(numdensity)
+                return RG.fiterative(temp,numdensity,0)
+        # integrate hands us all of its abscissae at once, so we pick
+        # f01interp or RG.fiterative point by point.
+        numdensity = np.asarray(numdensity, dtype=float)
+        handled = (numdensity > 0.0008) & (numdensity < max_fillingfraction_handled/sphere_volume)
+        f = np.empty_like(numdensity)
+        f[handled] = f01interp(numdensity[handled])
+        f[~handled] = RG.fiterative(temp,numdensity[~handled],0)
+        return f
 
 
 
@@ -35,26 +35,36 @@ kb = 1          # define Boltzman constant as unity, since we will be working in
 ### Square Well Stuff ###
 sigma = 2       # HS diameter
 epsilon = 1     # depth of well
-lambdaSW = 1.5  # range of interaction (valid range: 1.3 - 1.8) (NOTE: sigma*lambdaSW - sigma = well width)
 R = sigma/2     # HS radius
-
-# Coefficients for eta_eff (effective filling fraction) A. Gil-Villegas eqn(37)
-c1 = 2.25855 - 1.50349*lambdaSW + 0.249434*lambdaSW**2
-c2 = -0.669270 + 1.40049*lambdaSW - 0.827739*lambdaSW**2
-c3 = 10.1576 - 15.0427*lambdaSW + 5.30827*lambdaSW**2
-# Coefficients for d(eta_eff)_d(lambaSW) (derivatives of the above 3 coefficients w.r.t. lambdaSW)
-dc1 = -1.50349 + 2*0.249434*lambdaSW
-dc2 = 1.40049 - 2*0.827739*lambdaSW
-dc3 = -15.0427 + 2*5.30827*lambdaSW
-
-# derivate of a1VDW wrt eta (this is required for fdisp) A. Gil-Villegas eqn(35)
-da1VDW_deta = -4*epsilon*(lambdaSW**3-1)
+b = (4/3)*np.pi*R**3    # eta = b*n
 
 
 ### Van Der Waal's Stuff ###
 # Only used these to test SnAFT against Van Der Waal's but due to time limitations I never fully explored this fun comparison
 B=(np.pi*sigma**3)/6.0
-alphaVDW = ((2*np.pi*epsilon*sigma**3)/3)*(lambdaSW**3-1)
+
+
+def set_lambdaSW(new_lambdaSW):
+    ### Precomputes everything that depends only on the range of the well ###
+    # (call this to change lambdaSW, rather than setting it directly)
+    global lambdaSW, c1, c2, c3, dc1, dc2, dc3, da1VDW_deta, alphaVDW
+    lambdaSW = new_lambdaSW
+
+    # Coefficients for eta_eff (effective filling fraction) A. Gil-Villegas eqn(37)
+    c1 = 2.25855 - 1.50349*lambdaSW + 0.249434*lambdaSW**2
+    c2 = -0.669270 + 1.40049*lambdaSW - 0.827739*lambdaSW**2
+    c3 = 10.1576 - 15.0427*lambdaSW + 5.30827*lambdaSW**2
+    # Coefficients for d(eta_eff)_d(lambaSW) (derivatives of the above 3 coefficients w.r.t. lambdaSW)
+    dc1 = -1.50349 + 2*0.249434*lambdaSW
+    dc2 = 1.40049 - 2*0.827739*lambdaSW
+    dc3 = -15.0427 + 2*5.30827*lambdaSW
+
+    # derivate of a1VDW wrt eta (this is required for fdisp) A. Gil-Villegas eqn(35)
+    da1VDW_deta = -4*epsilon*(lambdaSW**3-1)
+
+    alphaVDW = ((2*np.pi*epsilon*sigma**3)/3)*(lambdaSW**3-1)
+
+set_lambdaSW(1.5)  # range of interaction (valid range: 1.3 - 1.8) (NOTE: sigma*lambdaSW - sigma = well width)
 #                                                                                             #
 #                                                                                             #
 ################################### END CONSTANTS #############################################
@@ -75,6 +85,23 @@ def ftot(T,n):
     return fid(T,n) + fhs(T,n) + fdisp(T,n)
 
 
+def dftot_dn(T,n):
+    ### Derivative of total free energy per volume w.r.t. n  (NOTE: this is mu) ###
+    # exact, and T and n may be arrays of any (broadcastable) shape
+    return dfid_dn(T,n) + dfhs_dn(T,n) + dfdisp_dn(T,n)
+
+
+def d2ftot_dn2(T,n):
+    ### Second derivative of total free energy per volume w.r.t. n ###
+    return d2fid_dn2(T,n) + d2fhs_dn2(T,n) + d2fdisp_dn2(T,n)
+
+
+def dftot_dT(T,n):
+    ### Derivative of total free energy per volume w.r.t. T  (NOTE: at fixed volume, this is neg. entropy) ###
+    # fid and fhs are proportional to T, and the only other T dependence is the 1/T of a2
+    return fid(T,n)/T + fhs(T,n)/T - a2(n)*n/(kb*T**2)
+
+
 def frg(T,n):
     # Was using this as a test function when comparing my RG code.
     # This is considered f0, SnAFT minus one of the perturbation terms found in the dispersion free energy. 
@@ -140,7 +167,7 @@ def num_dfxs_dn(T,n):
 
 def phi(T,n,npart):
     ### Grand free energy per volume ###
-    mu = numH_dftot_dn(T,npart)
+    mu = dftot_dn(T,npart)
     return ftot(T,n)-mu*n
     
 
@@ -190,12 +217,12 @@ def findSxs(T,n):
 
 def findStot(T,n):
     ### Total entropy ###
-    return -num_dftot_dT(T,n)
+    return -dftot_dT(T,n)
     
     
 def findP(T,n):
     ### Pressure ###
-    return n*numH_dftot_dn(T,n) - ftot(T,n)
+    return n*dftot_dn(T,n) - ftot(T,n)
 #                                                                                             #
 #                                                                                             #
 ################################# END THERMODYNAMIC PROPERTIES ################################
@@ -211,6 +238,12 @@ def fid(T,n):
     # A. Gil-Villegas eqn(9)
     # Naturally we set lambda to 1 of course!
     return n*kb*T*(np.log(n) - 1)
+
+def dfid_dn(T,n):
+    return kb*T*np.log(n)
+
+def d2fid_dn2(T,n):
+    return kb*T/n
 #                                                                                             #
 #                                                                                             #
 ######################################### END IDEAL GAS #######################################
@@ -224,16 +257,25 @@ def fid(T,n):
 #                                                                                             #
 def fhs(T,n):
     # Phi 1: J. Hughes eqn(7)
-    Phi1 = -n0(n)*np.log(1-n3(n))
-
+    # Phi1 = -n0(n)*np.log(1-n3(n))
     # Phi 2: J. Hughes eqn(8)
-    Phi2 = (n1(n)*n2(n))/(1-n3(n))
-
+    # Phi2 = (n1(n)*n2(n))/(1-n3(n))
     # Phi 3: J. Hughes eqn(9)
-    Phi3 = n2(n)**3*((n3(n)+(1-n3(n))**2*np.log(1-n3(n)))/(36*np.pi*n3(n)**2*(1-n3(n))**2))
+    # Phi3 = n2(n)**3*((n3(n)+(1-n3(n))**2*np.log(1-n3(n)))/(36*np.pi*n3(n)**2*(1-n3(n))**2))
+    # For a homogeneous fluid the logs cancel, and Phi1 + Phi2 + Phi3 is
+    # just Carnahan-Starling, which is cheaper and has no roundoff at low n.
+    e = eta(n)
 
     # HS free energy
-    return kb*T*(Phi1 + Phi2 + Phi3)
+    return kb*T*n*(4*e - 3*e**2)/(1-e)**2
+
+def dfhs_dn(T,n):
+    e = eta(n)
+    return kb*T*(8*e - 9*e**2 + 3*e**3)/(1-e)**3
+
+def d2fhs_dn2(T,n):
+    e = eta(n)
+    return kb*T*b*(8 - 2*e)/(1-e)**4
 
 
 # Fundamental measure densities
@@ -261,7 +303,52 @@ def n3(n):
 #                                                                                             #
 def fdisp(T,n):
     # A. Gil-Villegas, basically eqn(18) and eqn(10) combined
-    return (a1SW(n) + 1/(kb*T)*a2(n))*n
+    a1, da1, d2a1, a2_, da2, d2a2 = a1SW_a2_derivatives(n)
+    return (a1 + 1/(kb*T)*a2_)*n
+
+def dfdisp_dn(T,n):
+    # fdisp = n*Q(eta), so dfdisp/dn = Q + eta*dQ/deta
+    a1, da1, d2a1, a2_, da2, d2a2 = a1SW_a2_derivatives(n)
+    return a1 + a2_/(kb*T) + eta(n)*(da1 + da2/(kb*T))
+
+def d2fdisp_dn2(T,n):
+    a1, da1, d2a1, a2_, da2, d2a2 = a1SW_a2_derivatives(n)
+    return b*(2*(da1 + da2/(kb*T)) + eta(n)*(d2a1 + d2a2/(kb*T)))
+
+
+def a1SW_a2_derivatives(n):
+    # a1SW and a2 with their first and second derivatives w.r.t. eta,
+    # computing eta, eta_eff and gHS_eff (and their derivatives) once
+    e = eta(n)
+    x = c1*e + c2*e**2 + c3*e**3        # eta_eff
+    dx = c1 + 2*c2*e + 3*c3*e**2
+    d2x = 2*c2 + 6*c3*e
+    d3x = 6*c3
+    y = 1/(1-x)
+    # gHS_eff and its derivatives w.r.t. eta_eff, then w.r.t. eta
+    g = (1-0.5*x)*y**3
+    g1 = (2.5 - x)*y**4
+    g2 = (9 - 3*x)*y**5
+    g3 = (42 - 12*x)*y**6
+    G1 = g1*dx
+    G2 = g2*dx**2 + g1*d2x
+    G3 = g3*dx**3 + 3*g2*dx*d2x + g1*d3x
+
+    # a1SW = a1VDW*gHS_eff, with a1VDW = da1VDW_deta*eta
+    a1 = da1VDW_deta*e*g
+    da1 = da1VDW_deta*(g + e*G1)
+    d2a1 = da1VDW_deta*(2*G1 + e*G2)
+    d3a1 = da1VDW_deta*(3*G2 + e*G3)
+
+    # a2 = 0.5*epsilon*K*eta*da1SW_deta
+    k = (1-e)**4/(1+2*e)**2
+    L = -4/(1-e) - 4/(1+2*e)            # dlnK/deta
+    k1 = k*L
+    k2 = k*(L**2 - 4/(1-e)**2 + 8/(1+2*e)**2)
+    a2_ = 0.5*epsilon*k*e*da1
+    da2 = 0.5*epsilon*(k1*e*da1 + k*da1 + k*e*d2a1)
+    d2a2 = 0.5*epsilon*(k2*e*da1 + k*e*d3a1 + 2*(k1*da1 + k1*e*d2a1 + k*d2a1))
+    return a1, da1, d2a1, a2_, da2, d2a2
 
 
 
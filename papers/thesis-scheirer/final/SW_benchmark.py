@@ -0,0 +1,34 @@
+from __future__ import division
+import time
+import numpy as np
+import SW
+
+###############################################################################################
+# Compares the closed form SW.dftot_dn (evaluated on a whole array at once) with the old     #
+# path of calling the finite difference SW.numH_dftot_dn one point at a time, as fsolve did. #
+###############################################################################################
+
+T = np.linspace(0.3,1.3,20)[:,np.newaxis]
+n = np.linspace(1e-6,0.2,500)[np.newaxis,:]
+T, n = np.broadcast_arrays(T, n)
+
+start = time.time()
+mu_scalar = np.array([SW.numH_dftot_dn(Ti,ni) for Ti,ni in zip(T.flat,n.flat)]).reshape(T.shape)
+scalar_time = time.time() - start
+
+start = time.time()
+mu_fd = SW.numH_dftot_dn(T,n)
+fd_time = time.time() - start
+
+repeats = 100
+start = time.time()
+for i in range(repeats):
+    mu = SW.dftot_dn(T,n)
+closed_time = (time.time() - start)/repeats
+
+print('%d points' % T.size)
+print('numH_dftot_dn, one point at a time: %10.3g s' % scalar_time)
+print('numH_dftot_dn, on the whole array:  %10.3g s' % fd_time)
+print('dftot_dn, on the whole array:       %10.3g s  (%.0f times faster than one at a time)'
+      % (closed_time, scalar_time/closed_time))
+print('largest relative difference in mu:   %10.3g' % np.max(np.abs(mu - mu_scalar)/np.abs(mu)))
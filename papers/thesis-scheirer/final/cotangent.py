@@ -1,9 +1,11 @@
 import scipy as sp
-from scipy.optimize import fsolve
 import pylab as plt
 import matplotlib
 import SW
 import numpy as np
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/../..')
+import coexistence
 
 
 ###############################################################################################
@@ -11,7 +13,7 @@ import numpy as np
 # Email: scheirer@oregonstate.edu                                                             #
 # Date: February 2016                                                                         #
                                                                                               #
-# Uses fsolve to find the common tangent of the free energy density vs number density...      #
+# Uses coexistence.py to find the common tangent of the free energy density vs number...      #
 # ...this then constructs the temp vs filling fraction liquid-vapor coexistence plot, total...#
 # ...grand free energy per volume, and many more fun plots.                                   #
 ###############################################################################################
@@ -26,12 +28,12 @@ import numpy as np
 ### Normal temperature linspace (useful for quick troubleshooting) ###
 temp = plt.linspace(0.3,0.3,1)
 
-### non-uniform temperature linspace (used to get higher resolution near critical temperature where fsolve starts to break down) ###
+### non-uniform temperature linspace (used to get higher resolution near critical temperature) ###
 #temp = np.concatenate((plt.linspace(0.3,1.0,300),plt.linspace(1.0+0.7/300,1.3,600),plt.linspace(1.3+0.3/600,1.328,1000),plt.linspace(1.328+0.028/1000,1.33,30000)),axis=0)
 
-### Initial guesses for fsovle ###
-### (NOTE:  need to "play" with these initally to get fsolve to work... ###
-### ...This may requires plotting your free energy per volume vs number density first to come up with some initial guesses. ###
+### Initial guesses for the common tangent at the first temperature ###
+### (NOTE: these only need to be good enough for the first temperature;  ###
+### ...coexistence.trace follows the solution from there, right up to the critical point. ###
 #Lguess = 1e-9  # Initial left "n" guess (good for 0.6)
 Lguess = 1e-12  # Initial left "n" guess (good for 0.3)
 Rguess = 0.2    # Initial right "n" guess
@@ -43,39 +45,25 @@ Rguess = 0.2    # Initial right "n" guess
 
 
 
-############################### START fsolve WORK #############################################
+############################### START COMMON TANGENT WORK #####################################
 #                                                                                             #
 #                                                                                             #
- ###
-def g(x):
-        ### just a general function which includes conditions for finding the cotangent
-	x1=x[0]                                 # left guess "n"
-	x2=x[1]                                 # right guess "n"
-	y1=SW.ftot(T,x[0])                      # f(x1)
-	y2=SW.ftot(T,x[1])                      # f(x2)
-	dy1=SW.numH_dftot_dn(T,x[0])            # df_dx(x1)
-	dy2=SW.numH_dftot_dn(T,x[1])            # df_dx(x2)
-
-                             
-	out=[(dy1-dy2)]                         # Condition 1: df_dx(x1) = df_dx(x2)
-	out.append(dy1-((y2-y1)/(x2-x1)))       # Condition 2: df_dx(x1) = slope between the two positions
-	return out
-
-data=[]
-count=0
-for T in temp:
-	count+=1
-	if count%10==0:
-		print '%f    \r'%T,
-	sol = fsolve(g,[Lguess,Rguess])         # Magic happens here
-	data.append([T,sol[0],sol[1]])          # updating a list to keep track of the temperature T and corresponding left and right number densities found by fsolve
-	Lguess=sol[0]                           # Resets the next left guess number density for fsolve as the previous left solution
-	Rguess=sol[1]                           # Resets the next right guess number density for fsolve as the previous right solution
+# Condition 1: df_dx(x1) = df_dx(x2)
+# Condition 2: df_dx(x1) = slope between the two positions
+# (equivalently, equal chemical potential and equal pressure)
+phase = coexistence.Phase(SW.ftot, SW.dftot_dn, SW.d2ftot_dn2)
+nL, nR = coexistence.coexistence_curve(phase, temp, Lguess, Rguess)   # Magic happens here
+
+found = np.isfinite(nL)                                  # above the critical temperature there is no coexistence
+if not found.all():
+	print 'no coexistence above T = %f' % temp[found].max()
+data = np.vstack((temp[found], nL[found], nR[found])).T  # the temperature T and corresponding left and right number densities
+sol = data[-1,1:]
 print(sol)
 print(temp[-1])
 #                                                                                             #
 #                                                                                             #
-########################### END fsolve WORK ###################################################	
+########################### END COMMON TANGENT WORK ###########################################
 
 
 
@@ -106,7 +94,7 @@ def cotangent_t0():
         plt.ylabel('Total free energy per volume')
         plt.xlabel('Number density (n)')
         plt.plot(x,SW.ftot(Tlist[-1],x),color='#f36118',linewidth=1)
-        plt.plot(x, SW.numH_dftot_dn(Tlist[-1],nR[-1])*(x-nR[-1])+SW.ftot(Tlist[-1],nR[-1]),color='#00c0c0',linewidth=1)
+        plt.plot(x, SW.dftot_dn(Tlist[-1],nR[-1])*(x-nR[-1])+SW.ftot(Tlist[-1],nR[-1]),color='#00c0c0',linewidth=1)
         plt.plot(nL[-1],SW.ftot(Tlist[-1],nL[-1]),'ko')
         plt.plot(nR[-1],SW.ftot(Tlist[0],nR[-1]),'ko')
         #plt.legend(loc='best')
@@ -128,7 +116,7 @@ def cotangent_tloop():
                         plt.ylim(-0.8,1)
                         plt.xlim(0,.18)
                         plt.plot(x,SW.ftot(Tlist[i],x))
-                        plt.plot(x, SW.numH_dftot_dn(Tlist[i],nR[i])*(x-nR[i])+SW.ftot(Tlist[i],nR[i]))
+                        plt.plot(x, SW.dftot_dn(Tlist[i],nR[i])*(x-nR[i])+SW.ftot(Tlist[i],nR[i]))
                         plt.plot(nL[i],SW.ftot(Tlist[i],nL[i]),'ko')
                         plt.plot(nR[i],SW.ftot(Tlist[i],nR[i]),'ro')
                         plt.savefig('cotangent_loop/cotangent%03d'%count)
@@ -177,7 +165,7 @@ def cotangent_fsolve_breakdown():
                 #if previousSize - (nR[i]-nL[i]) > 0.0000001:
                         x = plt.linspace(nL[i],nR[i],4000)
                         previousSize = nR[i]-nL[i]
-                        datatangent=SW.numH_dftot_dn(Tlist[i],nR[i])*(x-nR[i])+SW.ftot(Tlist[i],nR[i])
+                        datatangent=SW.dftot_dn(Tlist[i],nR[i])*(x-nR[i])+SW.ftot(Tlist[i],nR[i])
                         #Tprev = Tlist[i]
                         plt.figure()
                         plt.title('ftot scaled  VS  n  @ T=%0.6f'%Tlist[i])
@@ -237,8 +237,8 @@ for p in range(50,len(T)):
                         if numdensity3[i] < 0.085 and numdensity3[i]>0.001:
                                 madyrgp.append(dyrgp[i])
                 madyrgp = sum(madyrgp)/len(madyrgp)
-                mu=SW.numH_dftot_dn(T[p],numdensity3)
-                mu2 = SW.numH_dftot_dn(T[p],nR1[p])
+                mu=SW.dftot_dn(T[p],numdensity3)
+                mu2 = SW.dftot_dn(T[p],nR1[p])
                 mu3 = dfrgp_dn(nL1[p])
                 mu4 = dfrgp_dn(nR1[p])
                 #print madyrgp
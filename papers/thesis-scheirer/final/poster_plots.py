@@ -120,7 +120,7 @@ def cotangent_t0():
         plt.ylabel('Helmholtz free energy per volume')
         plt.xlabel('filling fraction')
         plt.plot(xff,SW.ftot(Tlist[100],x),color='#f36118',linewidth=3)
-        plt.plot(xff, SW.numH_dftot_dn(Tlist[100],nR[100])*(x-nR[100])+SW.ftot(Tlist[100],nR[100]),color='#00c0c0',linewidth=2)
+        plt.plot(xff, SW.dftot_dn(Tlist[100],nR[100])*(x-nR[100])+SW.ftot(Tlist[100],nR[100]),color='#00c0c0',linewidth=2)
         #plt.plot(nL[100],SW.ftot(Tlist[100],nL[100]),'ko')
         #plt.plot(nR[100],SW.ftot(Tlist[100],nR[100]),'ko')
         plt.plot(nL[100]*((4*np.pi*(SW.R)**3)/3),SW.ftot(Tlist[100],nL[100]),'ko')
@@ -131,13 +131,13 @@ def cotangent_t0():
 
 def gfe():
   x2=plt.linspace(1e-20,.12,40000)
-  mu=SW.numH_dftot_dn(Tlist[100],nR[100])
+  mu=SW.dftot_dn(Tlist[100],nR[100])
   plt.figure()
   plt.title('Grand free energy per volume vs n@ T=%0.4f'%Tlist[100])
   plt.ylabel('Grand free energy per volume')
   plt.xlabel('number density (n)')  
   plt.plot(x2,SW.ftot(Tlist[100],x2)-mu*x2,color='#f36118')
-  plt.plot(x2,SW.numH_dftot_dn(Tlist[100],nR[100])*(x2-nR[100])+SW.ftot(Tlist[100],nR[100])-mu*nR[100],'c')
+  plt.plot(x2,SW.dftot_dn(Tlist[100],nR[100])*(x2-nR[100])+SW.ftot(Tlist[100],nR[100])-mu*nR[100],'c')
   plt.plot(nL[100],SW.ftot(Tlist[100],nL[100])-mu*nR[100],'ko')
   plt.plot(nR[100],SW.ftot(Tlist[100],nR[100])-mu*nR[100],'ko')
   plt.show()
@@ -145,7 +145,7 @@ def gfe():
 
 def gfe2():
   x2=plt.linspace(1e-20,.12,40000)
-  mu=SW.numH_dftot_dn(Tlist[100],nR[100])*(x2-nR[100])+SW.ftot(Tlist[100],nR[100])
+  mu=SW.dftot_dn(Tlist[100],nR[100])*(x2-nR[100])+SW.ftot(Tlist[100],nR[100])
   plt.figure()
   plt.title('Grand free energy per volume vs n@ T=%0.4f'%Tlist[100])
   plt.ylabel('Grand free energy per volume')
@@ -160,7 +160,7 @@ def gfe2():
   
 def gfe3():
   x2=plt.linspace(1e-20,.2,40000)
-  mu=SW.numH_dftot_dn(Tlist[100],x2)
+  mu=SW.dftot_dn(Tlist[100],x2)
   plt.figure()
   plt.title('Grand free energy per volume vs n@ T=%0.4f'%Tlist[100])
   plt.ylabel('Grand free energy per volume')
@@ -224,7 +224,7 @@ def ideal():
 def gfe5():
   x2=plt.linspace(1e-20,.2,4000)
   lazy=100
-  mu=SW.numH_dftot_dn(Tlist[lazy],x2)
+  mu=SW.dftot_dn(Tlist[lazy],x2)
   plt.figure()
   plt.title('Grand free energy per volume vs n@ T=%0.4f'%Tlist[lazy])
   plt.ylabel('Grand free energy per volume')
@@ -265,7 +265,7 @@ def cotangent_t100():
         plt.ylabel('Helmholtz free energy per volume')
         plt.xlabel('filling fraction')
         plt.plot(x2,SW.ftot(Tlist[100],x2),color='#f36118',linewidth=3)
-        plt.plot(x2, SW.numH_dftot_dn(Tlist[100],nR[100])*(x2-nR[100])+SW.ftot(Tlist[100],nR[100]),color='#00c0c0',linewidth=2)
+        plt.plot(x2, SW.dftot_dn(Tlist[100],nR[100])*(x2-nR[100])+SW.ftot(Tlist[100],nR[100]),color='#00c0c0',linewidth=2)
         #plt.plot(nL[100],SW.ftot(Tlist[100],nL[100]),'ko')
         #plt.plot(nR[100],SW.ftot(Tlist[100],nR[100]),'ko')
         plt.plot(nL[100],SW.ftot(Tlist[100],nL[100]),'ko')
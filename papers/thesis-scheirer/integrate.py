@@ -7,63 +7,180 @@ import numpy as np
 # Email: daniel.edward.roth@gmail.com
 # Date: January 2014
 
-# very simple
-def simple(func,a,b):
-    # func should be a function of x
-
-    # initialization
-    integral = 0
-
-    # step size
-    dx = 1e-3
-
-    # integrate
-    for x in np.arange(a,b,dx):
-        integral += func(x)*dx
+# Each rule calls func just once, with an array of abscissae x whose
+# first axis runs over the points of the rule.  The limits a and b may
+# be arrays (e.g. one upper limit for each density), in which case x
+# has shape (points,) + shape of a and b, so func(x) can broadcast x
+# against arrays of densities or temperatures of that shape, and we
+# return one integral for each.
+
+def _abscissae(a, b, t):
+    """a + (b-a)*t for each of the points t in [0,1], along axis 0."""
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    t = np.reshape(t, (-1,) + (1,)*np.broadcast(a, b).ndim)
+    return a + (b - a)*t
 
-    return integral
+# very simple
+def simple(func, a, b):
+    # func should be a function of x.  This used to sum func at steps
+    # of 1e-3 whatever the range, so now we let gauss_kronrod (below)
+    # choose the points instead.
+    return gauss_kronrod(func, a, b)[0]
 
 # Trapezoidal rule
-def trapezoid(func,a,b,n):
+def trapezoid(func, a, b, n):
     '''func is a function of x
     [a,b] are the limits of integration
     n is the number of segments desired'''
 
-    h = (b-a)/n
-    s = func(a) + func(b)
-
-    for k in range (1,n,1):
-        s += 2*func(a + k*h)
-
-    return h/2*s
+    h = (np.asarray(b) - a)/n
+    w = np.ones(n+1)
+    w[0] = w[-1] = 0.5
+    fx = func(_abscissae(a, b, np.arange(n+1)/n))
+    return h*np.tensordot(w, fx, axes=1)
 
 
 # Midpoint rule
-def midpoint(func,a,b,n):
+def midpoint(func, a, b, n):
     ''' func is a function of x
     [a,b] are the limits of integration
     n is the number of segments desired '''
-    dx = (b-a)/n
-    s = 0
-    for i in xrange(n):
-        s += func(dx*(i + .5)+a)
-    return s*dx
+    dx = (np.asarray(b) - a)/n
+    return np.sum(func(_abscissae(a, b, (np.arange(n) + .5)/n)), axis=0)*dx
 
 
 # Simpson's rule
-def simpson(func,a,b,n):
+def simpson(func, a, b, n):
     '''func is a function of x
     [a,b] are the limits of integration
     n is the number of segments desired
     n must be evnen'''
 
-    h = (b - a)/n
-    s = func(a) + func(b)
-
-    for i in range (1,int(n/2),1):
-        s += func(a + (2*i-2)*h) + 4*func(a + (2*i-1)*h) + func(a + 2*i*h)
-
-    return h/3*s
+    h = (np.asarray(b) - a)/n
+    w = np.ones(n+1)
+    w[1:-1:2] = 4
+    w[2:-1:2] = 2
+    fx = func(_abscissae(a, b, np.arange(n+1)/n))
+    return h/3*np.tensordot(w, fx, axes=1)
+
+# Gauss-Legendre quadrature with n points in each of the given number
+# of equal panels, which is exact for polynomials of degree 2n-1 on
+# each panel, so a smooth integrand needs far fewer points than the
+# rules above.
+_legendre = {}
+
+def _legendre_rule(n):
+    if n not in _legendre:
+        t, w = np.polynomial.legendre.leggauss(n)
+        _legendre[n] = ((t + 1)/2, w/2) # on [0,1]
+    return _legendre[n]
+
+def _panels(t, w, panels):
+    """The rule with points t and weights w on [0,1] repeated on each
+    of panels equal parts of [0,1]."""
+    starts = np.arange(panels)/panels
+    return (starts[:, np.newaxis] + t/panels).ravel(), np.tile(w/panels, panels)
+
+def gauss_legendre(func, a, b, n=20, panels=1):
+    '''func is a function of x
+    [a,b] are the limits of integration
+    n is the number of points in each of the panels'''
+    t, w = _legendre_rule(n)
+    t, w = _panels(t, w, panels)
+    fx = func(_abscissae(a, b, t))
+    return (np.asarray(b) - a)*np.tensordot(w, fx, axes=1)
+
+# The 15 point Gauss-Kronrod rule on [-1,1] (as in QUADPACK's qk15),
+# whose odd points are the 7 point Gauss-Legendre rule, so comparing
+# the two estimates the error at no extra cost.
+_kronrod_x = np.array([0.991455371120812639206854697526329,
+                       0.949107912342758524526189684047851,
+                       0.864864423359769072789712788640926,
+                       0.741531185599394439863864773280788,
+                       0.586087235467691130294144845693013,
+                       0.405845151377397166906606412076961,
+                       0.207784955007898467600689403773245,
+                       0.000000000000000000000000000000000])
+_kronrod_w = np.array([0.022935322010529224963732008058970,
+                       0.063092092629978553290700663189204,
+                       0.104790010322250183839876322541518,
+                       0.140653259715525918745189590510238,
+                       0.169004726639267902826583426598550,
+                       0.190350578064785409913256402421014,
+                       0.204432940075298892414161999234649,
+                       0.209482141084727828012999174891714])
+_gauss7_w = np.array([0.129484966168869693270611432679082,
+                      0.279705391489276667901467771423780,
+                      0.381830050505118944950369775488975,
+                      0.417959183673469387755102040816327])
+_kronrod_t = np.concatenate((-_kronrod_x, _kronrod_x[-2::-1]))
+_kronrod_t = (_kronrod_t + 1)/2
+_kronrod_wk = np.concatenate((_kronrod_w, _kronrod_w[-2::-1]))/2
+_kronrod_wg = np.zeros(15)
+_kronrod_wg[1::2] = np.concatenate((_gauss7_w, _gauss7_w[-2::-1]))/2
+
+def kronrod_rule(panels=1):
+    '''The points t in [0,1] of the 15 point Gauss-Kronrod rule on each
+    of panels equal parts of [0,1], with its weights and those of the 7
+    point Gauss rule (zero at the other points), for when we need to
+    combine the values at the points ourselves.  The difference
+    between the two sums estimates the error.'''
+    t, wk = _panels(_kronrod_t, _kronrod_wk, panels)
+    wg = np.tile(_kronrod_wg/panels, panels)
+    return t, wk, wg
+
+def _kronrod(func, lo, hi):
+    """The 15 point Gauss-Kronrod estimate of the integral over each of
+    the panels [lo,hi] (arrays whose first axis runs over panels), and
+    QUADPACK's estimate of its error, which scales the difference from
+    the 7 point Gauss rule (really the error of the latter) down to
+    what we expect of the 15 point rule."""
+    t = np.reshape(_kronrod_t, (1, 15) + (1,)*(lo.ndim - 1))
+    x = lo[:, np.newaxis] + (hi - lo)[:, np.newaxis]*t
+    fx = func(x.reshape((-1,) + x.shape[2:]))
+    fx = fx.reshape((lo.shape[0], 15) + fx.shape[1:])
+    h = hi - lo
+    kronrod = np.tensordot(_kronrod_wk, fx, axes=(0, 1))
+    gauss = np.tensordot(_kronrod_wg, fx, axes=(0, 1))
+    spread = np.tensordot(_kronrod_wk, np.abs(fx - kronrod[:, np.newaxis]), axes=(0, 1))
+    error = np.abs(kronrod - gauss)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error = np.where(spread > 0, spread*np.minimum(1, (200*error/spread)**1.5), error)
+    return h*kronrod, np.abs(h)*error
+
+def gauss_kronrod(func, a, b, tol=1e-10, rtol=1e-8, maxpanels=200):
+    '''func is a function of x
+    [a,b] are the limits of integration
+    Returns the integral and an estimate of its error.  We split the
+    range into panels, each integrated with the 15 point Gauss-Kronrod
+    rule, bisecting the panel with the largest error until each
+    integral (if a or b are arrays) is within tol or rtol of the
+    answer.  Each integral gets its own panels, but they all have the
+    same number of them, so that we can still hand func one array of
+    abscissae.'''
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    lo, hi = a[np.newaxis].copy(), b[np.newaxis].copy()
+    integrals, errors = _kronrod(func, lo, hi)
+    while True:
+        integral = np.sum(integrals, axis=0)
+        error = np.sum(errors, axis=0)
+        # (nan never converges, so we don't wait for it)
+        if not np.any(error > np.maximum(tol, rtol*np.abs(integral))) or len(lo) >= maxpanels:
+            return integral, error
+        worst = np.argmax(np.nan_to_num(errors), axis=0)[np.newaxis]
+        l = np.take_along_axis(lo, worst, axis=0)
+        r = np.take_along_axis(hi, worst, axis=0)
+        mid = (l + r)/2
+        halves, halferrors = _kronrod(func, np.concatenate((l, mid)), np.concatenate((mid, r)))
+        # the worst panel becomes its left half, and we add its right half
+        np.put_along_axis(hi, worst, mid, axis=0)
+        np.put_along_axis(integrals, worst, halves[:1], axis=0)
+        np.put_along_axis(errors, worst, halferrors[:1], axis=0)
+        lo = np.concatenate((lo, mid))
+        hi = np.concatenate((hi, r))
+        integrals = np.concatenate((integrals, halves[1:]))
+        errors = np.concatenate((errors, halferrors[1:]))
 
 def testfunc(x):
     return np.exp(x)
@@ -71,7 +188,7 @@ def testfunc(x):
 def testfunc_antideriv(x):
     return np.exp(x)
 
-def anal(func,a,b):
+def anal(func, a, b):
     return testfunc(b) - testfunc(a)
 
 # n = 1000
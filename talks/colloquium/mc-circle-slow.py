@@ -1,7 +1,7 @@
 #!/usr/bin/python
 
 from __future__ import division
-import time, sys, matplotlib
+import time, sys, matplotlib, numpy
 
 if not ('show' in sys.argv):
   matplotlib.use('Agg')
@@ -12,6 +12,9 @@ import pylab
 from matplotlib.collections import PolyCollection
 from matplotlib.colors import colorConverter
 import matplotlib.animation as animation
+import os
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/..')
+import hardmc
 
 ff = .4
 
@@ -81,10 +84,14 @@ def touch(a, b):
     return True
   return False
 
-def almost_touch(a, b):
-  if (distsq(a, b) < 4*(r+delta_contact)*(r+delta_contact)):
-    return True
-  return False
+def add_nA(x):
+  # the length of the slice of each bin within 2 of x
+  xjp = arange(len(histogram))*dx + dx
+  xjm = xjp - dx
+  near = (abs(xjp - x) <= 2) & (abs(xjm - x) <= 2)
+  lineseg = abs(sqrt(4 - (xjp[near]-x)**2) - sqrt(4 - (xjm[near]-x)**2))
+  nA_histogram[2*numpy.flatnonzero(near)] += lineseg
+  nA_histogram[2*numpy.flatnonzero(near)+1] += lineseg
 ##########################
 
 
@@ -123,6 +130,9 @@ if 'pair' in sys.argv:
       circles[i,1] = oldzeroy
       break
 
+# the circles themselves, without the extra one at the end
+system = hardmc.HardDisks(circles[:N], lenx, leny, r, scale)
+
 # Plotting
 fig = figure()
 if 'pair' in sys.argv:
@@ -161,27 +171,14 @@ def init():
 def setup():
   global circles, histogram_doubled
   for i in xrange(1,N):
-    keep = True
     temp = move(circles[i])
-    if temp[0] - r < 0 or temp[0] + r > lenx:
-      keep = False
-    else:
-      for j in xrange(N):
-        if j != i and touch(temp, circles[j]):
-          keep = False
-          break
-    if keep: circles[i] = temp
+    keep = system.fits(i, temp)
+    if keep: system.place(i, temp)
     if 'gsigma' in sys.argv:
       binnum = round(circles[i][0]/dx) % len(histogram)
       histogram_doubled[2*binnum] += 1 # add another count to histogram
       histogram_doubled[2*binnum+1] += 1 # add another count to histogram
-      for j in xrange(len(histogram)):
-        xjp = j*dx + dx
-        xjm = j*dx
-        if abs(xjp - circles[i][0]) <= 2 and abs(xjm - circles[i][0]) <= 2:
-          lineseg = abs(sqrt(4 - (xjp-circles[i][0])**2) -  sqrt(4 - (xjm-circles[i][0])**2))
-          nA_histogram[2*j] += lineseg
-          nA_histogram[2*j+1] += lineseg
+      add_nA(circles[i][0])
 
 defaultc = (0,.7,1,1)
 highlightc = (0,0,1,1)
@@ -213,15 +210,8 @@ def animate(p):
         i = 1
       else:
         i = 0
-    keep = True
     temp = move(circles[i])
-    if temp[0] - r < 0 or temp[0] + r > lenx:
-      keep = False
-    else:
-      for j in xrange(N):
-        if j != i and touch(temp, circles[j]):
-          keep = False
-          break
+    keep = system.fits(i, temp)
     count += 1
     if keep:
       success += 1
@@ -239,27 +229,14 @@ def animate(p):
       line.set_ydata(N*area*histogram_doubled/sum(histogram_doubled)/dx/leny)
     oldpos = array([circles[i,0], circles[i,1]])
     if keep:
-      circles[i] = temp
+      system.place(i, temp)
     if 'gsigma' in sys.argv:
       contact_counts += 1
-      for j in xrange(len(histogram)):
-        xjp = j*dx + dx
-        xjm = j*dx
-        if abs(xjp - circles[i][0]) <= 2 and abs(xjm - circles[i][0]) <= 2:
-          lineseg = abs(sqrt(4 - (xjp-circles[i][0])**2) -  sqrt(4 - (xjm-circles[i][0])**2))
-          nA_histogram[2*j] += lineseg
-          nA_histogram[2*j+1] += lineseg
-      inc = zeros(N)
-      for j in xrange(N):
-        for k in xrange(j):
-          if almost_touch(circles[k], circles[j]):
-            inc[k] = 1
-            inc[j] = 1
-      for j in xrange(N):
-        if inc[j]:
-          binnum = int(round(circles[j][0]/dx)) % len(histogram)
-          contact_histogram[2*binnum] += 1
-          contact_histogram[2*binnum+1] += 1
+      add_nA(circles[i][0])
+      inc = system.contacts(delta_contact)
+      binnums = numpy.around(circles[:N][inc,0]/dx).astype(int) % len(histogram)
+      numpy.add.at(contact_histogram, 2*binnums, 1)
+      numpy.add.at(contact_histogram, 2*binnums+1, 1)
     i += 1
   i -= 1
 
@@ -293,11 +270,8 @@ def animate(p):
       colors[i] = highlightc
   if 'gsigma' in sys.argv:
     #colors = [defaultc]*(N+1)
-    for j in xrange(N):
-      for k in xrange(j):
-        if almost_touch(circles[k], circles[j]):
-          colors[k] = contactc
-          colors[j] = contactc
+    for j in numpy.flatnonzero(system.contacts(delta_contact)):
+      colors[j] = contactc
   for j in xrange(circleplotnum):
     for shift in [0, -leny, leny]:
       if 'pair' in sys.argv and j != 0:
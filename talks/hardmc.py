@@ -0,0 +1,213 @@
+#!/usr/bin/python2
+from __future__ import division
+import numpy as np
+
+# Monte Carlo of hard disks and hard triangles for the talk animations
+# (colloquium/mc-circle-slow.py, polyhedra/mc-tri.py and
+# polyhedra/mc-tri-slow.py).  The particles live in a box of lenx by
+# leny with hard walls at x = 0 and x = lenx, and periodic in y, as in
+# those scripts.
+#
+# Rather than testing a trial move against every other particle with a
+# python loop, we keep the particles sorted into a grid of cells at
+# least as wide as the distance at which two particles can touch, so a
+# trial move need only be compared with the particles in the 3x3 cells
+# around it, and we compare against all of those at once with numpy.
+# Histograms are accumulated for all particles at once with np.add.at.
+
+class HardParticles(object):
+    """The particles with centers[i] (and angles[i], for shapes that
+    have one).  centers is used in place, so that a script that plots
+    the array it passed in sees the moves we accept.  reach is the
+    largest center-center distance at which two particles can touch,
+    scale the width of the gaussian trial displacements and dphi that
+    of the trial rotations."""
+    period = None # the rotational symmetry of the shape, if any
+
+    def __init__(self, centers, lenx, leny, reach, angles=None, scale=0.5, dphi=0):
+        self.centers = centers
+        self.angles = angles if angles is not None else np.zeros(len(centers))
+        self.N = len(centers)
+        self.lenx = lenx
+        self.leny = leny
+        self.reach = reach
+        self.scale = scale
+        self.dphi = dphi
+        self.attempted = 0
+        self.accepted = 0
+
+        self.nx = max(1, int(lenx // reach))
+        self.ny = max(1, int(leny // reach))
+        # the cells around each cell (including itself), wrapping in y
+        self._near = []
+        for cx in range(self.nx):
+            for cy in range(self.ny):
+                near = set()
+                for x in range(max(0, cx-1), min(self.nx, cx+2)):
+                    for y in range(cy-1, cy+2):
+                        near.add(x*self.ny + y % self.ny)
+                self._near.append(np.array(sorted(near)))
+        # members[c, :counts[c]] are the particles in cell c
+        self.counts = np.zeros(self.nx*self.ny, dtype=int)
+        self.members = np.zeros((self.nx*self.ny, 4), dtype=int)
+        self.cells = np.zeros(self.N, dtype=int)
+        for i in range(self.N):
+            self.cells[i] = self.cell(self.centers[i])
+            self._insert(i, self.cells[i])
+
+    def cell(self, pos):
+        cx = min(max(int(pos[0]*self.nx/self.lenx), 0), self.nx-1)
+        cy = int(pos[1]*self.ny/self.leny) % self.ny
+        return cx*self.ny + cy
+
+    def _insert(self, i, c):
+        if self.counts[c] == self.members.shape[1]:
+            self.members = np.concatenate((self.members, np.zeros_like(self.members)), axis=1)
+        self.members[c, self.counts[c]] = i
+        self.counts[c] += 1
+
+    def _remove(self, i, c):
+        k = np.flatnonzero(self.members[c, :self.counts[c]] == i)[0]
+        self.counts[c] -= 1
+        self.members[c, k] = self.members[c, self.counts[c]]
+
+    def neighbors(self, pos, i=None):
+        """The particles (other than i) close enough to pos to touch a
+        particle there."""
+        cells = self._near[self.cell(pos)]
+        inside = np.arange(self.members.shape[1]) < self.counts[cells][:, np.newaxis]
+        near = self.members[cells][inside]
+        if i is not None:
+            near = near[near != i]
+        return near
+
+    def separation(self, pos, others):
+        """The vectors from pos to the centers of others, using the
+        nearest periodic image in y."""
+        d = self.centers[others] - pos
+        d[:, 1] -= self.leny*np.round(d[:, 1]/self.leny)
+        return d
+
+    def fits(self, i, pos, angle=None):
+        """Whether particle i can be moved to pos (and angle)."""
+        if angle is None:
+            angle = self.angles[i]
+        if self.outside(pos, angle):
+            return False
+        near = self.neighbors(pos, i)
+        return len(near) == 0 or not self.overlaps(pos, angle, near).any()
+
+    def place(self, i, pos, angle=None):
+        self.centers[i] = pos
+        if angle is not None:
+            self.angles[i] = angle
+        c = self.cell(pos)
+        if c != self.cells[i]:
+            self._remove(i, self.cells[i])
+            self._insert(i, c)
+            self.cells[i] = c
+
+    def trial(self, i):
+        """A gaussian trial move of particle i."""
+        pos = self.centers[i] + self.scale*np.random.normal(size=2)
+        pos[1] %= self.leny
+        angle = self.angles[i]
+        if self.period is not None:
+            angle = (angle + self.dphi*np.random.normal()) % self.period
+        return pos, angle
+
+    def attempt(self, i):
+        """Try to move particle i, returning True if we moved it."""
+        pos, angle = self.trial(i)
+        self.attempted += 1
+        if self.fits(i, pos, angle):
+            self.place(i, pos, angle)
+            self.accepted += 1
+            return True
+        return False
+
+    def sweep(self, sweeps=1):
+        """Attempt to move each particle in turn, sweeps times over,
+        returning how many moves we accepted."""
+        accepted = 0
+        for s in range(sweeps):
+            for i in range(self.N):
+                accepted += self.attempt(i)
+        return accepted
+
+    def add_density(self, histogram, dx):
+        """Count each particle in the bin of width dx in x holding its
+        center."""
+        bins = np.minimum((self.centers[:, 0]/dx).astype(int), len(histogram)-1)
+        np.add.at(histogram, bins, 1)
+
+    def add_angles(self, histogram, dx, dtheta):
+        """Count each particle in histogram[angle bin, x bin]."""
+        xbins = np.minimum((self.centers[:, 0]/dx).astype(int), histogram.shape[1]-1)
+        tbins = np.minimum((self.angles/dtheta).astype(int), histogram.shape[0]-1)
+        np.add.at(histogram, (tbins, xbins), 1)
+
+class HardDisks(HardParticles):
+    """Disks of radius r."""
+    def __init__(self, centers, lenx, leny, r=1, scale=0.5):
+        self.r = r
+        HardParticles.__init__(self, centers, lenx, leny, 2*r, scale=scale)
+
+    def outside(self, pos, angle):
+        return pos[0] - self.r < 0 or pos[0] + self.r > self.lenx
+
+    def overlaps(self, pos, angle, others):
+        d = self.separation(pos, others)
+        return (d**2).sum(axis=1) < 4*self.r**2
+
+    def contacts(self, delta):
+        """Which disks have another within delta of touching them.  Our
+        talks have few enough disks that we just compare all pairs."""
+        d = self.centers[:, np.newaxis, :] - self.centers[np.newaxis, :, :]
+        d[..., 1] -= self.leny*np.round(d[..., 1]/self.leny)
+        close = (d**2).sum(axis=2) < 4*(self.r + delta)**2
+        np.fill_diagonal(close, False)
+        return close.any(axis=1)
+
+class HardTriangles(HardParticles):
+    """Equilateral triangles with a distance l from center to vertex,
+    whose first vertex points at an angle phi from the y axis, as in
+    the verts() of the talk scripts."""
+    period = 2*np.pi/3
+
+    def __init__(self, centers, angles, lenx, leny, l=1, scale=0.1, dphi=np.pi/32):
+        self.l = l
+        HardParticles.__init__(self, centers, lenx, leny, 2*l, angles=angles,
+                               scale=scale, dphi=dphi)
+
+    def verts(self, pos, phi):
+        """The vertices, as verts[..., vertex, xy], of triangles at pos
+        with angles phi (either may be arrays of them)."""
+        phi = np.asarray(phi)[..., np.newaxis] + np.arange(3)*self.period
+        pos = np.asarray(pos)[..., np.newaxis, :]
+        return pos + self.l*np.stack((np.sin(phi), np.cos(phi)), axis=-1)
+
+    def outside(self, pos, angle):
+        xs = self.verts(pos, angle)[:, 0]
+        return xs.max() > self.lenx or xs.min() < 0
+
+    def overlaps(self, pos, angle, others):
+        d = self.separation(pos, others)
+        r2 = (d**2).sum(axis=1)
+        # Each triangle holds a circle of radius l/2, so closer than l
+        # they must overlap.  Otherwise neither can be inside the other,
+        # so they overlap only if some pair of their edges cross.
+        a = self.verts([0, 0], angle) # (3, 2)
+        b = self.verts(d, self.angles[others]) # (others, 3, 2)
+        p, q = a, np.roll(a, 1, axis=0)
+        s, t = b, np.roll(b, 1, axis=1)
+        def cross(u, v, w):
+            # the z component of (v - u) x (w - u)
+            return (v[..., 0] - u[..., 0])*(w[..., 1] - u[..., 1]) - \
+                   (v[..., 1] - u[..., 1])*(w[..., 0] - u[..., 0])
+        # edges of a along axis 1, edges of b along axis 2
+        p, q = p[np.newaxis, :, np.newaxis, :], q[np.newaxis, :, np.newaxis, :]
+        s, t = s[:, np.newaxis, :, :], t[:, np.newaxis, :, :]
+        crossing = ((cross(p, q, s)*cross(p, q, t) < 0) &
+                    (cross(s, t, p)*cross(s, t, q) < 0))
+        return (r2 < self.l**2) | ((r2 < 4*self.l**2) & crossing.any(axis=(1, 2)))
@@ -7,6 +7,9 @@ from pylab import *
 from matplotlib.collections import PolyCollection
 from matplotlib.colors import colorConverter
 import matplotlib.animation as animation
+import os
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/..')
+import hardmc
 
 ff = .2
 
@@ -68,10 +71,6 @@ def turn(angle):
   return angle + fac*phi_m*x
 
 # Functions
-def distsq(a, b):
-  v = periodic_diff(a, b)
-  return v[0]*v[0] + v[1]*v[1]
-
 def periodic_diff(a, b):
   v = b - a
   while v[1] > leny/2: v[1] -= leny
@@ -79,36 +78,6 @@ def periodic_diff(a, b):
   return v
 
 
-def touch(pos1, pos2, phi1, phi2):
-  if (distsq(pos2, pos1) > 4*l*l):
-    return False
-  if (distsq(pos2, pos1) < l*l):
-    return True
-  v1 = verts([0,0], phi1)
-  v2 = verts(periodic_diff(pos1, pos2), phi2)
-  for i in range(3):
-    p1 = v1[i-1]
-    p2 = v1[i]
-    m1 = (p2[1]-p1[1])/(p2[0]-p1[0])
-    b1 = p1[1]-m1*p1[0]
-    for j in range(3):
-      p3 = v2[j-1]
-      p4 = v2[j]
-      m2 = (p4[1]-p3[1])/(p4[0]-p3[0])
-      b2 = p3[1]-m2*p3[0]
-      xint = (b1-b2)/(m2-m1)
-      if xint < p1[0] and xint > p2[0]:
-        if xint < p3[0] and xint > p4[0]:
-          return True
-        if xint < p4[0] and xint > p3[0]:
-          return True
-      if xint < p2[0] and xint > p1[0]:
-        if xint < p3[0] and xint > p4[0]:
-          return True
-        if xint < p4[0] and xint > p3[0]:
-          return True
-  return False
-
 def verts(pos, phi):
   x = pos[0]
   y = pos[1]
@@ -219,41 +188,21 @@ skip = 1
 i = 0
 
 colors = [defaultc]*(n+1)
+# the triangles themselves, without the extra one at the end
+system = hardmc.HardTriangles(centers[:n], angles[:n], lenx, leny, l, scale=r_m, dphi=phi_m)
+
 def initialize():
-  global centers, angles
-  for i in xrange(n):
-    keep = True
-    temp = move(centers[i])
-    tempa = turn(angles[i])
-    xs = verts(temp, tempa)[:,0]
-    if max(xs) > lenx or min(xs) < 0:
-      keep = False
-    else:
-      for j in xrange(n):
-        if j != i and touch(temp, centers[j], tempa, angles[j]):
-          keep = False
-          break
-    if keep:
-      centers[i] = temp
-      angles[i] = tempa
+  system.sweep()
 
 def animate(p):
   global count, centers, angles, coords, extras, skip, colors, histogram, i, line2, success
   if (i >= n):
     i = 0
-  keep = True
   ax.cla()
   temp = move(centers[i])
   tempa = turn(angles[i])
   coords[n], coords2[n], extras[n], extras2[n] = chop(verts(temp, tempa))
-  xs = verts(temp, tempa)[:,0]
-  if max(xs) > lenx or min(xs) < 0:
-    keep = False
-  else:
-    for j in xrange(n):
-      if j != i and touch(temp, centers[j], tempa, angles[j]):
-        keep = False
-        break
+  keep = system.fits(i, temp, tempa)
 
   count += 1
   if keep:
@@ -318,8 +267,7 @@ def animate(p):
                      linewidth=2, facecolor='slategray', zorder=3, alpha=aralpha)
   fig.tight_layout()
   if keep:
-    centers[i] = temp
-    angles[i] = tempa
+    system.place(i, temp, tempa)
     coords[i], coords2[i], extras[i], extras2[i] = chop(verts(centers[i], angles[i]))
     colors[i] = goodc
   else:
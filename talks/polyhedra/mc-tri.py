@@ -7,6 +7,9 @@ from pylab import *
 from matplotlib.collections import PolyCollection
 from matplotlib.colors import colorConverter
 import matplotlib.animation as animation
+import os
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__))+'/..')
+import hardmc
 
 ff = .5
 
@@ -47,36 +50,6 @@ xcoords = arange(0, lenx, dx) + dx/2
 phi_m = pi/32
 r_m = .1
 
-def move(pos):
-  x = 2*rand()-1
-  y = 2*rand()-1
-  r2 = x*x + y*y
-  while (r2 > 1):
-      x = 2*rand()-1
-      y = 2*rand()-1
-      r2 = x*x + y*y
-  fac = sqrt(-2*log(r2)/r2)
-  newpos = pos + fac*r_m*array([x, y])
-  while newpos[1] > leny: newpos[1] -= leny
-  while newpos[1] < 0: newpos[1] += leny
-  return newpos
-
-def turn(angle):
-  x = 2*rand()-1
-  y = 2*rand()-1
-  r2 = x*x + y*y
-  while (r2 > 1):
-      x = 2*rand()-1
-      y = 2*rand()-1
-      r2 = x*x + y*y
-  fac = sqrt(-2*log(r2)/r2)
-  ang = angle + fac*phi_m*x
-  while ang > 2*pi/3:
-    ang -= 2*pi/3
-  while ang < 0:
-    ang += 2*pi/3
-  return ang
-
 # Functions
 def make_square(xs, ys):
   dx = xs[2] - xs[1]
@@ -86,46 +59,6 @@ def make_square(xs, ys):
   new_xs[::2] -= dx
   return new_xs, new_ys
 
-def distsq(a, b):
-  v = periodic_diff(a, b)
-  return v[0]*v[0] + v[1]*v[1]
-
-def periodic_diff(a, b):
-  v = b - a
-  while v[1] > leny/2: v[1] -= leny
-  while v[1] < -leny/2: v[1] += leny
-  return v
-
-def touch(pos1, pos2, phi1, phi2):
-  if (distsq(pos2, pos1) > 4*l*l):
-    return False
-  if (distsq(pos2, pos1) < l*l):
-    return True
-  v1 = verts([0,0], phi1)
-  v2 = verts(periodic_diff(pos1, pos2), phi2)
-  for i in xrange(3):
-    p1 = v1[i-1]
-    p2 = v1[i]
-    m1 = (p2[1]-p1[1])/(p2[0]-p1[0])
-    b1 = p1[1]-m1*p1[0]
-    for j in xrange(3):
-      p3 = v2[j-1]
-      p4 = v2[j]
-      m2 = (p4[1]-p3[1])/(p4[0]-p3[0])
-      b2 = p3[1]-m2*p3[0]
-      xint = (b1-b2)/(m2-m1)
-      if xint < p1[0] and xint > p2[0]:
-        if xint < p3[0] and xint > p4[0]:
-          return True
-        if xint < p4[0] and xint > p3[0]:
-          return True
-      if xint < p2[0] and xint > p1[0]:
-        if xint < p3[0] and xint > p4[0]:
-          return True
-        if xint < p4[0] and xint > p3[0]:
-          return True
-  return False
-
 def verts(pos, phi):
   x = pos[0]
   y = pos[1]
@@ -263,56 +196,20 @@ count = 0
 success = 0
 skip = 150
 
+# the triangles themselves, without the extra one at the end
+system = hardmc.HardTriangles(centers[:n], angles[:n], lenx, leny, l, scale=r_m, dphi=phi_m)
+
 def initialize():
-  global centers, angles
-  for i in xrange(n):
-    keep = True
-    temp = move(centers[i])
-    tempa = turn(angles[i])
-    xs = verts(temp, tempa)[:,0]
-    if max(xs) > lenx or min(xs) < 0:
-      keep = False
-    else:
-      for j in xrange(n):
-        if j != i and touch(temp, centers[j], tempa, angles[j]):
-          keep = False
-          break
-    if keep:
-      centers[i] = temp
-      angles[i] = tempa
+  system.sweep()
 
 def mc():
-  global count, centers, angles, coords, skip, colors, histogram, success, angle_histogram
+  global count, success
   for j in xrange(skip):
     count += 1
-    for i in xrange(n):
-      keep = True
-      temp = move(centers[i])
-      tempa = turn(angles[i])
-      xs = verts(temp, tempa)[:,0]
-      if max(xs) > lenx or min(xs) < 0:
-        keep = False
-      else:
-        for j in xrange(n):
-          if j != i and touch(temp, centers[j], tempa, angles[j]):
-            keep = False
-            break
-      if keep:
-        centers[i] = temp
-        angles[i] = tempa
-      if keep:
-        success += 1
+    success += system.sweep()
     # add histogram counts:
-    bins = linspace(0, lenx, len(histogram)+1)
-    histogram += numpy.histogram(centers[:,0], bins=bins)[0]
-    xmax = 0
-    thetamax = 0
-    for i in xrange(n):
-      x = int(centers[i,0]/dx)
-      theta = int(angles[i]/dtheta)
-      xmax = max(x, xmax)
-      thetamax = max(theta, thetamax)
-      angle_histogram[theta, x] += 1
+    system.add_density(histogram, dx)
+    system.add_angles(angle_histogram, dx, dtheta)
 
 #fig.subplots_adjust(right=0.8)
 cbar_ax = fig.add_axes([0.517, 0.05, 0.02, 0.4])